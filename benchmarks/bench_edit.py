@@ -0,0 +1,54 @@
+'''
+Time bulk edits through the object model.
+
+    python benchmarks/bench_edit.py path/to/file.kicad_sch [--writes 100000]
+
+Does --writes property value writes (round robin over every symbol's
+Value property in a schematic, or every footprint's value text on a PCB),
+then the same number of position writes (.at.value), reporting the 
+time per write.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import argparse
+import time
+
+import skip
+
+def targets_for(src):
+    if isinstance(src, skip.PCB):
+        fps = list(src.footprint)
+        return [fp.Value for fp in fps], fps
+    syms = list(src.symbol)
+    return [s.property.Value for s in syms], syms
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk writes')
+    parser.add_argument('file', help='kicad_sch/kicad_pcb file to load')
+    parser.add_argument('--writes', type=int, default=100000, help='number of writes of each kind')
+    args = parser.parse_args()
+    
+    if args.file.endswith('.kicad_pcb'):
+        src = skip.PCB(args.file)
+    else:
+        src = skip.Schematic(args.file)
+        
+    props, positioned = targets_for(src)
+    
+    start = time.perf_counter()
+    for i in range(args.writes):
+        props[i % len(props)].value = f'V{i}'
+    elapsed = time.perf_counter() - start
+    print(f'{args.writes} property writes: {elapsed:.3f}s ({1e6*elapsed/args.writes:.2f} us/write)')
+    
+    start = time.perf_counter()
+    for i in range(args.writes):
+        el = positioned[i % len(positioned)]
+        el.at.value = [i % 100, 50, 0]
+    elapsed = time.perf_counter() - start
+    print(f'{args.writes} position writes: {elapsed:.3f}s ({1e6*elapsed/args.writes:.2f} us/write)')
+        
+
+if __name__ == '__main__':
+    main()
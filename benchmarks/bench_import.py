@@ -0,0 +1,82 @@
+'''
+Time how long short-lived scripts take to get going: a fresh interpreter
+importing skip, then getting to the schematic and PCB classes.
+
+    python benchmarks/bench_import.py [--repeat 20]
+
+Each case runs in a new python process, --repeat times, and the best and
+median wall times are reported, along with a bare interpreter start for
+reference.  Also part of bench_suite.py.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+Cases = [
+    ('python', 'pass'),
+    ('import skip', 'import skip'),
+    ('skip.Schematic', 'import skip; skip.Schematic'),
+    ('skip.PCB', 'import skip; skip.PCB'),
+    ('everything', 'import skip; skip.Schematic; skip.PCB; skip.Project; skip.load_many'),
+]
+
+def _env():
+    # run against the same skip as we're running with
+    import skip
+    env = dict(os.environ)
+    skipRoot = os.path.dirname(os.path.dirname(os.path.abspath(skip.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(len, [skipRoot, env.get('PYTHONPATH', '')]))
+    return env
+
+def time_case(code:str, repeat:int, env:dict):
+    times = []
+    for _i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+def import_records(repeat:int):
+    '''
+        Benchmark records, as in bench_suite, for each case
+    '''
+    env = _env()
+    records = []
+    for (name, code) in Cases:
+        times = time_case(code, repeat, env)
+        records.append({
+            'scale': 0,
+            'file': 'import',
+            'size_bytes': 0,
+            'operation': name,
+            'count': 1,
+            'seconds': min(times),
+            'median_seconds': statistics.median(times),
+            'per_op_us': 1e6 * min(times),
+        })
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark import/startup time')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per case')
+    parser.add_argument('--json', action='store_true', help='output JSON records')
+    args = parser.parse_args()
+
+    records = import_records(args.repeat)
+    if args.json:
+        json.dump(records, sys.stdout, indent=2)
+        print()
+        return
+    for rec in records:
+        print(f"{rec['operation']:16s} best {1000*rec['seconds']:7.1f}ms  median {1000*rec['median_seconds']:7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+'''
+Compare the time taken to get a tree out of kicad files, using 
+sexpdata.loads (the historical path) and the native skip reader.
+
+    python benchmarks/bench_load.py path/to/board.kicad_pcb [more files...]
+
+Each loader is run --repeat times per file and the best time is reported.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import argparse
+import os
+import time
+
+import sexpdata
+from skip.sexp import reader
+
+
+def sexpdata_load(fpath:str):
+    with open(fpath, 'r') as f:
+        return sexpdata.loads(f.read())
+
+def best_of(repeat:int, func, *args):
+    best = None
+    result = None
+    for _i in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark s-expression loading')
+    parser.add_argument('files', nargs='+', help='kicad_sch/kicad_pcb files to load')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per loader (best is kept)')
+    parser.add_argument('--no-check', action='store_true', help='skip checking both trees are identical')
+    args = parser.parse_args()
+    
+    for fpath in args.files:
+        size_mb = os.path.getsize(fpath) / (1024*1024)
+        t_sexpdata, tree_sexpdata = best_of(args.repeat, sexpdata_load, fpath)
+        t_native, tree_native = best_of(args.repeat, reader.load, fpath)
+        print(f'{fpath} ({size_mb:.1f} MB)')
+        print(f'  sexpdata.loads  {t_sexpdata:8.3f}s')
+        print(f'  skip reader     {t_native:8.3f}s  ({t_sexpdata/t_native:.1f}x)')
+        if not args.no_check:
+            print(f'  identical trees: {tree_sexpdata == tree_native}')
+        
+
+if __name__ == '__main__':
+    main()
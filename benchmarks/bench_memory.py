@@ -0,0 +1,60 @@
+'''
+Measure the memory retained by a loaded schematic or PCB.
+
+    python benchmarks/bench_memory.py path/to/board.kicad_pcb [--eager]
+
+Uses tracemalloc, so loading is a lot slower than usual -- only the 
+memory figures are meaningful here.  With --eager, lazy parsing is 
+turned off so every node in the file gets a ParsedValue, which is the 
+worst case (and what a full crawl of the tree ends up costing).
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import argparse
+import gc
+import os
+import tracemalloc
+
+import skip
+from skip.sexp.parser import ParsedValue
+
+
+def load(fpath:str):
+    if fpath.endswith('.kicad_pcb'):
+        return skip.PCB(fpath)
+    return skip.Schematic(fpath)
+
+def count_nodes(src):
+    count = 0
+    for obj in gc.get_objects():
+        if isinstance(obj, ParsedValue):
+            count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory retained after load')
+    parser.add_argument('files', nargs='+', help='kicad_sch/kicad_pcb files to load')
+    parser.add_argument('--eager', action='store_true', help='disable lazy parsing (materialize every node)')
+    args = parser.parse_args()
+    
+    if args.eager:
+        ParsedValue.LazyParsing = False
+        
+    for fpath in args.files:
+        size_mb = os.path.getsize(fpath) / (1024*1024)
+        gc.collect()
+        tracemalloc.start()
+        src = load(fpath)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        nodes = count_nodes(src)
+        print(f'{fpath} ({size_mb:.1f} MB)')
+        print(f'  retained {retained/(1024*1024):8.1f} MB  (peak {peak/(1024*1024):.1f} MB)')
+        print(f'  ParsedValue nodes {nodes}')
+        del src
+        
+
+if __name__ == '__main__':
+    main()
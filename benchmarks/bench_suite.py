@@ -0,0 +1,200 @@
+'''
+The whole benchmark suite: generate schematics and PCBs at a few scales
+(see generate.py), then time loading, attribute access, spatial queries
+(within_*, nearest), connectivity, cloning and writing on each.  Startup (import) times, from
+bench_import.py, are included too.
+
+    python benchmarks/bench_suite.py --scales 100,1000,5000 --output results.json
+
+Each operation is run --repeat times and the best time is kept.  Results
+go out as JSON (stdout, or --output), one record per scale/file/operation,
+along with what's needed to compare runs across releases: the skip
+version, python and platform.  A summary table is printed to stderr.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import skip
+import generate
+import bench_import
+
+# queries, connectivity lookups and clones per run, whatever the scale
+# (connectivity is the slow one, so gets fewer)
+Queries = 100
+Connectivity = 20
+Clones = 100
+
+def best_of(repeat:int, func, *args):
+    best = None
+    for _i in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def _query_points(src_extent:float, seed:int):
+    rng = random.Random(seed)
+    return [(rng.uniform(0, src_extent), rng.uniform(0, src_extent)) for _i in range(Queries)]
+
+def schematic_ops(fpath:str, outpath:str, scale:int):
+    sch = skip.Schematic(fpath)
+    symbols = list(sch.symbol)
+    extent = generate._columns(scale) * generate.SchematicPitch
+    points = _query_points(extent, scale)
+
+    def access():
+        for sym in symbols:
+            sym.property.Reference.value
+            sym.property.Value.value
+            sym.at.value
+
+    def circles():
+        for (x, y) in points:
+            sch.symbol.within_circle(x, y, 3 * generate.SchematicPitch)
+
+    def rectangles():
+        for (x, y) in points:
+            sch.within_rectangle(x, y, x + 3 * generate.SchematicPitch, y + 3 * generate.SchematicPitch)
+
+    def nearest():
+        for (x, y) in points:
+            sch.symbol.nearest(x, y, 5)
+
+    def connectivity():
+        for sym in symbols[:Connectivity]:
+            sym.attached_all
+
+    def clone():
+        symbols[-1].container.replicate(symbols[-1], Clones)
+
+    return [
+        ('load', 1, lambda: skip.Schematic(fpath)),
+        ('access', len(symbols), access),
+        ('within_circle', Queries, circles),
+        ('within_rectangle', Queries, rectangles),
+        ('nearest', Queries, nearest),
+        ('connectivity', min(Connectivity, len(symbols)), connectivity),
+        ('clone', Clones, clone),
+        ('write', 1, lambda: sch.write(outpath)),
+    ]
+
+def pcb_ops(fpath:str, outpath:str, scale:int):
+    pcb = skip.PCB(fpath)
+    footprints = list(pcb.footprint)
+    extent = generate._columns(scale) * 2 * generate.PCBPitch
+    points = _query_points(extent, scale)
+
+    def access():
+        for fp in footprints:
+            fp.Reference.value
+            fp.at.value
+            for pad in fp.pad:
+                pad.net.value
+
+    def circles():
+        for (x, y) in points:
+            pcb.footprint.within_circle(x, y, 3 * generate.PCBPitch)
+            pcb.via.within_circle(x, y, 3 * generate.PCBPitch)
+
+    def connectivity():
+        # tracks on each of the pads' nets
+        for fp in footprints[:Connectivity]:
+            for pad in fp.pad:
+                net_id = pad.net.value[0]
+                [seg for seg in pcb.segment if seg.net.id == net_id]
+
+    def clone():
+        fp = footprints[-1]
+        for _i in range(Clones):
+            fp.clone()
+
+    return [
+        ('load', 1, lambda: skip.PCB(fpath)),
+        ('access', len(footprints), access),
+        ('within_circle', Queries, circles),
+        ('connectivity', min(Connectivity, len(footprints)), connectivity),
+        ('clone', Clones, clone),
+        ('write', 1, lambda: pcb.write(outpath)),
+    ]
+
+def run_scale(scale:int, workdir:str, repeat:int):
+    sch_path = os.path.join(workdir, f'bench_{scale}.kicad_sch')
+    pcb_path = os.path.join(workdir, f'bench_{scale}.kicad_pcb')
+    generate.write_schematic(sch_path, scale)
+    generate.write_pcb(pcb_path, scale)
+
+    records = []
+    for (kind, fpath, ops) in [('schematic', sch_path, schematic_ops),
+                               ('pcb', pcb_path, pcb_ops)]:
+        outpath = os.path.join(workdir, f'out_{os.path.basename(fpath)}')
+        for (name, count, func) in ops(fpath, outpath, scale):
+            elapsed = best_of(repeat, func)
+            records.append({
+                'scale': scale,
+                'file': kind,
+                'size_bytes': os.path.getsize(fpath),
+                'operation': name,
+                'count': count,
+                'seconds': elapsed,
+                'per_op_us': 1e6 * elapsed / count if count else None,
+            })
+            print(f'{kind:10s} {scale:>8d} {name:18s} {elapsed:9.4f}s', file=sys.stderr)
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite on synthetic files')
+    parser.add_argument('--scales', default='100,1000,5000',
+                        help='comma separated sizes (symbols/footprints per file)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per operation (best is kept)')
+    parser.add_argument('--output', default=None, help='JSON results file (default: stdout)')
+    parser.add_argument('--keep', default=None, help='generate files in this directory, and leave them there')
+    parser.add_argument('--import-repeat', type=int, default=10, 
+                        help='fresh interpreters per import case (0 to skip)')
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(',') if len(s.strip())]
+    results = {
+        'suite': 'kicad-skip',
+        'version': skip.VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': args.repeat,
+        'results': [],
+    }
+    
+    if args.import_repeat > 0:
+        for rec in bench_import.import_records(args.import_repeat):
+            results['results'].append(rec)
+            print(f"{'import':10s} {'':>8s} {rec['operation']:18s} {rec['seconds']:9.4f}s", file=sys.stderr)
+
+    if args.keep is not None:
+        os.makedirs(args.keep, exist_ok=True)
+        for scale in scales:
+            results['results'].extend(run_scale(scale, args.keep, args.repeat))
+    else:
+        with tempfile.TemporaryDirectory(prefix='skip-bench-') as workdir:
+            for scale in scales:
+                results['results'].extend(run_scale(scale, workdir, args.repeat))
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
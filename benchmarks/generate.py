@@ -0,0 +1,250 @@
+'''
+Deterministic generators for synthetic schematics and PCBs, of
+whatever size, for the benchmarks.
+
+    python benchmarks/generate.py sch out.kicad_sch --symbols 10000
+    python benchmarks/generate.py pcb out.kicad_pcb --footprints 5000 --vias 2000
+
+Symbols (Device:R) and footprints (R_0603) are laid out on a grid.  Each
+schematic wire hangs off a symbol's bottom pin, and labels sit at wire ends,
+so connectivity queries find something.  On the PCB, every footprint
+gets its own net, shared with the next one, and segments/vias are spread
+over the nets.  The same parameters (and seed) always give the exact
+same file.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import argparse
+import random
+import uuid
+
+
+SchematicLibSymbols = '''  (lib_symbols
+    (symbol "Device:R" (pin_numbers hide) (pin_names (offset 0)) (in_bom yes) (on_board yes)
+      (property "Reference" "R" (at 2.032 0 90)
+        (effects (font (size 1.27 1.27)))
+      )
+      (property "Value" "R" (at 0 0 90)
+        (effects (font (size 1.27 1.27)))
+      )
+      (symbol "R_0_1"
+        (rectangle (start -1.016 -2.54) (end 1.016 2.54)
+          (stroke (width 0.254) (type default))
+          (fill (type none))
+        )
+      )
+      (symbol "R_1_1"
+        (pin passive line (at 0 3.81 270) (length 1.27)
+          (name "~" (effects (font (size 1.27 1.27))))
+          (number "1" (effects (font (size 1.27 1.27))))
+        )
+        (pin passive line (at 0 -3.81 90) (length 1.27)
+          (name "~" (effects (font (size 1.27 1.27))))
+          (number "2" (effects (font (size 1.27 1.27))))
+        )
+      )
+    )
+  )
+'''
+
+# grid pitch, in mm
+SchematicPitch = 10.16
+PCBPitch = 2.5
+
+class _UUIDs:
+    def __init__(self, seed:int):
+        self._rng = random.Random(seed)
+
+    def next(self):
+        return str(uuid.UUID(int=self._rng.getrandbits(128), version=4))
+
+def _grid(idx:int, columns:int, pitch:float, origin:float=20.0):
+    return (round(origin + (idx % columns) * pitch, 4),
+            round(origin + (idx // columns) * pitch, 4))
+
+def _columns(count:int):
+    cols = 1
+    while cols * cols < count:
+        cols += 1
+    return cols
+
+def schematic_source(symbols:int, wires:int=None, labels:int=None, seed:int=0) -> str:
+    '''
+        A kicad_sch, as a string.
+
+        @param symbols: number of resistors
+        @param wires: number of wires, defaults to one per symbol
+        @param labels: number of labels, defaults to one per two wires
+        @param seed: for the uuids, values etc
+    '''
+    if wires is None:
+        wires = symbols
+    if labels is None:
+        labels = wires // 2
+    ids = _UUIDs(seed)
+    rng = random.Random(seed + 1)
+    root_uuid = ids.next()
+    cols = _columns(max(symbols, wires, 1))
+
+    parts = [f'(kicad_sch (version 20230121) (generator eeschema)\n\n  (uuid {root_uuid})\n\n  (paper "A0")\n\n',
+             SchematicLibSymbols]
+    for i in range(wires):
+        x, y = _grid(i, cols, SchematicPitch)
+        parts.append(f'''
+  (wire (pts (xy {x} {y + 3.81}) (xy {x} {y + 6.35}))
+    (stroke (width 0) (type default))
+    (uuid {ids.next()})
+  )
+''')
+    for i in range(labels):
+        x, y = _grid(i, cols, SchematicPitch)
+        parts.append(f'''
+  (label "N{i}" (at {x} {y + 6.35} 0) (fields_autoplaced)
+    (effects (font (size 1.27 1.27)) (justify left bottom))
+    (uuid {ids.next()})
+  )
+''')
+    for i in range(symbols):
+        x, y = _grid(i, cols, SchematicPitch)
+        ref = f'R{i + 1}'
+        val = f'{rng.choice((1, 2.2, 4.7, 10, 22, 47, 100))}k'
+        parts.append(f'''
+  (symbol (lib_id "Device:R") (at {x} {y} 0) (unit 1)
+    (in_bom yes) (on_board yes) (dnp no)
+    (uuid {ids.next()})
+    (property "Reference" "{ref}" (at {x + 2.54} {y} 0)
+      (effects (font (size 1.27 1.27)) (justify left))
+    )
+    (property "Value" "{val}" (at {x + 2.54} {y + 2.54} 0)
+      (effects (font (size 1.27 1.27)) (justify left))
+    )
+    (property "Footprint" "Resistor_SMD:R_0603" (at {x} {y} 0)
+      (effects (font (size 1.27 1.27)) hide)
+    )
+    (pin "1" (uuid {ids.next()}))
+    (pin "2" (uuid {ids.next()}))
+    (instances
+      (project "bench"
+        (path "/{root_uuid}"
+          (reference "{ref}") (unit 1)
+        )
+      )
+    )
+  )
+''')
+    parts.append('''
+  (sheet_instances
+    (path "/" (page "1"))
+  )
+)
+''')
+    return ''.join(parts)
+
+def pcb_source(footprints:int, segments:int=None, vias:int=None, seed:int=0) -> str:
+    '''
+        A kicad_pcb, as a string.
+
+        @param footprints: number of (0603 resistor) footprints
+        @param segments: number of track segments, defaults to two per footprint
+        @param vias: number of vias, defaults to one per two footprints
+        @param seed: for the uuids
+    '''
+    if segments is None:
+        segments = 2 * footprints
+    if vias is None:
+        vias = footprints // 2
+    ids = _UUIDs(seed)
+    nets = footprints + 1
+    cols = _columns(max(footprints, 1))
+
+    parts = ['''(kicad_pcb (version 20221018) (generator pcbnew)
+
+  (general
+    (thickness 1.6)
+  )
+
+  (paper "A0")
+  (layers
+    (0 "F.Cu" signal)
+    (31 "B.Cu" signal)
+    (36 "B.SilkS" user "B.Silkscreen")
+    (37 "F.SilkS" user "F.Silkscreen")
+    (44 "Edge.Cuts" user)
+  )
+
+  (net 0 "")
+''']
+    for n in range(1, nets + 1):
+        parts.append(f'  (net {n} "N{n}")\n')
+
+    for i in range(footprints):
+        x, y = _grid(i, cols, 2 * PCBPitch)
+        parts.append(f'''
+  (footprint "Resistor_SMD:R_0603" (layer "F.Cu")
+    (tstamp {ids.next()})
+    (at {x} {y} 90)
+    (descr "Resistor SMD 0603")
+    (path "/{ids.next()}")
+    (attr smd)
+    (fp_text reference "R{i + 1}" (at 0 -1.43 90) (layer "F.SilkS")
+        (effects (font (size 1 1) (thickness 0.15)))
+      (tstamp {ids.next()})
+    )
+    (fp_text value "10k" (at 0 1.43 90) (layer "F.Fab")
+        (effects (font (size 1 1) (thickness 0.15)))
+      (tstamp {ids.next()})
+    )
+    (fp_line (start -0.237258 -0.5225) (end 0.237258 -0.5225)
+      (stroke (width 0.12) (type solid)) (layer "F.SilkS") (tstamp {ids.next()}))
+    (pad "1" smd roundrect (at -0.825 0 90) (size 0.8 0.95) (layers "F.Cu" "F.Paste" "F.Mask") (roundrect_rratio 0.25)
+      (net {i + 1} "N{i + 1}") (pintype "passive") (tstamp {ids.next()}))
+    (pad "2" smd roundrect (at 0.825 0 90) (size 0.8 0.95) (layers "F.Cu" "F.Paste" "F.Mask") (roundrect_rratio 0.25)
+      (net {i + 2} "N{i + 2}") (pintype "passive") (tstamp {ids.next()}))
+  )
+''')
+    for i in range(segments):
+        x, y = _grid(i // 2, cols, 2 * PCBPitch)
+        layer = 'F.Cu' if i % 2 == 0 else 'B.Cu'
+        parts.append(f'  (segment (start {x} {y + 0.825}) (end {round(x + PCBPitch, 4)} {y + 0.825}) '
+                     f'(width 0.25) (layer "{layer}") (net {(i // 2) % nets + 1}) (tstamp {ids.next()}))\n')
+    for i in range(vias):
+        x, y = _grid(i, cols, 2 * PCBPitch)
+        parts.append(f'  (via (at {round(x + PCBPitch, 4)} {y + 0.825}) (size 0.8) (drill 0.4) '
+                     f'(layers "F.Cu" "B.Cu") (net {i % nets + 1}) (tstamp {ids.next()}))\n')
+    parts.append(')\n')
+    return ''.join(parts)
+
+def write_schematic(fpath:str, symbols:int, wires:int=None, labels:int=None, seed:int=0):
+    with open(fpath, 'w') as f:
+        f.write(schematic_source(symbols, wires, labels, seed))
+
+def write_pcb(fpath:str, footprints:int, segments:int=None, vias:int=None, seed:int=0):
+    with open(fpath, 'w') as f:
+        f.write(pcb_source(footprints, segments, vias, seed))
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic kicad files')
+    sub = parser.add_subparsers(dest='kind', required=True)
+    sch = sub.add_parser('sch', help='schematic')
+    sch.add_argument('output', help='path/to/out.kicad_sch')
+    sch.add_argument('--symbols', type=int, default=1000)
+    sch.add_argument('--wires', type=int, default=None)
+    sch.add_argument('--labels', type=int, default=None)
+    pcb = sub.add_parser('pcb', help='layout')
+    pcb.add_argument('output', help='path/to/out.kicad_pcb')
+    pcb.add_argument('--footprints', type=int, default=1000)
+    pcb.add_argument('--segments', type=int, default=None)
+    pcb.add_argument('--vias', type=int, default=None)
+    for p in (sch, pcb):
+        p.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.kind == 'sch':
+        write_schematic(args.output, args.symbols, args.wires, args.labels, args.seed)
+    else:
+        write_pcb(args.output, args.footprints, args.segments, args.vias, args.seed)
+
+
+if __name__ == '__main__':
+    main()
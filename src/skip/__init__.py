@@ -57,5 +57,36 @@ Created on Jan 29, 2024
 
 '''
 VERSION='0.2.2'
-from skip.eeschema.schematic import Schematic, Symbol
-from skip.pcbnew.pcb import PCB 
+
+# public names, and the modules they live in.  These are only imported 
+# when first used, so e.g. schematic-only scripts never load pcbnew 
+import importlib
+
+_LazyNames = {
+    'Schematic': 'skip.eeschema.schematic',
+    'Symbol': 'skip.eeschema.schematic',
+    'PCB': 'skip.pcbnew.pcb',
+    'iter_entities': 'skip.stream',
+    'load_many': 'skip.batch',
+    'Project': 'skip.project',
+}
+
+__all__ = ['VERSION'] + list(_LazyNames.keys())
+
+def __getattr__(name:str):
+    if name not in _LazyNames:
+        # sub-packages (skip.sexp etc) used to come along for free too
+        if not name.startswith('_'):
+            try:
+                return importlib.import_module(f'skip.{name}')
+            except ModuleNotFoundError as e:
+                if e.name != f'skip.{name}':
+                    raise
+        raise AttributeError(f"module 'skip' has no attribute '{name}'")
+    val = getattr(importlib.import_module(_LazyNames[name]), name)
+    # and from now on, a plain module attribute
+    globals()[name] = val
+    return val
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_LazyNames.keys()))
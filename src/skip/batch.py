@@ -0,0 +1,138 @@
+'''
+Loading piles of files at once, e.g. every sheet and board in a repo
+full of projects:
+
+    import skip
+    results = skip.load_many(glob.glob('projects/**/*.kicad_*', recursive=True),
+                             workers=8,
+                             progress=lambda done, total, res: print(f'{done}/{total} {res.path}'))
+    for res in results:
+        if res.ok:
+            print(res.path, len(res.source.symbol))
+        else:
+            print(f'{res.path} is broken: {res.error}')
+
+Files are read and parsed in a pool of worker processes, then turned into
+Schematic/PCB objects here, as they come in.  Whatever goes wrong with
+one file is caught and reported in its result, the rest carry on.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import os
+import pickle
+
+from skip.sexp import reader
+from skip.sexp.sourcefile import SourceFile
+from skip.stream import source_type_for
+
+import logging
+log = logging.getLogger(__name__)
+
+class LoadResult:
+    '''
+        What came of loading one file: either source (the Schematic,
+        PCB...) or error (the exception that got in the way) is set.
+    '''
+    def __init__(self, path:str, source:SourceFile=None, error:Exception=None):
+        self.path = path
+        self.source = source
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return f"<LoadResult {repr(self.source)}>"
+        return f"<LoadResult '{self.path}' failed: {self.error}>"
+
+def _parseFile(path:str, cache=None):
+    '''
+        Worker side: parse path, and hand back everything needed to
+        build the source file object, pickled.
+    '''
+    if cache is not None:
+        tree, spans = cache.load(path)
+    else:
+        tree, spans = reader.load(path, with_spans=True)
+    span_info = None
+    if spans is not None:
+        span_info = (bytes(spans.buffer), spans.indent, spans.bounds, spans.firsts)
+    return pickle.dumps((tree, span_info), protocol=pickle.HIGHEST_PROTOCOL)
+
+def _unpickleParsed(pickled:bytes):
+    tree, span_info = reader.unpickleTree(pickled)
+    spans = None
+    if span_info is not None:
+        (buf, indent, bounds, firsts) = span_info
+        spans = reader.SourceSpans(buf, indent, list(tree), bounds, firsts)
+    return (tree, spans)
+
+def load_many(paths:list, workers:int=None, include:list=None, exclude:list=None, progress=None):
+    '''
+        Load all the files in paths, in parallel.
+
+        @param paths: kicad_sch/kicad_pcb files, the type of each
+        is decided by its extension
+        @param workers: number of processes to parse with, defaults to
+        the number of CPUs.  With 1 (or 0) it's all done in this process.
+        @param include: only load these top level entity types, as for Schematic/PCB
+        @param exclude: don't load these top level entity types
+        @param progress: optional callable(done, total, result), called
+        with each LoadResult as it's ready
+
+        @return: a LoadResult for each path, in the same order
+
+        @note: SourceFile.ParseCache, if set, is used by the workers,
+        SourceFile.MemoryMapped is ignored.
+    '''
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+
+    results = [None]*len(paths)
+    done = 0
+
+    def finished(idx:int, res:LoadResult):
+        nonlocal done
+        results[idx] = res
+        done += 1
+        if not res.ok:
+            log.warning('Could not load %s: %s', res.path, res.error)
+        if progress is not None:
+            progress(done, len(paths), res)
+
+    if workers <= 1:
+        for (idx, path) in enumerate(paths):
+            try:
+                res = LoadResult(path, source_type_for(path)(path, include, exclude))
+            except Exception as e:
+                res = LoadResult(path, error=e)
+            finished(idx, res)
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = dict()
+        for (idx, path) in enumerate(paths):
+            jobs[pool.submit(_parseFile, path, SourceFile.ParseCache)] = idx
+
+        for job in as_completed(jobs):
+            idx = jobs[job]
+            path = paths[idx]
+            try:
+                tree, spans = _unpickleParsed(job.result())
+                res = LoadResult(path, source_type_for(path).from_tree(path, tree, spans,
+                                                                       include, exclude))
+            except Exception as e:
+                res = LoadResult(path, error=e)
+            finished(idx, res)
+
+    return results
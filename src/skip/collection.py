@@ -11,8 +11,18 @@ import re
 import math 
 import uuid
 import logging 
+from skip.sexp.parser import ParsedValue
 
 log = logging.getLogger(__name__)
+
+def _numpy():
+    # optional, only needed for coords_array() and friends
+    try:
+        import numpy
+    except ModuleNotFoundError:
+        raise ImportError('numpy is required for coordinate arrays: pip install kicad-skip[numpy]')
+    return numpy
+
 class ElementCollection:
     '''
         A base class for element collections.
@@ -29,10 +39,20 @@ class ElementCollection:
         are located within a certain zone or within reach of 
         another element.  See within_circle() and within_reach_of()
         
+        On larger collections, these go through a grid index (see 
+        skip.spatial), built on first use and kept up to date as 
+        elements are moved or added.
+        
     '''
+    # use a spatial index for position queries, on collections of 
+    # at least SpatialIndexMinimum elements (smaller ones are just scanned)
+    SpatialIndexing = True
+    SpatialIndexMinimum = 64
+    
     def __init__(self, parent, elements:list):
         self._parent = parent
         self._elements = elements 
+        self._spatial_indices = dict()
         
     @property 
     def parent(self):
@@ -40,6 +60,13 @@ class ElementCollection:
     
     def append(self, element):
         self._elements.append(element)
+        
+    def extend(self, elements:list):
+        '''
+            append() all of elements
+        '''
+        for el in elements:
+            self.append(el)
     
     def _new_instance(self):
         raise NotImplementedError('Unimplemented')
@@ -67,11 +94,51 @@ class ElementCollection:
             coords = el.location.value 
         return coords
     
+    def _position_for(self, el):
+        # for bulk geometry: at or location or, for wires, segments and 
+        # such, where they start (the queries above want the real thing)
+        coords = self._coordinates_for(el)
+        if coords is None and hasattr(el, 'start') and el.start is not None:
+            coords = el.start.value 
+        return coords
+    
     def _distance_between(self, coords1:list, coords2:list):
             dx = coords1[0] - coords2[0]
             dy = coords1[1] - coords2[1]
             return math.sqrt( (dx*dx)+(dy*dy))
     
+    def _at_points(self, el):
+        coords = self._coordinates_for(el)
+        return [] if coords is None else [coords]
+    
+    def _spatial_index(self, name:str='at', points_for=None):
+        '''
+            The (synced) spatial index over points_for(element), 
+            by default each element's at/location, or None if 
+            the elements are best just scanned
+        '''
+        if not self.SpatialIndexing or len(self._elements) < self.SpatialIndexMinimum:
+            return None
+        index = self._spatial_indices.get(name)
+        if index is None:
+            from skip.spatial import GridIndex
+            index = GridIndex(self._elements, points_for if points_for is not None else self._at_points)
+            self._spatial_indices[name] = index
+        if not index.sync():
+            return None
+        return index
+    
+    def _candidates_within(self, x1coord:float, y1coord:float, x2coord:float, y2coord:float, 
+                           name:str='at', points_for=None):
+        '''
+            Elements that may have a point in the (x1,y1)-(x2,y2) box 
+            (x1 <= x2, y1 <= y2), in order: everything, if there's no index
+        '''
+        index = self._spatial_index(name, points_for)
+        if index is None:
+            return self._elements
+        return index.within(x1coord, y1coord, x2coord, y2coord)
+    
     def within_reach_of(self, element, distance:float):
         '''    
             Find all elements of this collection that are within 
@@ -100,7 +167,7 @@ class ElementCollection:
         xrange = [x1coord, x2coord] if x1coord < x2coord else [x2coord, x1coord]
         yrange = [y1coord, y2coord] if y1coord < y2coord else [y2coord, y1coord]
     
-        for el in self:
+        for el in self._candidates_within(xrange[0], yrange[0], xrange[1], yrange[1]):
             coords = self._coordinates_for(el)
             if coords is None:
                 continue
@@ -125,17 +192,120 @@ class ElementCollection:
         
         
         target_coords = [xcoord, ycoord]
-        for el in self:
+        for el in self._candidates_within(xcoord - radius, ycoord - radius, xcoord + radius, ycoord + radius):
             coords = self._coordinates_for(el)
             if coords is None:
                 continue
             
             if self._distance_between(target_coords, coords) <= radius:
-                if el not in retvals:
-                    retvals.append(el)
+                retvals.append(el)
                 
         return retvals
             
+    def nearest(self, xcoord:float, ycoord:float, k:int=1, max_distance:float=None):
+        '''
+            Find the k elements of this collection closest to xcoord, ycoord.
+            
+            @param k: number of elements to return (at most)
+            
+            @param max_distance: optional, ignore anything further than this
+            
+            @return: list of elements, closest first
+            
+            @note: only works for elements that have a
+            suitable 'at' or 'location' attribute
+        '''
+        return list(map(lambda de: de[1], self._nearest(xcoord, ycoord, k, max_distance)))
+    
+    def _nearest(self, xcoord:float, ycoord:float, k:int=1, max_distance:float=None, 
+                 name:str='at', points_for=None):
+        '''
+            The nearest() elements, as (distance, element) tuples, distance 
+            being to the closest of the element's points_for()
+        '''
+        if points_for is None:
+            points_for = self._at_points
+        index = self._spatial_index(name, points_for)
+        if index is not None:
+            return index.nearest(xcoord, ycoord, k, max_distance)
+        
+        found = []
+        target_coords = [xcoord, ycoord]
+        for el in self._elements:
+            dists = list(map(lambda c: self._distance_between(target_coords, c), points_for(el)))
+            if not len(dists):
+                continue
+            d = min(dists)
+            if max_distance is None or d <= max_distance:
+                found.append((d, el))
+        
+        found.sort(key=lambda de: de[0])
+        return found[:max(k, 0)]
+            
+    def coords_array(self):
+        '''
+            The position of every element, as an N x 2 numpy array 
+            of x, y -- NaN for elements without one -- in collection order.
+            
+            Do the geometry in bulk on that, then hand it to apply_coords().
+            
+            A position is the element's at or location (symbols, labels, 
+            footprints, text, junctions...) or, for wires and segments, 
+            its start: moving that moves the whole thing.
+            
+            @raise ValueError: if none of the elements have a position 
+            (e.g. nets, layers) 
+            @note: requires numpy
+        '''
+        np = _numpy()
+        arr = np.full((len(self._elements), 2), np.nan)
+        positioned = 0
+        for (i, el) in enumerate(self._elements):
+            coords = self._position_for(el)
+            if coords is not None and len(coords) > 1:
+                arr[i, 0] = coords[0]
+                arr[i, 1] = coords[1]
+                positioned += 1
+        if len(self._elements) and not positioned:
+            raise ValueError(f'None of the elements in {self} have a position (at, location or start)')
+        return arr
+    
+    def apply_coords(self, coords):
+        '''
+            Move elements to the positions in coords, an N x 2 array(-like) 
+            of x, y for each element, as from coords_array().
+            
+            Positions are rounded to ParsedValue.PositionPrecision and only 
+            elements that end up somewhere new are moved, just as 
+            with move() -- so whatever moves along with them (e.g. a 
+            symbol's properties) follows.  Rows with NaNs are left alone.
+            
+            @return: number of elements moved
+            @note: requires numpy
+        '''
+        np = _numpy()
+        target = np.asarray(coords, dtype=float)
+        if target.ndim != 2 or target.shape[0] != len(self._elements) or target.shape[1] < 2:
+            raise ValueError(f'Expecting a {len(self._elements)} x 2 array of coordinates, got shape {target.shape}')
+        
+        precision = ParsedValue.PositionPrecision
+        target = np.round(target[:, :2], precision)
+        current = np.round(self.coords_array(), precision)
+        changed = ~np.isnan(target).any(axis=1) & (target != current).any(axis=1)
+        deltas = target - current
+        
+        moved = 0
+        for i in np.flatnonzero(changed):
+            el = self._elements[i]
+            if np.isnan(current[i]).any():
+                raise ValueError(f'{el} has no position to change')
+            translation = getattr(el, 'translation', None)
+            if not callable(translation):
+                raise ValueError(f'{el} can not be moved')
+            translation(float(deltas[i, 0]), float(deltas[i, 1]))
+            moved += 1
+        return moved
+            
     def between_elements(self, positionedElement1, positionedElement2):
         '''
             return a list of all elements, between these two, i.e. located 
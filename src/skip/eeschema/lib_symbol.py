@@ -4,15 +4,66 @@ Created on Feb 2, 2024
 @author: Pat Deegan
 @copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
 '''
-
 from skip.collection import NamedElementCollection
-from skip.sexp.parser import ParsedValue, ParsedValueWrapper
+from skip.sexp.parser import ParsedValue, ParsedValueWrapper, copyTree
 from skip.eeschema.schematic.symbol import SymbolBase
 from skip.eeschema.pin import Pin
 
 
 # property_changed
 
+class LibSymbolPool:
+    '''
+        Library symbols shared between schematics.
+        
+        Every sheet embeds the definitions of the lib symbols it uses, so 
+        across a project the same Device:R is in there over and over.  With 
+        a pool set as Schematic.LibSymbolPool (skip.Project does this), each 
+        embedded definition is keyed by a hash of its contents: the first 
+        one seen is kept, the identical ones that follow just reference 
+        its tree from their own lib_symbols.
+        
+        Each file keeps its own lib_symbols block, and its own LibSymbol 
+        objects over the shared trees.  Modifying a definition (or 
+        anything in it) swaps in a copy for that file alone, first, so 
+        the pooled trees never change and no file sees another's edits.
+    '''
+    # belongs to no one file, see sexp.memory
+    MemoryShared = True
+    
+    def __init__(self):
+        self._by_key = dict() # content hash -> definition expression
+        self.hits = 0
+        self.misses = 0
+        
+    @classmethod 
+    def key_for(cls, raw:list):
+        import hashlib
+        import pickle
+        # pickles tell Symbols from strings, and come cheap
+        return hashlib.blake2b(pickle.dumps(raw, protocol=pickle.HIGHEST_PROTOCOL), 
+                               digest_size=16).digest()
+    
+    def lookup(self, key):
+        '''
+            The pooled definition expression for content hash key, or None
+        '''
+        raw = self._by_key.get(key)
+        if raw is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return raw
+    
+    def add(self, key, raw:list):
+        self._by_key[key] = raw 
+            
+    def __len__(self):
+        return len(self._by_key)
+    
+    def __repr__(self):
+        return f'<LibSymbolPool {len(self)} symbols, {self.hits} shared>'
+
 class LibSymbolsListWrapper(NamedElementCollection):
     '''
         This one is weird... a single element libsymbols acts like a list 
@@ -24,8 +75,10 @@ class LibSymbolsListWrapper(NamedElementCollection):
         self._pv = pv
         self._libsyms_by_id = dict()
         self._libsyms_attrib_names = []
+        self._pool = getattr(pv.parent, 'LibSymbolPool', None)
+        self._pooled = dict() # id() of definitions shared through the pool -> uses here
         for i in range(len(pv.children)):
-            c = LibSymbol(pv[i])
+            c = self._libSymbolFor(pv[i])
             pv.children[i] = c 
             c_name = c.value
             self._libsyms_by_id[c_name] = c # 
@@ -33,6 +86,65 @@ class LibSymbolsListWrapper(NamedElementCollection):
             self.append(c)
             self.elementAdd(c_name, c)
             
+        if self._pool is not None and len(pv.children):
+            # let go of the duplicates entirely, leaving the same 
+            # element, or list of them, as there'd be without a pool
+            definitions = [c.wrapped_parsed_value for c in pv.children]
+            pv.symbol = definitions[0] if len(definitions) == 1 else definitions
+    
+    @property 
+    def pool(self):
+        return self._pool
+    
+    @property 
+    def wrapped_parsed_value(self):
+        return self._pv
+    
+    def _libSymbolFor(self, child:ParsedValue):
+        if self._pool is None:
+            return LibSymbol(child)
+        
+        key = self._pool.key_for(child.raw)
+        shared = self._pool.lookup(key)
+        if shared is None:
+            self._pool.add(key, child.raw)
+        else:
+            # same content, use the one tree
+            idx = child._rawIndex()
+            self._pv.raw[idx] = shared
+            child = ParsedValue(child.sourceTree, shared, self._pv.raw, idx, self._pv)
+        self._pooled[id(child.raw)] = self._pooled.get(id(child.raw), 0) + 1
+        return LibSymbol(child)
+    
+    def _willChange(self, pv:ParsedValue, changed:list):
+        '''
+            pv, somewhere in here, is about to change list changed in 
+            place.  If that's within a definition shared through the pool, 
+            this file gets a copy of its own to change, first.
+        '''
+        if not len(self._pooled) or pv is self._pv or changed is self._pv.raw:
+            # nothing shared, or just our own lib_symbols list changing
+            return 
+        
+        definition = pv 
+        while definition.parent is not self._pv:
+            definition = definition.parent
+        
+        uses = self._pooled.get(id(definition.raw))
+        if uses is None:
+            return 
+        if uses > 1:
+            self._pooled[id(definition.raw)] = uses - 1
+        else:
+            del self._pooled[id(definition.raw)]
+        
+        copies = dict()
+        cpy = copyTree(definition.raw, fresh_uuids=False, copies=copies)
+        idx = definition._rawIndex()
+        if idx is not None:
+            self._pv.raw[idx] = cpy
+        definition._rebind(copies)
+            
     
     def __contains__(self, key):
         return key in self._libsyms_by_id
@@ -13,7 +13,6 @@ Created on Jan 29, 2024
 from skip.sexp.sourcefile import SourceFile
 from skip.eeschema.schematic.symbol import SymbolCollection, Symbol
 from skip.eeschema.sheet.sheet import SheetWrapper
-from skip.eeschema.lib_symbol import LibSymbolsListWrapper
 from skip.eeschema.wire import WireCollection, WireWrapper
 from skip.eeschema.label import LabelCollection, LabelWrapper
 from skip.eeschema.label import GlobalLabelCollection, GlobalLabelWrapper
@@ -74,19 +73,30 @@ class Schematic(SourceFile):
         and use 'em.
         sch.symbol.C42.dnp = True
         '''
-    def __init__(self, filepath:str):
+    # a lib_symbol.LibSymbolPool, to share identical lib_symbols 
+    # definitions between schematics
+    LibSymbolPool = None
+    
+    def __init__(self, filepath:str, include:list=None, exclude:list=None):
         '''
             c'tor for the schematic object, gateway to everything in the 
             kicad_sch file.
             
             @param filepath: path/to/schematic.kicad_sch
+            @param include: only load these top level entity types, e.g. 
+                Schematic(path, include=['symbol'])
+            @param exclude: don't load these top level entity types
             
             This is the main handle to a schematic sheet.
             
             @note: No checking is done at all.  If the file DNE, it dies.  
             If it's not a kicad schematic... who knows.
         '''
-        super().__init__(filepath)
+        super().__init__(filepath, include, exclude)
+    
+    @classmethod 
+    def stream_context_types(cls):
+        return ['lib_symbols']
     
     @classmethod
     def dedicated_collections_by_type(cls):
@@ -103,7 +113,9 @@ class Schematic(SourceFile):
     
     @classmethod 
     def dedicated_wrapper_type_for(cls, entity_type:str):
-        
+        # lib_symbol needs SymbolBase, from this package: import it 
+        # here so that either module may be imported first
+        from skip.eeschema.lib_symbol import LibSymbolsListWrapper
         dedicatedWrapper = {
             'symbol': Symbol,
             'sheet': SheetWrapper,
@@ -123,6 +135,13 @@ class Schematic(SourceFile):
     
     
     
+    def _entityWillChange(self, pv, top, changed:list):
+        libsyms = getattr(self, 'lib_symbols', None)
+        from skip.eeschema.lib_symbol import LibSymbolsListWrapper
+        if isinstance(libsyms, LibSymbolsListWrapper) and libsyms.pool is not None \
+                and top is libsyms.wrapped_parsed_value:
+            libsyms._willChange(pv, changed)
+    
     def _searchable_collections(self):
         possible_collections = ['symbol', 'label', 'global_label']
         colls = []
@@ -177,6 +196,22 @@ class Schematic(SourceFile):
             retvals.extend(col.within_circle(xcoord, ycoord, radius))
         return retvals
             
+    def nearest(self, xcoord:float, ycoord:float, k:int=1, max_distance:float=None):
+        '''
+            Find the k elements (symbols, labels...) closest to xcoord, ycoord.
+            
+            @param k: number of elements to return (at most)
+            
+            @param max_distance: optional, ignore anything further than this
+            
+            @return: list of elements, closest first
+        '''
+        found = []
+        for col in self._searchable_collections():
+            found.extend(col._nearest(xcoord, ycoord, k, max_distance))
+        found.sort(key=lambda de: de[0])
+        return list(map(lambda de: de[1], found[:max(k, 0)]))
+            
     def between_elements(self, positionedElement1, positionedElement2):
         '''
             return a list of all elements, between these two, i.e. located 
@@ -48,6 +48,9 @@ class SymbolCollection(NamedElementCollection):
                 
         for multis in self._multi_unit_elements.keys():
             self.elementRename(multis, f'{multis}_{self.UnitToName[1]}')
+        
+        # set while references get shuffled around in batches
+        self._renames_deferred = False
             
     
     @classmethod 
@@ -99,8 +102,56 @@ class SymbolCollection(NamedElementCollection):
         return reference in self._multi_unit_elements
     
     
+    def replicate(self, template, count:int, placer=None, ref_fn=None):
+        '''
+            Create count copies of template, a symbol in this collection, 
+            in one go.
+            
+            Each copy can be moved and renamed on the way, and they're all 
+            added to the schematic (and this collection) together, once done.
+            
+              leds = sch.symbol.replicate(sch.symbol.D1, 64, 
+                        placer=lambda i: (50.8 + 7.62*(i % 8), 25.4 + 5.08*(i // 8)),
+                        ref_fn=lambda i: f'D{i + 2}')
+            
+            @param template: the symbol to copy
+            @param count: how many copies to make
+            @param placer: optional callable(index), returning the (x, y) or 
+            (x, y, rotation) to move copy index to
+            @param ref_fn: optional callable(index), returning the reference 
+            for copy index (applied to all its references, see setAllReferences())
+            
+            @return: list of the new symbols
+            
+            @raise ValueError: if ref_fn gives a reference that's already 
+            taken, by a symbol in here or another copy.  Nothing is 
+            added in that case.
+        '''
+        taken = set()
+        def transform(idx:int, sym):
+            if placer is not None:
+                coords = placer(idx)
+                if coords is not None:
+                    sym.move(*coords)
+            if ref_fn is not None:
+                ref = ref_fn(idx)
+                name = self._cleanse_key(ref)
+                if name in self._named or name in taken:
+                    raise ValueError(f'Reference {ref} for copy {idx} is already taken')
+                taken.add(name)
+                sym.setAllReferences(ref)
+        
+        # copies aren't in here until the very end, so their 
+        # reference changes mustn't touch our names
+        was_deferred = self._renames_deferred
+        self._renames_deferred = True
+        try:
+            return template.cloneMany(count, transform)
+        finally:
+            self._renames_deferred = was_deferred
+    
     def property_changed(self, name:str, to_value:str, from_value:str):
-        if name != 'Reference':
+        if name != 'Reference' or self._renames_deferred:
             return 
         
         self.elementRename(from_value, to_value)
@@ -125,8 +176,10 @@ class SymbolBase(ElementWithPropertiesWrapper):
         baseRef = v
         if 'instances' in self:
             for proj in self.instances.getElementsByEntityType('project'):
-                if proj.path.reference.value != baseRef:
-                    v += f',{proj.value}:{proj.path.reference.value}'
+                # sheets instantiated many times have a path for each
+                for path in proj.getElementsByEntityType('path'):
+                    if path.reference.value != baseRef:
+                        v += f',{proj.value}:{path.reference.value}'
         #except Exception as e:
         #    raise e
         #    v = self.value 
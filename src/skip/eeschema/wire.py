@@ -239,9 +239,12 @@ class WireCollection(ElementCollection):
     def __init__(self, parent, elements:list):
         super().__init__(parent, elements)
         
+    def _wire_points(self, w):
+        return [p.value for p in w.points]
+    
     def all_at(self, x:float, y:float):
         ret_val = []
-        for w in self:
+        for w in self._candidates_within(x, y, x, y, 'points', self._wire_points):
             for p in w.points:
                 #print(f"CHECK {p.value} for {x},{y}")
                 if p.value[0] == x and p.value[1] == y:
@@ -265,7 +268,8 @@ class WireCollection(ElementCollection):
         
         
         target_coords = [xcoord, ycoord]
-        for el in self:
+        for el in self._candidates_within(xcoord - radius, ycoord - radius, xcoord + radius, ycoord + radius,
+                                          'points', self._wire_points):
             append = False
             for p in el.points:
                 if self._distance_between(target_coords, p.value) <= radius:
@@ -277,6 +281,15 @@ class WireCollection(ElementCollection):
         return retvals
         
     
+    def nearest(self, xcoord:float, ycoord:float, k:int=1, max_distance:float=None):
+        '''
+            Find the k wires with an end point closest to xcoord, ycoord.
+            
+            @return: list of wires, closest first
+        '''
+        return list(map(lambda de: de[1], self._nearest(xcoord, ycoord, k, max_distance, 
+                                                         'points', self._wire_points)))
+    
     def _new_instance(self):
         newObj = WireWrapper(self.parent.new_from_list(ElementTemplate['wire']))
         return newObj
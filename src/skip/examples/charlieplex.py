@@ -29,33 +29,31 @@ def createLEDs(basedOn:Symbol, numrows:int, numcols:int, charlie:bool, start_ref
     '''
         Create a grid of closed based on some symbol
     '''
-    dcount = start_ref_count
-    table = []
-    
+    # where all the LEDs go, (row, col) for each
+    positions = []
     for row in range(numrows):
-        column_leds = []
         for col in range(numcols):
-            
             if charlie and col == row:
                 # charlieplexing, skip dead led
-                column_leds.append(None)
                 continue
-            # clone the symbol
-            newD = basedOn.clone()
-                
-            # move this component where we want it, on the grid
-            coords = to_grid(col*7, row*6)
-            newD.move(coords[0] - 1.27, coords[1])
-            
-            # set it's reference (all of em!)
-            newD.setAllReferences(f'D{dcount}')
-            
-            # keep track of LEDs we cloned
-            column_leds.append(newD)
-            
-            dcount += 1
-        
-        table.append(column_leds)
+            positions.append((row, col))
+    
+    def placeLED(idx:int):
+        # on the grid
+        row, col = positions[idx]
+        coords = to_grid(col*7, row*6)
+        return (coords[0] - 1.27, coords[1])
+    
+    # clone the symbol, moving each copy where we want it and 
+    # setting its references (all of em!), all in one go
+    leds = basedOn.container.replicate(basedOn, len(positions), 
+                                placer=placeLED, 
+                                ref_fn=lambda idx: f'D{start_ref_count + idx}')
+    
+    # keep track of LEDs we cloned
+    table = [[None]*numcols for _row in range(numrows)]
+    for (row, col), newD in zip(positions, leds):
+        table[row][col] = newD
             
     return table
 
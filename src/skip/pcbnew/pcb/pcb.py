@@ -38,22 +38,29 @@ class PCB(SourceFile):
         
         
         '''
-    def __init__(self, filepath:str):
+    def __init__(self, filepath:str, include:list=None, exclude:list=None):
         '''
             c'tor for the schematic object, gateway to everything in the 
             kicad_sch file.
             
             @param filepath: path/to/schematic.kicad_sch
+            @param include: only load these top level entity types, e.g. 
+                PCB(path, include=['footprint', 'net'])
+            @param exclude: don't load these top level entity types
             
             This is the main handle to a schematic sheet.
             
             @note: No checking is done at all.  If the file DNE, it dies.  
             If it's not a kicad schematic... who knows.
         '''
-        super().__init__(filepath)
+        super().__init__(filepath, include, exclude)
     
     
     
+    @classmethod 
+    def stream_context_types(cls):
+        return ['layers', 'net']
+    
     def dedicated_collection_type_for(self, entity_type:str):
         dedicatedCollection = {
         
@@ -0,0 +1,291 @@
+'''
+Whole hierarchical designs: start from the root schematic and follow
+every sheet down to the bottom.
+
+    import skip
+    proj = skip.Project('path/to/root.kicad_sch')
+    for inst in proj.instances:
+        print(inst.path, inst.name, inst.schematic)
+        for ref, sym in inst.references().items():
+            print(f'  {ref}: {sym.lib_id.value}')
+
+Each distinct kicad_sch file is parsed once, however many times it
+is instantiated: a sheet used for 4 channels is 4 SheetInstances all
+sharing the same Schematic object.  The instances differ in their path
+(the chain of sheet uuids from the root), which is what KiCad uses to
+give the symbols in there their per-instance references.  Note that
+changes made through one instance are thus seen by all of them--it's
+the same file.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import os
+
+from skip.collection import ElementCollection
+from skip.eeschema.schematic import Schematic
+from skip.eeschema.lib_symbol import LibSymbolPool
+
+import logging
+log = logging.getLogger(__name__)
+
+def _sheetProperty(sheet, name:str):
+    # KiCad 8 has 'Sheetname', 7 had 'Sheet name' (cleansed to Sheet_name)
+    for prop in sheet.property:
+        if prop.name.replace('_', '').lower() == name:
+            return prop.value
+    return None
+
+def _asList(entities):
+    # a lone element is set as is, many come in a collection
+    if entities is None:
+        return []
+    if isinstance(entities, (list, ElementCollection)):
+        return list(entities)
+    return [entities]
+
+class SheetInstance:
+    '''
+        One use of a schematic in the hierarchy: the root, or
+        a sheet somewhere under it.
+
+        Attributes of interest
+            schematic: the (shared) Schematic for the file
+            path: the instance path, '/<root uuid>/<sheet uuid>/...'
+            sheet: the sheet element, in the parent's schematic, that
+                   instantiates this one (None for root)
+            parent: the parent SheetInstance (None for root)
+            children: SheetInstances for the sheets in this one
+    '''
+    def __init__(self, schematic:Schematic, path:str, sheet=None, parent=None):
+        self.schematic = schematic
+        self.path = path
+        self.sheet = sheet
+        self.parent = parent
+        self.children = []
+
+    @property
+    def name(self):
+        if self.sheet is None:
+            return '/'
+        return _sheetProperty(self.sheet, 'sheetname')
+
+    @property
+    def filepath(self):
+        return self.schematic.filepath
+
+    @property
+    def depth(self):
+        if self.parent is None:
+            return 0
+        return self.parent.depth + 1
+
+    @property
+    def page(self):
+        '''
+            The page number for this instance, as set in the
+            sheet's instances (None if unknown).
+        '''
+        if self.sheet is None or 'instances' not in self.sheet:
+            return None
+        for p in self.sheet.instances.getElementsByEntityType('path'):
+            if p.value == self.parent.path and hasattr(p, 'page'):
+                return p.page.value
+        return None
+
+    @property
+    def symbols(self):
+        return _asList(getattr(self.schematic, 'symbol', None))
+
+    def reference_for(self, symbol):
+        '''
+            The reference symbol has within this instance, from its
+            instances path entries, falling back to its Reference
+            property if this instance isn't listed.
+
+            @param symbol: a Symbol in this instance's schematic
+        '''
+        if 'instances' in symbol:
+            for p in symbol.instances.getElementsByEntityType('path'):
+                if p.value == self.path and hasattr(p, 'reference'):
+                    return p.reference.value
+        return symbol.property.Reference.value
+
+    def references(self):
+        '''
+            dict of reference: symbol for all the symbols in
+            this instance.
+        '''
+        return dict((self.reference_for(sym), sym) for sym in self.symbols)
+
+    def walk(self):
+        '''
+            Generator for this instance and all the ones under it,
+            depth first.
+        '''
+        stack = [self]
+        while len(stack):
+            inst = stack.pop()
+            yield inst
+            stack.extend(reversed(inst.children))
+
+    def __repr__(self):
+        return f"<SheetInstance {self.name} '{self.path}' {os.path.basename(self.filepath)}>"
+
+class Project:
+    '''
+        A whole hierarchical design, loaded from its root schematic.
+
+        proj.root           SheetInstance for the root
+        proj.instances      all the SheetInstances, depth first
+        proj.schematics     the distinct Schematics, one per file
+        proj.errors         dict of path: exception for sheet files
+                            that could not be loaded
+        proj.lib_symbol_pool the LibSymbolPool shared by all the sheets
+    '''
+    def __init__(self, root_path:str, workers:int=None, share_lib_symbols:bool=True):
+        '''
+            Load the root schematic, and every sheet below it.
+
+            @param root_path: path/to/root.kicad_sch
+            @param workers: if > 1, each level of the hierarchy
+            is parsed using skip.load_many() with that many processes
+            @param share_lib_symbols: identical lib_symbols definitions
+            embedded in the sheets are parsed once and shared, see
+            LibSymbolPool
+
+            @note: sheets whose files are missing or broken are
+            logged, noted in errors, and left out of the hierarchy.
+        '''
+        self.workers = workers
+        self.errors = dict()
+        self.lib_symbol_pool = LibSymbolPool() if share_lib_symbols else None
+        self._schematics = dict()
+
+        prevPool = Schematic.LibSymbolPool
+        Schematic.LibSymbolPool = self.lib_symbol_pool
+        try:
+            rootSch = Schematic(root_path)
+            self._schematics[self._key(root_path)] = rootSch
+
+            self.root = SheetInstance(rootSch, f'/{rootSch.uuid.value}')
+            self._build()
+        finally:
+            Schematic.LibSymbolPool = prevPool
+
+    @property
+    def schematics(self):
+        return list(self._schematics.values())
+
+    @property
+    def instances(self):
+        return list(self.root.walk())
+
+    def schematic_for(self, filepath:str):
+        '''
+            The Schematic loaded for filepath, or None.
+        '''
+        return self._schematics.get(self._key(filepath))
+
+    def instance(self, path:str):
+        '''
+            Find an instance by its path, '/<root uuid>/<sheet uuid>...'
+        '''
+        for inst in self.root.walk():
+            if inst.path == path:
+                return inst
+        return None
+
+    def instances_of(self, filepath:str):
+        '''
+            All the instances of a given schematic file.
+        '''
+        key = self._key(filepath)
+        return list(filter(lambda i: self._key(i.filepath) == key, self.root.walk()))
+
+    def references(self):
+        '''
+            dict of reference: (SheetInstance, symbol) for
+            all symbols in the design.
+        '''
+        allRefs = dict()
+        for inst in self.root.walk():
+            for (ref, sym) in inst.references().items():
+                allRefs[ref] = (inst, sym)
+        return allRefs
+
+    @classmethod
+    def _key(cls, filepath:str):
+        return os.path.realpath(filepath)
+
+    def _sheetFile(self, inst:SheetInstance, sheet):
+        fname = _sheetProperty(sheet, 'sheetfile')
+        if fname is None:
+            return None
+        return os.path.join(os.path.dirname(inst.filepath), fname)
+
+    def _loadAll(self, paths:list):
+        missing = []
+        for p in paths:
+            if self._key(p) not in self._schematics and p not in self.errors and p not in missing:
+                missing.append(p)
+        if not len(missing):
+            return
+
+        if self.workers is not None and self.workers > 1 and len(missing) > 1:
+            from skip.batch import load_many
+            for res in load_many(missing, self.workers):
+                if res.ok:
+                    self._schematics[self._key(res.path)] = res.source
+                else:
+                    self.errors[res.path] = res.error
+            return
+
+        for p in missing:
+            try:
+                self._schematics[self._key(p)] = Schematic(p)
+            except Exception as e:
+                log.warning('Could not load sheet file %s: %s', p, e)
+                self.errors[p] = e
+
+    def _build(self):
+        # level by level, so all the files at one depth
+        # can be loaded in one go
+        level = [self.root]
+        while len(level):
+            pending = []
+            for inst in level:
+                for sheet in _asList(getattr(inst.schematic, 'sheet', None)):
+                    fpath = self._sheetFile(inst, sheet)
+                    if fpath is None:
+                        log.warning('Sheet %s in %s has no file', sheet.uuid.value, inst.filepath)
+                        continue
+                    pending.append((inst, sheet, fpath))
+
+            self._loadAll(list(map(lambda p: p[2], pending)))
+
+            level = []
+            for (inst, sheet, fpath) in pending:
+                sch = self.schematic_for(fpath)
+                if sch is None:
+                    continue
+                if self._recurses(inst, fpath):
+                    log.error('Sheet %s includes itself, skipping', fpath)
+                    continue
+                child = SheetInstance(sch, f'{inst.path}/{sheet.uuid.value}', sheet, inst)
+                inst.children.append(child)
+                level.append(child)
+
+    def _recurses(self, inst:SheetInstance, fpath:str):
+        key = self._key(fpath)
+        while inst is not None:
+            if self._key(inst.filepath) == key:
+                return True
+            inst = inst.parent
+        return False
+
+    def __repr__(self):
+        return f"<Project '{self.root.filepath}' ({len(self._schematics)} files)>"
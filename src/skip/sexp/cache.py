@@ -0,0 +1,209 @@
+'''
+An on-disk cache of parsed trees, for when the same (unchanged) files
+get loaded over and over, e.g. in CI.
+
+Entries are keyed on a hash of the file contents along with a digest of
+the code that builds and consumes the trees (the reader and parser
+sources, the sexpdata version), so edited files, upgrades or local
+changes to skip simply miss.  Hits skip tokenizing and parsing entirely:
+the tree is unpickled as-is.
+
+Opt-in, by giving SourceFile one
+
+    from skip.sexp.sourcefile import SourceFile
+    from skip.sexp.cache import ParseCache
+    SourceFile.ParseCache = ParseCache() # or ParseCache('/path/to/dir', max_bytes=...)
+
+after which every Schematic/PCB load goes through it.
+
+@note: entries are pickles, only point this at a directory you trust.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import hashlib
+import os
+import pickle
+import tempfile
+
+import sexpdata
+from skip.sexp import reader
+
+import logging
+log = logging.getLogger(__name__)
+
+_CodeDigest = None
+def code_digest() -> str:
+    '''
+        Digest of what determines the trees we cache: the reader and 
+        parser modules, as installed, and the sexpdata version
+    '''
+    global _CodeDigest
+    if _CodeDigest is None:
+        from skip.sexp import parser
+        h = hashlib.sha256(f'sexpdata {getattr(sexpdata, "__version__", "?")}:'.encode('utf-8'))
+        for mod in (reader, parser):
+            with open(mod.__file__, 'rb') as f:
+                h.update(f.read())
+        _CodeDigest = h.hexdigest()
+    return _CodeDigest
+
+class ParseCache:
+    '''
+        A directory of pickled trees, evicted least-recently-used first
+        once they take up more than max_bytes.
+    '''
+    # bump whenever what gets pickled changes in a way that doesn't 
+    # show up in the reader/parser sources (see code_digest())
+    FormatVersion = 1
+    Suffix = '.skiptree'
+
+    def __init__(self, directory:str=None, max_bytes:int=512*1024*1024):
+        '''
+            @param directory: where to keep things, defaults to
+            kicad-skip in the user cache dir (XDG_CACHE_HOME or ~/.cache)
+            @param max_bytes: total size entries may take up
+        '''
+        if directory is None:
+            base = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+            directory = os.path.join(base, 'kicad-skip')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, buf) -> str:
+        '''
+            Cache key for source buf: its content and the code 
+            that parses it
+        '''
+        h = hashlib.sha256(f'{code_digest()}:{self.FormatVersion}:'.encode('utf-8'))
+        h.update(buf)
+        return h.hexdigest()
+
+    def load(self, fpath:str, memory_mapped:bool=False, workers:int=None):
+        '''
+            Get the tree for fpath, from the cache if possible,
+            parsing it (and stashing the result) otherwise.
+            
+            @param workers: processes to parse with, on a miss
+
+            @return: (tree, reader.SourceSpans) like reader.load(with_spans=True)
+
+            @note: trees coming from the cache have no LazyAtoms,
+            whether memory_mapped or not
+        '''
+        buf = reader.read_source(fpath, memory_mapped)
+        key = self.key_for(buf)
+        entry = self._get(key)
+        if entry is not None:
+            self.hits += 1
+            tree, span_info = entry
+            spans = None
+            if span_info is not None:
+                spans = reader.SourceSpans(buf, span_info[0], list(tree), span_info[1], span_info[2])
+            return (tree, spans)
+
+        self.misses += 1
+        tree, spans = reader.loads_with_spans(buf, workers)
+        span_info = None
+        if spans is not None:
+            span_info = (spans.indent, spans.bounds, spans.firsts)
+        self._put(key, (tree, span_info))
+        return (tree, spans)
+
+    def clear(self):
+        '''
+            Remove all entries
+        '''
+        for (path, _size, _used) in self._entries():
+            self._remove(path)
+
+    @property
+    def size(self) -> int:
+        '''
+            Total bytes taken up by entries
+        '''
+        return sum(e[1] for e in self._entries())
+
+    def _path(self, key:str):
+        return os.path.join(self.directory, f'{key}{self.Suffix}')
+
+    def _get(self, key:str):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = reader.unpickleTree(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning('Dropping unreadable cache entry %s: %s', path, e)
+            self._remove(path)
+            return None
+
+        try:
+            # freshly used, as far as eviction is concerned
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _put(self, key:str, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmppath = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmppath, self._path(key))
+            except:
+                os.unlink(tmppath)
+                raise
+        except Exception as e:
+            # a cache that can't be written to is just a slow cache
+            log.warning('Could not cache parse results in %s: %s', self.directory, e)
+            return
+
+        self._evict()
+
+    def _entries(self):
+        '''
+            (path, size, last used) of every entry
+        '''
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for dirent in it:
+                    if not dirent.name.endswith(self.Suffix):
+                        continue
+                    try:
+                        st = dirent.stat()
+                    except OSError:
+                        continue
+                    entries.append((dirent.path, st.st_size, st.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(e[1] for e in entries)
+        if total <= self.max_bytes:
+            return
+        for (path, size, _used) in sorted(entries, key=lambda e: e[2]):
+            self._remove(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _remove(self, path:str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def __repr__(self):
+        return f"<ParseCache '{self.directory}'>"
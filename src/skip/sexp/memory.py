@@ -0,0 +1,263 @@
+'''
+Where the memory goes, in a loaded source file.
+
+    sch = skip.Schematic('big.kicad_sch')
+    print(sch.memory_report())
+
+walks the whole object graph of the source and attributes each object,
+once, to the top level entity type it belongs to, in one of a few
+categories
+    raw: the parsed tree itself, lists and atoms
+    nodes: ParsedValues, and what they hold on to (children, name maps...)
+    wrappers: Symbol, FootprintWrapper, PropertyString etc
+    collections: the collections, and their lists and maps
+
+The file buffer kept around for writing back untouched bits, along with
+the root of the tree etc, go under '(file)'.
+
+Sizes are from sys.getsizeof, so shallow sizes of everything reachable,
+counted once: atoms that are shared (interned strings, small numbers...)
+count for whichever type got to them first.  Similarly, an object referenced
+from more than one type's elements (e.g. lib symbol pins, from symbols)
+count towards the type that comes first in the file.  A memory mapped
+source buffer isn't counted, as it's not resident as such, but its
+size is reported as mapped_bytes.  Things shared between source files 
+(other files, a LibSymbolPool...) aren't followed.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import mmap
+import sys
+import types
+
+from skip.collection import ElementCollection
+from skip.sexp.parser import ParsedValue
+from skip.sexp.reader import LazyAtom, SourceSpans
+from skip.sexp.sourcefile import SourceFile
+
+Categories = ['raw', 'nodes', 'wrappers', 'collections']
+FileEntry = '(file)'
+
+# not data, or not ours
+_Opaque = (type, types.FunctionType, types.MethodType, types.BuiltinFunctionType,
+           types.ModuleType, mmap.mmap)
+_Atoms = (str, bytes, int, float, complex)
+
+# pointers up the tree, or to the whole thing
+_ParsedValueSkip = ('_parent_obj', '_parent_top_obj', '_sourceTree', '_raw_parent')
+
+_SlotNamesCache = dict()
+def _slotNames(cls):
+    names = _SlotNamesCache.get(cls)
+    if names is not None:
+        return names
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots, )
+        names.extend(slots)
+    _SlotNamesCache[cls] = names
+    return names
+
+class MemoryReport:
+    '''
+        Bytes and object counts, by top level entity type and category.
+
+          entity_types: dict of type: {category: [bytes, objects]}
+          mapped_bytes: size of the memory mapped source, if any
+    '''
+    def __init__(self, filepath:str):
+        self.filepath = filepath
+        self.entity_types = dict()
+        self.mapped_bytes = 0
+
+    def _counters(self, entity_type:str):
+        counters = self.entity_types.get(entity_type)
+        if counters is None:
+            counters = dict((c, [0, 0]) for c in Categories)
+            self.entity_types[entity_type] = counters
+        return counters
+
+    def bytes_for(self, entity_type:str):
+        if entity_type not in self.entity_types:
+            return 0
+        return sum(c[0] for c in self.entity_types[entity_type].values())
+
+    def objects_for(self, entity_type:str):
+        if entity_type not in self.entity_types:
+            return 0
+        return sum(c[1] for c in self.entity_types[entity_type].values())
+
+    @property
+    def total(self):
+        return sum(self.bytes_for(t) for t in self.entity_types)
+
+    @property
+    def by_category(self):
+        '''
+            dict of category: [bytes, objects] over all types
+        '''
+        totals = dict((c, [0, 0]) for c in Categories)
+        for counters in self.entity_types.values():
+            for (cat, (nbytes, nobjs)) in counters.items():
+                totals[cat][0] += nbytes
+                totals[cat][1] += nobjs
+        return totals
+
+    def as_dict(self):
+        return {
+            'filepath': self.filepath,
+            'total': self.total,
+            'mapped_bytes': self.mapped_bytes,
+            'entity_types': dict((t, dict((c, list(v)) for c, v in counters.items()))
+                                 for t, counters in self.entity_types.items()),
+        }
+
+    def __str__(self):
+        mb = lambda n: n / (1024*1024)
+        lines = [f'{self.filepath}: {mb(self.total):.2f} MB']
+        header = ''.join(f'{c:>14s}' for c in Categories)
+        lines.append(f"  {'':20s}{'total':>14s}{header}{'objects':>12s}")
+        ordered = sorted(self.entity_types, key=self.bytes_for, reverse=True)
+        for ent_type in ordered:
+            counters = self.entity_types[ent_type]
+            cols = ''.join(f'{mb(counters[c][0]):12.2f}MB' for c in Categories)
+            lines.append(f'  {ent_type:20s}{mb(self.bytes_for(ent_type)):12.2f}MB{cols}'
+                         f'{self.objects_for(ent_type):12d}')
+        if self.mapped_bytes:
+            lines.append(f'  memory mapped source: {mb(self.mapped_bytes):.2f} MB (not counted)')
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"<MemoryReport '{self.filepath}' {self.total} bytes>"
+
+class _Walker:
+    def __init__(self, report:MemoryReport, source):
+        self.report = report
+        self.source = source
+        self.seen = set()
+        # singletons, and the source file itself, aren't anyone's
+        for obj in (None, True, False, source):
+            self.seen.add(id(obj))
+
+    def walk(self, entity_type:str, roots:list, category:str):
+        '''
+            Attribute everything reachable from roots, that isn't
+            accounted for yet, to entity_type.  Containers count in the
+            category of whatever holds them, other objects get one
+            according to what they are.
+        '''
+        counters = self.report._counters(entity_type)
+        seen = self.seen
+        stack = [(r, category) for r in roots]
+        while len(stack):
+            obj, cat = stack.pop()
+            oid = id(obj)
+            if oid in seen:
+                continue
+            seen.add(oid)
+            otype = type(obj)
+            # (class level lookup: the instances may well parse 
+            # things on attribute access)
+            if isinstance(obj, _Opaque) or isinstance(obj, SourceFile) or \
+                    getattr(otype, 'MemoryShared', False) is True:
+                # other files, things shared between them
+                continue
+
+            if otype is list or otype is tuple or otype is set or otype is frozenset:
+                pass
+            elif otype is dict:
+                pass
+            elif isinstance(obj, _Atoms):
+                counters[cat][0] += sys.getsizeof(obj)
+                counters[cat][1] += 1
+                continue
+            elif otype is LazyAtom:
+                # the buffer it refers to is the file's
+                counters[cat][0] += sys.getsizeof(obj)
+                counters[cat][1] += 1
+                continue
+            elif isinstance(obj, ParsedValue):
+                cat = 'nodes'
+            elif isinstance(obj, ElementCollection):
+                cat = 'collections'
+            elif isinstance(obj, SourceSpans):
+                continue
+            else:
+                cat = 'wrappers'
+
+            counters[cat][0] += sys.getsizeof(obj)
+            counters[cat][1] += 1
+
+            if otype is list or otype is tuple or otype is set or otype is frozenset:
+                for entry in obj:
+                    stack.append((entry, cat))
+            elif otype is dict:
+                for (k, v) in obj.items():
+                    stack.append((k, cat))
+                    stack.append((v, cat))
+            elif isinstance(obj, ParsedValue):
+                for name in _slotNames(otype):
+                    if name in _ParsedValueSkip:
+                        continue
+                    val = getattr(obj, name, None)
+                    stack.append((val, 'raw' if name == '_tree' else cat))
+            else:
+                d = getattr(obj, '__dict__', None)
+                if d is not None:
+                    stack.append((d, cat))
+                for name in _slotNames(otype):
+                    if name != '__dict__' and name != '__weakref__':
+                        stack.append((getattr(obj, name, None), cat))
+
+def memory_report(source) -> MemoryReport:
+    '''
+        Build a MemoryReport for source (a SourceFile)
+    '''
+    report = MemoryReport(source.filepath)
+    walker = _Walker(report, source)
+
+    # the tree first, types in the order they appear in the file,
+    # so everything found here belongs to its entity
+    nodesByRaw = dict()
+    for pvs in source._all.values():
+        for pv in pvs:
+            nodesByRaw[id(pv.raw)] = pv
+    typeOrder = []
+    walker.seen.add(id(source.tree))
+    for entry in source.tree:
+        if isinstance(entry, list) and len(entry):
+            ent_type = ParsedValue.toString(entry[0])
+            if ent_type not in typeOrder:
+                typeOrder.append(ent_type)
+            pv = nodesByRaw.get(id(entry))
+            walker.walk(ent_type, [pv if pv is not None else entry], 'raw')
+
+    # then whatever is hanging off the source's attributes
+    for ent_type in typeOrder + list(source.dedicated_collections_by_type().keys()):
+        val = source.__dict__.get(ent_type)
+        if val is not None:
+            walker.walk(ent_type, [val], 'collections')
+
+    # and the rest is overhead for the file as a whole
+    fileCounters = report._counters(FileEntry)
+    fileCounters['raw'][0] += sys.getsizeof(source.tree)
+    fileCounters['raw'][1] += 1
+    for entry in source.tree:
+        if not isinstance(entry, list):
+            walker.walk(FileEntry, [entry], 'raw')
+    spans = source._spans
+    if spans is not None:
+        if isinstance(spans.buffer, mmap.mmap):
+            report.mapped_bytes = len(spans.buffer)
+            walker.walk(FileEntry, [spans.bounds, spans.firsts, spans.dirty], 'raw')
+        else:
+            walker.walk(FileEntry, [spans.buffer, spans.entities, spans.bounds,
+                                    spans.firsts, spans.dirty], 'raw')
+    walker.walk(FileEntry, [source._all, source._tombstones], 'collections')
+    return report
@@ -8,11 +8,15 @@ Created on Jan 29, 2024
 import sexpdata
 import uuid
 import re
-import copy
+from skip.sexp.reader import LazyAtom
 
 import logging 
 log = logging.getLogger(__name__)
+
+_set_slot = object.__setattr__
+
 class AccessesTree:
+    __slots__ = ('_sourceTree', )
     def __init__(self, sourceTree):
         self._sourceTree = sourceTree
         
@@ -20,26 +24,57 @@ class AccessesTree:
     def sourceTree(self):
         return self._sourceTree
     
+
+
+
+def compactTombstones(raw_list:list, nodes):
+    '''
+        Clear the tombstones (None) out of raw_list in a single pass 
+        and let the (live) nodes backed by its entries know where they 
+        now sit.
         
+        @param raw_list: a list that had elements deleted from it
+        @param nodes: ParsedValues that may live in raw_list (e.g. 
+        children of its owner), others are ignored
+    '''
+    compacted = [e for e in raw_list if e is not None]
+    if len(compacted) == len(raw_list):
+        return 
+    raw_list[:] = compacted
+    
+    positions = None
+    for n in nodes:
+        if not isinstance(n, ParsedValue) or n._deleted or n._raw_parent is not raw_list:
+            continue 
+        if positions is None:
+            positions = {id(e): i for i, e in enumerate(raw_list)}
+        idx = positions.get(id(n._tree))
+        if idx is not None:
+            n._index = idx 
     
-    def _setOnTree(self, coordsList, val):
-        c = self.sourceTree 
-        for i in range(len(coordsList) - 1):
-            c = c[coordsList[i]]
-            
-        c[coordsList[-1]] = val 
-        
-    def _deleteOnTree(self, coordsList):
-        c = self.sourceTree 
-        for i in range(len(coordsList) - 1):
-            c = c[coordsList[i]]
-            if c is None:
-                return 
-        
-        if c[coordsList[-1]] is None:
-            return 
-        c[coordsList[-1]] = None 
 
+def copyTree(tree:list, fresh_uuids:bool=True, copies:dict=None) -> list:
+    '''
+        Copy an expression's lists in a single pass, atoms are 
+        immutable and simply shared.
+        
+        @param tree: the expression to copy
+        @param fresh_uuids: give every (uuid ...) in the copy a newly 
+        generated value, of the same type (Symbol or str) as the original
+        @param copies: if passed, filled with id(original list) -> its copy
+    '''
+    cpy = tree[:]
+    if copies is not None:
+        copies[id(tree)] = cpy
+    i = 0
+    for e in tree:
+        if type(e) is list:
+            cpy[i] = copyTree(e, fresh_uuids, copies)
+        i += 1
+    if fresh_uuids and i == 2 and type(cpy[0]) is sexpdata.Symbol and str.__eq__(cpy[0], 'uuid'):
+        newId = str(uuid.uuid4())
+        cpy[1] = sexpdata.Symbol(newId) if isinstance(cpy[1], sexpdata.Symbol) else newId
+    return cpy
 
 
 class ParsedValue(AccessesTree):
@@ -96,10 +131,19 @@ class ParsedValue(AccessesTree):
         to discover what's available to you: schematic.symbol.<TAB><TAB> is
         very nice.
         
+        @note: there can be millions of these in a large PCB, so they're 
+        slotted: children are kept in a single name->child(ren) mapping, 
+        rather than as instance attributes, and served by __getattr__.  
+        Assigning some other attribute (e.g. a wrapper replacing 
+        pv.property with a collection) lands in that same mapping.
+        
     '''
+    __slots__ = ('_parent_obj', '_parent_top_obj', '_entity_name', '_raw_parent', '_index', 
+                 '_deleted', '_tree', '_value', '_children', '_named', '_type_index')
     AttribInvalidCharsRe = re.compile(r'[^\w\d\_]')
     StrStartsWithDigitRe = re.compile(r'^\d')
     PositionPrecision = 6
+    LazyParsing = True
     @classmethod 
     def toString(cls, val):
         if isinstance(val, sexpdata.Symbol):
@@ -112,35 +156,124 @@ class ParsedValue(AccessesTree):
         if cls.StrStartsWithDigitRe.match(val):
             val = f'n{val}'
         return val
+    
+    _SafeKeysCache = dict()
+    @classmethod 
+    def _childKey(cls, entity_type:str):
+        # the same few dozen entity names, over and over
+        key = cls._SafeKeysCache.get(entity_type)
+        if key is None:
+            key = cls.toSafeAttributeKey(entity_type)
+            cls._SafeKeysCache[entity_type] = key 
+        return key
        
-    def __init__(self, sourceTree, tree, base_coords, parent=None):
+    def __init__(self, sourceTree, tree, raw_parent:list, index:int, parent=None):
         '''
             ParsedValue c'tor
             
             @param sourceTree: the whole guacamole
             @param tree: the value we're parsing
-            @param base_coords: the path, in sourceTree, to get here
+            @param raw_parent: the list, in sourceTree, that holds tree
+            @param index: where tree sits in raw_parent
             @param parent: the parent ParsedValue    
+            
+            Nodes hold direct references to their backing lists, so reading 
+            or writing through them never walks the tree from the root.
         
+            @note: unless LazyParsing is disabled, the tree isn't actually 
+            parsed here.  Children get wrapped the first time anything 
+            (an attribute, children, [idx], dir()...) needs them, so the 
+            many xy, font, effects etc nobody looks at cost next to nothing.
         '''
-        super().__init__(sourceTree)
-        self._parent_obj = parent
-        self._parent_top_obj = None
-        self._entity_name = None 
-        self._base_coords = base_coords 
-        self._deleted = False
-        self._tree = tree 
-        self._value = None
-        self.children = []
+        # straight to the slots, __setattr__ is for outsiders
+        _set_slot(self, '_sourceTree', sourceTree)
+        _set_slot(self, '_parent_obj', parent)
+        _set_slot(self, '_parent_top_obj', None)
+        _set_slot(self, '_raw_parent', raw_parent)
+        _set_slot(self, '_index', index)
+        _set_slot(self, '_deleted', False)
+        _set_slot(self, '_tree', tree)
+        _set_slot(self, '_value', None)
+        _set_slot(self, '_children', None) # None until materialized
+        _set_slot(self, '_named', None) # child name -> child or [children]
+        _set_slot(self, '_type_index', None) # entity type -> [descendants], built on demand
+        
+        if isinstance(tree, list) and len(tree):
+            _set_slot(self, '_entity_name', self.toString(tree[0]))
+        else:
+            _set_slot(self, '_entity_name', None)
+        
+        if not self.LazyParsing:
+            self._materialize()
+        
+    
+    @property 
+    def children(self):
+        '''
+            The entries of this element (ParsedValues for sub-expressions, 
+            plain values otherwise) -- parsed on first access
+        '''
+        if self._children is None:
+            self._materialize()
+        return self._children
+    
+    @property 
+    def is_materialized(self):
+        return self._children is not None
+    
+    def _materialize(self):
+        if self._children is not None:
+            return 
+        self._children = []
+        self._parseTree(self._tree)
         
-        self._added_children_names = []
+    def __getattr__(self, name:str):
+        # only called when normal lookup fails, i.e. for children 
+        if name.startswith('_'):
+            raise AttributeError(name)
+        
+        if self._children is None:
+            self._materialize()
+            
+        named = self._named
+        if named is not None:
+            if name in named:
+                return named[name]
+            
+            if 'at' in named:
+                if name == 'move':
+                    return self._move_method
+                if name == 'translation':
+                    return self._translate_method # translate was taken
         
-        self._parseTree(tree)
+        raise AttributeError(f"'{self.entity_type}' has no '{name}'")
+    
+    def __setattr__(self, name:str, val):
+        if name.startswith('_') or hasattr(type(self), name):
+            # internals and class-level stuff (e.g. the value property)
+            _set_slot(self, name, val)
+            return 
         
-        if hasattr(self, 'at'):
-            self.move = self._move_method
-            self.translation = self._translate_method # translate was taken
+        # anything else is a child being (re)placed
+        self._materialize()
+        if self._named is None:
+            self._named = dict()
+        self._named[name] = val
+    
+    def __delattr__(self, name:str):
+        if self._named is not None and name in self._named:
+            del self._named[name]
+            return 
+        object.__delattr__(self, name)
         
+    def __dir__(self):
+        self._materialize()
+        attribs = list(super().__dir__())
+        if self._named is not None:
+            attribs.extend(self._named.keys())
+            if 'at' in self._named:
+                attribs.extend(['move', 'translation'])
+        return attribs
         
                      
     @property 
@@ -150,6 +283,7 @@ class ParsedValue(AccessesTree):
             by this entry    
         
         '''
+        self._materialize()
         if self._value is None and len(self.children):
             return self.children 
             
@@ -170,6 +304,8 @@ class ParsedValue(AccessesTree):
             sch.symbol.C4.dnp.value = True 
         
         '''
+        self._willChange(self._tree)
+        self._materialize()
         if self._is_bool_symbol(self._value):
             
             if not isinstance(setTo, str):
@@ -191,24 +327,19 @@ class ParsedValue(AccessesTree):
             else:
                 self._value = setTo
             
-        if self.sourceTree is not None and len(self.sourceTree) >= self._base_coords[0]:
-            c = self.sourceTree
-            for i in range(len(self._base_coords)):
-                c = c[self._base_coords[i]]
-                
-            if isinstance(c, list) and len(c) > 1:
-                if isinstance(self._value, list):
-                    c[1:] = self._value 
-                    #print(f"Setting values as list on {c}")
-                else:
-                    c[1] = self._value
-                    #print(f"Setting values as list on idx 1 of {c}")
-                    
-                if len(self.children) and type(setTo) == type(self.children[0]):
-                    self.children[0] = self._value
+        c = self._tree
+        if isinstance(c, list) and len(c) > 1:
+            if isinstance(self._value, list):
+                c[1:] = self._value 
             else:
-                print(c)
-                raise KeyError(f'dunno how to handle setting {c}')
+                c[1] = self._value
+                
+            if len(self._children) and type(setTo) == type(self._children[0]):
+                self._children[0] = self._value
+            self._touch()
+        else:
+            print(c)
+            raise KeyError(f'dunno how to handle setting {c}')
    
     def clone(self):
         '''
@@ -226,50 +357,178 @@ class ParsedValue(AccessesTree):
               
             Creates a new property *on* symbol "R10"
             
+            Any uuid within gets a fresh value along the way.
+            
+        '''
+        return self.cloneMany(1)[0]
+        
+    def cloneMany(self, count:int, transform=None):
         '''
-        rawclone = copy.deepcopy(self.raw)
+            Like clone(), count times over, but with the copies added to 
+            the tree and to their container all at once, at the end.
+            
+            @param count: number of copies to make
+            @param transform: optional callable(index, copy), called on each
+            (wrapped) copy before it's added, e.g. to move it somewhere
+            
+            @return: list of the (wrapped) copies
+        '''
+        if count > 0:
+            self._willChange(self._raw_parent)
         rawpar = self.raw_parent
-        idx = len(rawpar)
-        rawpar.append(rawclone)
-        
-        coords = copy.deepcopy(self._base_coords)
-        coords[-1] = idx 
-        clonedObj = ParsedValue(self.sourceTree, rawclone, coords, self.parent)
-        for a_uuid in clonedObj.getElementsByEntityType('uuid'):
-            a_uuid.value = str(uuid.uuid4())
-        
-        wrappedClone = clonedObj
-        if clonedObj.parent_top is not None:
-            wrappedClone = clonedObj.parent_top.wrap(clonedObj)
-        
-        if self.parent is not None:
-            log.debug(f'Have parent of type{type(self.parent)}')
-            if hasattr(self.parent, 'children'):
+        first = len(rawpar)
+        parent = self.parent
+        top = self.parent_top
+        
+        copies = []
+        wrappedCopies = []
+        for i in range(count):
+            clonedObj = self._copyNode(rawpar, first + i, parent)
+            wrappedClone = clonedObj
+            if top is not None:
+                wrappedClone = top.wrap(clonedObj)
+            if transform is not None:
+                transform(i, wrappedClone)
+            copies.append(clonedObj)
+            wrappedCopies.append(wrappedClone)
+        
+        if not len(copies):
+            return wrappedCopies
+        
+        rawpar.extend(c._tree for c in copies)
+        if isinstance(parent, ParsedValue):
+            parent._touch()
+        elif hasattr(parent, '_entityAdded'):
+            for c in copies:
+                parent._entityAdded(c)
+
+        if parent is not None:
+            log.debug('Have parent of type %s', type(parent))
+            if hasattr(parent, 'children'):
                 log.debug(f'adding to children')
-                self.parent.children.append(clonedObj)
+                parent.children.extend(copies)
+                if isinstance(parent, ParsedValue):
+                    parent._indexAdded(copies)
             else:
                 # log.error(f'no chiiiwdwen children')
-                log.info(f'Object parent exists but has no children {self.parent}')
-                if hasattr(self.parent, self.entity_type):
-                    ent_container = getattr(self.parent, self.entity_type)
-                    if hasattr(ent_container, 'append'):
-                        ent_container.append(wrappedClone)
+                log.info('Object parent exists but has no children %s', parent)
+                if hasattr(parent, self.entity_type):
+                    ent_container = getattr(parent, self.entity_type)
+                    if callable(getattr(ent_container, 'extend', None)):
+                        ent_container.extend(wrappedCopies)
+                    elif callable(getattr(ent_container, 'append', None)):
+                        for wrappedClone in wrappedCopies:
+                            ent_container.append(wrappedClone)
                         
-                        
-        
-        return wrappedClone
-        
-        
+        return wrappedCopies
         
+    def _copyNode(self, raw_parent:list, index:int, parent):
+        '''
+            Structural copy of this node, expression and all.
+            
+            Whatever was already parsed here is copied over as-is rather 
+            than parsed anew, the rest is left for the copy to parse lazily.
+            Fresh uuids are generated along the way.
+        '''
+        cpy = ParsedValue.__new__(ParsedValue)
+        _set_slot(cpy, '_sourceTree', self._sourceTree)
+        _set_slot(cpy, '_parent_obj', parent)
+        _set_slot(cpy, '_parent_top_obj', None)
+        _set_slot(cpy, '_raw_parent', raw_parent)
+        _set_slot(cpy, '_index', index)
+        _set_slot(cpy, '_deleted', False)
+        _set_slot(cpy, '_entity_name', self._entity_name)
+        _set_slot(cpy, '_value', None)
+        _set_slot(cpy, '_children', None)
+        _set_slot(cpy, '_named', None)
+        _set_slot(cpy, '_type_index', None)
+        
+        src = self._tree
+        srcChildren = self._children
+        if srcChildren is None or not self._named or not self._childrenInSync():
+            # nothing much to gain (or nothing safe to reuse), 
+            # just copy the expression and let it be parsed if needed
+            _set_slot(cpy, '_tree', copyTree(src) if isinstance(src, list) else src)
+            return cpy
+        
+        tree = [src[0]]
+        _set_slot(cpy, '_tree', tree)
+        children = []
+        simple_entries = []
+        named = dict()
+        childKey = self._childKey
+        for (i, c) in enumerate(srcChildren):
+            if isinstance(c, ParsedValue):
+                c = c._copyNode(tree, i + 1, cpy)
+                tree.append(c._tree)
+                entry_name = childKey(c._entity_name)
+                if entry_name in named:
+                    named[entry_name].append(c)
+                else:
+                    named[entry_name] = [c]
+            else:
+                if type(c) is list:
+                    c = copyTree(c)
+                tree.append(c)
+                simple_entries.append(c)
+            children.append(c)
+        
+        if len(simple_entries) == 1:
+            cpy._value = simple_entries[0]
+        elif len(simple_entries) > 1:
+            cpy._value = simple_entries
+            
+        for entry_name, entries in named.items():
+            if len(entries) == 1:
+                named[entry_name] = entries[0]
+        cpy._children = children
+        cpy._named = named
+        return cpy
+    
+    def _childrenInSync(self):
+        # children still line up one-to-one with the expression's 
+        # entries, i.e. nothing deleted or swapped out for a wrapper
+        src = self._tree
+        if len(src) != len(self._children) + 1:
+            return False 
+        for (i, c) in enumerate(self._children, 1):
+            if isinstance(c, ParsedValue):
+                if c._tree is not src[i]:
+                    return False 
+            elif type(c) is not list and c is not src[i]:
+                return False
+        return True
+    
     def delete(self):
+        '''
+            Remove this element from the tree.
+            
+            Its expression is replaced by a tombstone (None), which 
+            the source file clears out on write (or compact()).
+        '''
+        idx = self._rawIndex()
+        if idx is not None:
+            self._willChange(self._raw_parent)
+            self._raw_parent[idx] = None 
+            top, holder = self._topLevel()
+            if holder is not None and hasattr(holder, '_entityDeleted'):
+                holder._entityDeleted(self, top)
         
-        self._deleted = True
+        self._flagDeleted()
         
-        self._deleteOnTree(self._base_coords)
+    def _flagDeleted(self):
+        self._deleted = True
+        if self._children is None:
+            # never materialized, so no children objects to flag
+            return 
         
-        for c in self.children:
-            if hasattr(c, 'delete'):
-                c.delete()
+        for c in self._children:
+            if isinstance(c, ParsedValue):
+                c._flagDeleted()
+                
+    @property 
+    def is_deleted(self):
+        return self._deleted
                 
     @property 
     def entity_type(self):
@@ -300,25 +559,124 @@ class ParsedValue(AccessesTree):
                 
         
     def getElementsByEntityType(self, tp:str):
-        return self._crawlForElementsByType(tp, self.children)
+        '''
+            All the elements of type tp anywhere below this one, 
+            in document order.
+            
+            @note: the first call indexes the whole subtree, by type, 
+            so later ones (for any type) are just lookups
+        '''
+        found = self._typeIndex().get(tp)
+        if found is None:
+            return []
+        
+        for el in found:
+            if el._deleted:
+                # deletes don't bother with indices, clean up now
+                found[:] = [e for e in found if not e._deleted]
+                break
+        return list(found)
         
     @property 
     def raw(self):
-        c = self.sourceTree 
-        for coord in self._base_coords:
-            c = c[coord]
-            
-        return c
+        return self._tree
     
     
     @property 
     def raw_parent(self):
-        c = self.sourceTree 
-        for i in range(len(self._base_coords) - 1):
-            c = c[self._base_coords[i]] 
-            
-        return c 
+        return self._raw_parent
+    
+    @property 
+    def depth(self):
+        '''
+            How deep in the tree this element lives (top level elements are 1)
+        '''
+        d = 1
+        p = self._parent_obj
+        while isinstance(p, ParsedValue):
+            d += 1
+            p = p._parent_obj
+        return d
     
+    def _rawIndex(self):
+        '''
+            Index of our expression in raw_parent, None if it isn't there (anymore)
+        '''
+        rawpar = self._raw_parent
+        idx = self._index
+        if idx < len(rawpar) and rawpar[idx] is self._tree:
+            return idx 
+        
+        # stale, siblings must have moved around
+        for i, entry in enumerate(rawpar):
+            if entry is self._tree:
+                self._index = i
+                return i
+        return None
+    
+    def _setOnTree(self, idx:int, val):
+        '''
+            Set entry idx of this element's expression, e.g. 
+            for (property "Reference" "C4" ...), 1 is the name and 2 the value 
+        '''
+        self._willChange(self._tree)
+        self._tree[idx] = val
+        self._touch()
+    
+    def _topLevel(self):
+        '''
+            @return: (top level element we're part of, whatever holds 
+            it -- normally the source file)
+        '''
+        node = self
+        p = self._parent_obj
+        while isinstance(p, ParsedValue):
+            node = p
+            p = p._parent_obj
+        return (node, p)
+    
+    def _touch(self):
+        '''
+            Flag the top level element we're part of as modified, 
+            with whatever source file holds it
+        '''
+        node, holder = self._topLevel()
+        if holder is not None and hasattr(holder, '_entityModified'):
+            holder._entityModified(node._tree)
+    
+    def _willChange(self, changed:list):
+        '''
+            About to change list changed (our expression, or raw_parent) 
+            in place: let whatever holds the top level element we're 
+            part of know, first
+        '''
+        node, holder = self._topLevel()
+        if holder is not None and hasattr(holder, '_entityWillChange'):
+            holder._entityWillChange(self, node, changed)
+    
+    def _rebind(self, copies:dict):
+        '''
+            Point this node, and whatever of its subtree was parsed, at 
+            copies of the lists it reads from and writes to.
+            
+            @param copies: id(original list) -> its copy, see copyTree
+        '''
+        get = copies.get
+        self._tree = get(id(self._tree), self._tree)
+        self._raw_parent = get(id(self._raw_parent), self._raw_parent)
+        if type(self._value) is list:
+            self._value = get(id(self._value), self._value)
+        
+        children = self._children
+        if children is None:
+            return 
+        for (i, c) in enumerate(children):
+            if isinstance(c, ParsedValueWrapper):
+                c = c.wrapped_parsed_value
+            if isinstance(c, ParsedValue):
+                c._rebind(copies)
+            elif type(c) is list:
+                children[i] = get(id(c), c)
     
     
     def _move_method(self, xcoord:float, ycoord:float=None, rotation:int=None):
@@ -371,8 +729,19 @@ class ParsedValue(AccessesTree):
         
         self.at.value = new_loc
         for child in self.children:
+            if isinstance(child, ParsedValue) and not child._hasAt():
+                # spare materializing all the children that can't move anyway
+                continue 
             if hasattr(child, 'translation'):
                 child.translation(by_x, by_y)
+    
+    def _hasAt(self):
+        if self._children is not None:
+            return self._named is not None and 'at' in self._named
+        for e in self._tree:
+            if type(e) is list and len(e) and self.toString(e[0]) == 'at':
+                return True 
+        return False
          
     def _parseTree(self, tree):
         if not isinstance(tree, list):
@@ -382,15 +751,15 @@ class ParsedValue(AccessesTree):
         coord_adjust = 0
         
             
+        raw_list = tree
         if len(tree):
-            
-            self._entity_name = self.toString(tree[0])
-            log.debug(f'GOT NAME {self._entity_name} from first element')
             coord_adjust = 1
             tree = tree[1:]
             
         if len(tree) == 1:
-            log.debug(f'Len of tree is 1 {tree}, done here')
+            log.debug('Len of tree is 1 %s, done here', tree)
+            if type(tree[0]) is LazyAtom:
+                tree[0] = raw_list[1] = tree[0].resolve()
             if isinstance(tree[0], list):
                 if len(tree[0]) and not isinstance(tree[0][0], sexpdata.Symbol):
                     self._value = tree[0]
@@ -402,69 +771,40 @@ class ParsedValue(AccessesTree):
             
         
         children = []
-        childnameCounts = {}
-        all_entries_simple = True
+        simple_entries = []
+        named = dict()
         for (idx, entry) in enumerate(tree):
-            child_coord = []
-            for i in self._base_coords:
-                child_coord.append(i) 
-            child_coord.append(idx + coord_adjust)
-            log.debug(f'Parse subentry {entry}')
             if isinstance(entry, list) and len(entry):
-                entry_name = self.toSafeAttributeKey(self.toString(entry[0]))
-                if entry_name not in childnameCounts:
-                    childnameCounts[entry_name] = 1
+                parsed = ParsedValue(self.sourceTree, entry, raw_list, idx + coord_adjust, self)
+                entry_name = self._childKey(parsed.entity_type)
+                if entry_name in named:
+                    named[entry_name].append(parsed)
                 else:
-                    childnameCounts[entry_name] += 1
-                parsed = ParsedValue(self.sourceTree, entry, child_coord, self)
-                
-                log.debug(f"Appended entry at {child_coord}: {parsed}")
+                    named[entry_name] = [parsed]
                 children.append(parsed)
-                all_entries_simple = False
             else:
+                if type(entry) is LazyAtom:
+                    # someone's finally looking at it
+                    entry = raw_list[idx + coord_adjust] = entry.resolve()
                 children.append(entry)
+                simple_entries.append(entry)
         
-        self.children = children
-        self._nameCounts = childnameCounts # just keeping for debug
-        specialChildrenCollections = {}
-        
-        if all_entries_simple:
+        self._children = children
+        if not len(named):
             self._value = children
-        else:
-            for c in children:
-                if not isinstance(c, ParsedValue):
-                    if self._value is None:
-                        self._value = c
-                    elif not isinstance(self._value, list):
-                        self._value = [self._value, c]
-                    else:
-                        self._value.append(c)
-                    continue
-                    
-                centry_name = self.toSafeAttributeKey(c.entity_type)
-                if centry_name in childnameCounts and childnameCounts[centry_name] > 1:
-                    
-                    if centry_name in specialChildrenCollections:
-                        if not hasattr(self, centry_name):
-                            ccont = specialChildrenCollections[centry_name](self.sourceTree, centry_name)
-                            setattr(self, centry_name, ccont)
-                            self._added_children_names.append(centry_name)
-                        ccont = getattr(self, centry_name)
-                        ccont.append(c) 
-                    else:
-                        pluralentry_name = f'{centry_name}' # actually leaving same now
-                        if not hasattr(self, pluralentry_name):
-                            setattr(self, pluralentry_name, [])
-                            self._added_children_names.append(pluralentry_name)
-                        
-                        v = getattr(self, pluralentry_name) 
-                        v.append(c) 
-                else:
-                    if hasattr(self, centry_name):
-                        log.warn(f"OVERWRITING {centry_name}")
-                    else:
-                        self._added_children_names.append(centry_name)
-                    setattr(self, centry_name, c)
+            return
+        
+        if len(simple_entries) == 1:
+            self._value = simple_entries[0]
+        elif len(simple_entries) > 1:
+            self._value = simple_entries
+            
+        # children are accessible as attributes.  If there are (possibly) many 
+        # children of the same type, this attribute will be list-like
+        for entry_name, entries in named.items():
+            if len(entries) == 1:
+                named[entry_name] = entries[0]
+        self._named = named
       
     
     
@@ -473,20 +813,74 @@ class ParsedValue(AccessesTree):
     
     
     
-    def _crawlForElementsByType(self, tp:str, elements:list):
-        retVal = []
-        for el in elements:
-            if isinstance(el, ParsedValue):
-                if el.entity_type == tp:
-                    retVal.append(el)
-                retVal.extend(el.getElementsByEntityType(tp))
-            elif isinstance(el, list):
-                retVal.extend(self._crawlForElementsByType(tp, el))
+    def _typeIndex(self):
+        if self._type_index is not None:
+            return self._type_index
+        
+        index = dict()
+        for el in self.children:
+            if not isinstance(el, ParsedValue):
+                continue 
+            index.setdefault(el._entity_name, []).append(el)
+            if el._type_index is not None:
+                # already done that bit
+                for tp, found in el._type_index.items():
+                    index.setdefault(tp, []).extend(found)
+            else:
+                el._crawlInto(index)
         
-        return retVal
+        self._type_index = index
+        return index
+    
+    def _crawlInto(self, index:dict):
+        # depth-first, so everything lands in document order
+        stack = [iter(self.children)]
+        while len(stack):
+            for el in stack[-1]:
+                if isinstance(el, ParsedValue):
+                    index.setdefault(el._entity_name, []).append(el)
+                    stack.append(iter(el.children))
+                    break 
+            else:
+                stack.pop()
+    
+    def _indexAdded(self, added:list):
+        '''
+            added were just appended to our children: let all the indices 
+            covering them, ours and our parents', know about it
+        '''
+        p = self
+        tail = added
+        entries = None
+        while isinstance(p, ParsedValue):
+            if p._type_index is not None:
+                if not p._endsWith(tail):
+                    # lands mid-way through this index, appending would
+                    # break document order: drop it (and those above) and
+                    # let them be rebuilt on demand, from the ones below
+                    while isinstance(p, ParsedValue):
+                        p._type_index = None
+                        p = p._parent_obj
+                    return
+                if entries is None:
+                    entries = dict()
+                    for el in added:
+                        entries.setdefault(el._entity_name, []).append(el)
+                        el._crawlInto(entries)
+                for tp, found in entries.items():
+                    p._type_index.setdefault(tp, []).extend(found)
+            tail = [p]
+            p = p._parent_obj
+    
+    def _endsWith(self, els:list):
+        last = [c for c in self.children[-len(els):] if isinstance(c, ParsedValue)]
+        if len(last) != len(els):
+            return False
+        return all(a is b for a, b in zip(last, els))
             
             
     def __bool__(self):
+        self._materialize()
         if self._is_bool_symbol(self._value):
             return self._as_boolean(self._value)
         return self._value
@@ -527,16 +921,17 @@ class ParsedValue(AccessesTree):
         return self.children[idx]
     
     def __str__(self):
+        self._materialize()
         bstring = self.__repr__()
         if len(bstring) > 24:
             bstring = f'{bstring[:24]}...'
             
         childrens = []
-        for cname in self._added_children_names:
-            c = getattr(self, cname)
-            childrens.append(str(c))
+        if self._named is not None:
+            for c in self._named.values():
+                childrens.append(str(c))
             
-        tabs = "  "*len(self._base_coords)
+        tabs = "  "*self.depth
         nl = f"\n{tabs}"
         return f"{tabs}{bstring}\n{nl.join(childrens)}"
             
@@ -579,11 +974,15 @@ class ParsedValueWrapper:
         return hasattr(self._pv, name)
     
     def __getattr__(self, name:str):
-        if not hasattr(self._pv, name):
+        if name == '_pv':
+            # not set up (yet), e.g. while unpickling
+            raise AttributeError(name)
+        try:
+            return getattr(self._pv, name)
+        except AttributeError:
             #raise AttributeError(f"no '{name}' in {self._pv}")
-            log.debug(f'no "{name}" found')
+            log.debug('no "%s" found', name)
             return None
-        return getattr(self._pv, name)
     
     def __dir__(self):
         return dir(self._pv)
@@ -614,15 +1013,6 @@ class ArbitraryNamedParsedValueWrapper(ParsedValueWrapper):
     def __init__(self, pv:ParsedValue):
         super().__init__(pv)
         
-        coords = []
-        for i in pv._base_coords:
-            coords.append(i)                        
-        #coords.append(2)
-        self._name_coords = copy.deepcopy(coords)
-        self._val_coords = coords
-        self._name_coords.append(1)
-        self._val_coords.append(2)
-        
         name = self._cleanse_name(pv.toString(pv.children[0]))
         self._name = name
     
@@ -645,9 +1035,9 @@ class ArbitraryNamedParsedValueWrapper(ParsedValueWrapper):
     @name.setter 
     def name(self, setTo:str):
         oldName = self._name
-        self.children[0] = setTo
+        self._pv.children[0] = setTo
         name = self._cleanse_name(setTo)
-        self._setOnTree(self._name_coords, setTo)
+        self._pv._setOnTree(1, setTo)
         self.updateParentCollection(oldName, name)
         self._name = name
     @property 
@@ -665,10 +1055,10 @@ class ArbitraryNamedParsedValueWrapper(ParsedValueWrapper):
         self.setValue(x)
     
     def getValue(self):
-        return self.children[1] 
+        return self._pv.children[1] 
     def setValue(self, x):
-        self.children[1] = x
-        self._setOnTree(self._val_coords, x)
+        self._pv.children[1] = x
+        self._pv._setOnTree(2, x)
     
     
     def updateParentCollection(self, oldName:str, newName:str):
@@ -679,7 +1069,7 @@ class ArbitraryNamedParsedValueWrapper(ParsedValueWrapper):
     
         
     def __str__(self):
-        tabs = "  "*len(self._base_coords)
+        tabs = "  "*self._pv.depth
         return f'{tabs}{self.name}:\n{str(self._pv)}'
     
     
\ No newline at end of file
@@ -0,0 +1,556 @@
+'''
+A tokenizer/parser dedicated to the kicad flavour of s-expressions.
+
+sexpdata is a general purpose lisp reader, and pays for it: every atom
+goes through a regex search, escape handling and int/float/symbol
+guessing, one character class at a time.  Kicad files only ever contain
+  * lists, (like this)
+  * symbols, like at or F.Cu or 342c76f3-b2b8-40b2-a0b0-d83e480188cc
+  * "quoted strings", with backslash escapes
+  * ints and floats
+so this reader splits the whole buffer in one regex pass and builds the
+tree with a tight loop over the tokens.
+
+The result is the same nested list of sexpdata.Symbol, str, int and float
+that sexpdata.loads() would produce, so everything downstream
+(ParsedValue, writeTree) works unchanged.
+
+Kicad files are extremely repetitive (thousands of "at", "xy", 1.27, "F.Cu"...)
+so converted atoms are memoized during a parse: a token is only converted
+once and the resulting (immutable) object is shared in the tree, which
+saves both time and memory.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import bisect
+import gc
+import mmap
+import pickle
+import re
+from sexpdata import Symbol
+
+import logging
+log = logging.getLogger(__name__)
+
+TokenRegex = re.compile(rb'[()]|"[^"\\]*(?:\\.[^"\\]*)*"|(?:[^\s()"\\]|\\.)[^\s()"\\]*(?:\\.[^\s()"\\]*)*|"', re.S)
+EscapeRegex = re.compile(r'\\(.)', re.S)
+
+# what each escape in a quoted string, or a symbol, stands for -- 
+# as sexpdata reads them
+StringEscapes = {'\\\\': '\\', '\\"': '"', '\\b': '\b', '\\f': '\f', 
+                 '\\n': '\n', '\\r': '\r', '\\t': '\t'}
+SymbolEscapes = {f'\\{c}': c for c in '\\\'`"()[] ,?;#'}
+
+# atoms longer than this (uuids, tstamps, data chunks) are
+# basically never repeated, so not worth memoizing
+MaxMemoizedTokenLength = 24
+
+# atoms longer than this (embedded images, data blocks) are left 
+# as LazyAtoms when parsing from a memory mapped file
+MinLazyAtomLength = 256
+
+# sources smaller than this aren't worth farming out to other processes
+MinParallelSize = 4*1024*1024
+
+_matched = re.Match.group
+
+_OpenParen = object()
+_CloseParen = object()
+
+def _unescape(s:str, escapes:dict):
+    return EscapeRegex.sub(lambda m: escapes.get(m.group(0), m.group(0)), s)
+
+def _convert_atom(tok:bytes):
+    '''
+        Convert a non-paren token into the value sexpdata would
+        have produced for it.
+    '''
+    if tok[0] == 34: # '"'
+        if len(tok) < 2 or tok[-1] != 34:
+            raise ValueError(f'Unterminated string {tok[:24]}')
+        s = tok[1:-1].decode('utf-8')
+        if '\\' in s:
+            s = _unescape(s, StringEscapes)
+        return s
+    try:
+        return int(tok)
+    except ValueError:
+        pass
+    try:
+        return float(tok)
+    except ValueError:
+        pass
+    s = tok.decode('utf-8')
+    if '\\' in s:
+        s = _unescape(s, SymbolEscapes)
+    return Symbol(s)
+
+
+class LazyAtom:
+    '''
+        Placeholder for a long atom, that still lives in the (memory mapped) 
+        source.  It's only decoded if something actually looks at it -- 
+        ParsedValue does this transparently, swapping it out for the 
+        real value in the tree -- and written back as-is otherwise.
+    '''
+    __slots__ = ('buffer', 'start', 'end')
+    def __init__(self, buffer, start:int, end:int):
+        self.buffer = buffer 
+        self.start = start 
+        self.end = end 
+        
+    @property 
+    def token(self) -> bytes:
+        '''
+            the atom, as it appears in the source
+        '''
+        return self.buffer[self.start:self.end]
+    
+    def resolve(self):
+        '''
+            @return: the actual value (str, Symbol...) 
+        '''
+        return _convert_atom(self.token)
+    
+    def __len__(self):
+        return self.end - self.start
+    
+    def __eq__(self, other):
+        if isinstance(other, LazyAtom):
+            other = other.resolve()
+        return self.resolve() == other 
+    
+    def __hash__(self):
+        return hash(self.resolve())
+        
+    def __deepcopy__(self, memo):
+        # immutable, as far as anyone is concerned
+        return self 
+    
+    def __reduce__(self):
+        # can't pickle the mapping, ship the real thing
+        v = self.resolve()
+        return (type(v), (str(v),))
+    
+    def __repr__(self):
+        return f'<LazyAtom {len(self)} bytes>'
+        
+        
+class SourceSpans:
+    '''
+        Where each top level entity came from, in the original buffer.
+        
+        The buffer is cut into contiguous chunks, one per top level entity 
+        (the first chunk holds the opening of the root expression along 
+        with whatever sits on its line, the tail is the closing paren).  
+        As long as the entities of a chunk haven't been touched, writing 
+        the chunk back verbatim gives exactly what was read.
+        
+        Entities that get modified are flagged with modified(); they 
+        (along with anything new) are re-serialized on write.
+    '''
+    __slots__ = ('buffer', 'indent', 'entities', 'bounds', 'firsts', 'dirty')
+    def __init__(self, buffer:bytes, indent:bytes, entities:list, bounds:list, firsts:list):
+        self.buffer = buffer 
+        self.indent = indent # one level of indentation, as found in the source
+        self.entities = entities # shallow copy of the original root expression
+        self.bounds = bounds # chunk start offsets, followed by the tail start
+        self.firsts = firsts # index, in entities, of each chunk's first entry
+        self.dirty = set()
+        
+    def modified(self, entity:list):
+        self.dirty.add(id(entity))
+        
+    def __len__(self):
+        return len(self.firsts)
+    
+    def entries(self, idx:int):
+        '''
+            @return: (first, last) such that entities[first:last] 
+            were read from chunk idx
+        '''
+        last = self.firsts[idx + 1] if idx + 1 < len(self.firsts) else len(self.entities)
+        return (self.firsts[idx], last)
+    
+    def text(self, idx:int):
+        return self.buffer[self.bounds[idx]:self.bounds[idx+1]]
+    
+    @property 
+    def tail(self):
+        return self.buffer[self.bounds[-1]:]
+        
+
+# a top level entity, on its own line at a single level of indentation 
+# -- the way kicad always writes them
+EntityStartRegex = re.compile(rb'\n(\t|  )\(')
+
+def _parse(buf, boundaries:list=None, lazy:bool=False):
+    '''
+        Build the tree for buf, tokenizing it range by range 
+        between successive boundaries, if any.  Without any, it's 
+        tokenized as it goes rather than all at once, so the tokens 
+        of a huge buffer never all sit in memory together.
+        
+        @return: (tree, chunks) where chunks lists the (boundary, first index) 
+        of every boundary that fell cleanly between top level entities
+        
+        @param lazy: leave long atoms as LazyAtoms
+    '''
+    root = []
+    cur = root
+    stack = []
+    memo = {b'(': _OpenParen, b')': _CloseParen}
+    memoized = memo.get
+    tokenize = TokenRegex.findall
+    
+    lazy_search_from = 0
+    
+    chunks = []
+    ranges = []
+    pos = 0
+    for b in (boundaries or []):
+        ranges.append((pos, b))
+        pos = b 
+    ranges.append((pos, len(buf)))
+
+    # the tree is nothing but millions of fresh lists, which will
+    # trigger the cyclic GC over and over for nothing -- hold it
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for start, end in ranges:
+            if len(stack) == 1:
+                # right between two top level entities 
+                chunks.append((start, len(cur)))
+            if boundaries:
+                tokens = tokenize(buf, start, end)
+            else:
+                tokens = map(_matched, TokenRegex.finditer(buf, start, end))
+            for tok in tokens:
+                v = memoized(tok)
+                if v is _OpenParen:
+                    stack.append(cur)
+                    sub = []
+                    cur.append(sub)
+                    cur = sub
+                elif v is _CloseParen:
+                    if not len(stack):
+                        raise ValueError('Too many closing brackets')
+                    cur = stack.pop()
+                else:
+                    if v is None:
+                        if lazy and len(tok) >= MinLazyAtomLength:
+                            # tokens don't say where they are, but it's after the 
+                            # last one -- and if this finds an identical one 
+                            # somewhere in between, well, it's identical
+                            tstart = buf.find(tok, lazy_search_from)
+                            lazy_search_from = tstart + len(tok)
+                            v = LazyAtom(buf, tstart, lazy_search_from)
+                        else:
+                            v = _convert_atom(tok)
+                            if len(tok) <= MaxMemoizedTokenLength:
+                                memo[tok] = v
+                    cur.append(v)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if len(stack):
+        raise ValueError(f'Not enough closing brackets ({len(stack)} still open)')
+
+    if len(root) != 1:
+        raise ValueError(f'Expected a single top level expression, got {len(root)}')
+
+    return (root[0], chunks)
+
+def loads(buf):
+    '''
+        Parse a kicad s-expression.
+
+        @param buf: the source, as bytes (or anything supporting the
+        buffer protocol) or str
+
+        @return: the top level expression, as nested lists
+    '''
+    if isinstance(buf, str):
+        buf = buf.encode('utf-8')
+    
+    lazy = isinstance(buf, mmap.mmap)
+    boundaries = [m.start() for m in EntityStartRegex.finditer(buf)]
+    if len(boundaries):
+        try:
+            tree, _chunks = _parse(buf, boundaries, lazy)
+            return tree
+        except ValueError:
+            # a boundary fell within a string, or buf is broken
+            pass
+    
+    tree, _chunks = _parse(buf, lazy=lazy)
+    return tree
+
+def loads_with_spans(buf, workers:int=None):
+    '''
+        Parse a kicad s-expression, noting where each top level 
+        entity lives in buf.
+        
+        @param workers: if > 1, and buf is large, have this many processes 
+        parse it, each taking a contiguous run of top level entities (see 
+        MinParallelSize)
+        
+        @return: (tree, SourceSpans), the spans being None if the 
+        source isn't laid out the way kicad does it (in which 
+        case there's nothing to preserve, anyway)
+    '''
+    if isinstance(buf, str):
+        buf = buf.encode('utf-8')
+    
+    lazy = isinstance(buf, mmap.mmap)
+    closing = len(buf) - 1
+    while closing > 0 and buf[closing] in b' \t\r\n':
+        closing -= 1
+    starts = EntityStartRegex.finditer(buf, 0, closing)
+    first = next(starts, None)
+    if closing < 1 or first is None:
+        tree, _chunks = _parse(buf, lazy=lazy)
+        return (tree, None)
+    
+    indent = first.group(1)
+    boundaries = [first.start()]
+    boundaries.extend(m.start() for m in starts)
+    # the tail: closing paren of the root expression, on its own line if it is
+    tail = buf.rfind(b'\n', boundaries[-1], closing)
+    if tail < 0 or len(buf[tail:closing].strip()):
+        tail = closing
+    boundaries.append(tail)
+    
+    try:
+        if workers is not None and workers > 1 and len(buf) >= MinParallelSize \
+            and len(boundaries) > workers:
+            tree, chunks = _parseParallel(buf, boundaries, workers)
+        else:
+            tree, chunks = _parse(buf, boundaries, lazy)
+    except ValueError:
+        # some boundary fell within a string (or the source is broken, 
+        # in which case this will say so)
+        tree, _chunks = _parse(buf, lazy=lazy)
+        return (tree, None)
+    
+    if not len(chunks) or chunks[-1][0] != tail:
+        return (tree, None)
+    
+    bounds = [0]
+    firsts = [0]
+    for (b, first_idx) in chunks:
+        bounds.append(b)
+        firsts.append(first_idx)
+    # the last one was the tail
+    firsts.pop()
+    
+    return (tree, SourceSpans(buf, indent, list(tree), bounds, firsts))
+
+def _parseRegion(region:bytes, boundaries:list):
+    '''
+        Worker side of _parseParallel: parse a run of whole top level 
+        entities, as the entries of a (made up) expression.
+        
+        @return: (entities, chunks) like _parse, with the boundaries 
+        relative to region -- pickled, so the other side gets to choose 
+        how to unpickle
+    '''
+    entities, chunks = _parse(b'(' + region + b')', [b + 1 for b in boundaries])
+    return pickle.dumps((entities, [(b - 1, idx) for (b, idx) in chunks]), 
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+def unpickleTree(pickled):
+    '''
+        Unpickle a (parsed) tree, from bytes or an open file, with 
+        the garbage collector held off as when parsing: millions of 
+        fresh lists, no cycles, nothing for it to find.
+    '''
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if hasattr(pickled, 'read'):
+            return pickle.load(pickled)
+        return pickle.loads(pickled)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def _parseParallel(buf, boundaries:list, workers:int):
+    '''
+        _parse(buf, boundaries), with the top level entities split up 
+        into one contiguous region per worker, each parsed in a process 
+        of its own, then stitched back together in order.
+        
+        @note: long atoms are never left lazy, as the workers don't have buf
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    
+    first = boundaries[0]
+    tail = boundaries[-1]
+    
+    # split on entity boundaries, into regions of about the same size
+    regions = []
+    region_start = 0
+    for w in range(1, workers + 1):
+        target = first + ((tail - first) * w) // workers
+        region_end = bisect.bisect_left(boundaries, target, region_start + 1)
+        if w == workers:
+            region_end = len(boundaries) - 1
+        if region_end > region_start:
+            regions.append((region_start, region_end))
+            region_start = region_end
+    
+    # the head of the root expression, e.g. (kicad_pcb ...first line...), closed
+    tree, chunks = _parse(bytes(buf[:first]) + bytes(buf[tail:]))
+    chunks = [(first, len(tree))]
+    
+    try:
+        with ProcessPoolExecutor(max_workers=len(regions)) as pool:
+            jobs = []
+            for (rs, rend) in regions:
+                offset = boundaries[rs]
+                jobs.append(pool.submit(_parseRegion, bytes(buf[offset:boundaries[rend]]), 
+                                        [b - offset for b in boundaries[rs:rend]]))
+            
+            for ((rs, rend), job) in zip(regions, jobs):
+                entities, region_chunks = unpickleTree(job.result())
+                if len(region_chunks) and region_chunks[0][0] == 0:
+                    # the region start, already noted as the end of the last one
+                    region_chunks = region_chunks[1:]
+                offset = boundaries[rs]
+                base = len(tree)
+                chunks.extend((offset + b, base + idx) for (b, idx) in region_chunks)
+                tree.extend(entities)
+                chunks.append((boundaries[rend], len(tree)))
+    except (OSError, BrokenProcessPool) as e:
+        log.warning('Parallel parse unavailable (%s), parsing in process', e)
+        return _parse(buf, boundaries)
+    
+    return (tree, chunks)
+
+
+# how much of the file iter_top_level() reads in at a time
+StreamBlockSize = 1024*1024
+
+def iter_top_level(fpath:str, block_size:int=None):
+    '''
+        Parse the file at fpath incrementally, yielding the entries of 
+        the root expression -- its head (e.g. kicad_pcb) then every top 
+        level entity -- one at a time, as they're completed.
+        
+        Nothing is kept once yielded and the file is read block_size 
+        bytes at a time, so memory use is bounded by the largest entity 
+        rather than the file.
+    '''
+    if block_size is None:
+        block_size = StreamBlockSize
+        
+    root = []
+    cur = root
+    stack = []
+    memo = {b'(': _OpenParen, b')': _CloseParen}
+    memoized = memo.get
+    tokenize = TokenRegex.findall
+    pending = b''
+    with open(fpath, 'rb') as f:
+        at_eof = False 
+        while not at_eof:
+            block = f.read(block_size)
+            if not len(block):
+                at_eof = True
+                segment = pending 
+                pending = b''
+            else:
+                # cut after the last newline: only a string can 
+                # straddle that, and kicad escapes those in strings
+                data = pending + block
+                cut = data.rfind(b'\n') + 1
+                segment = data[:cut]
+                pending = data[cut:]
+            
+            tokens = tokenize(segment)
+            if not at_eof and b'"' in tokens:
+                # ...but better safe: a string got split, wait for the rest
+                pending = segment + pending 
+                continue
+            
+            for tok in tokens:
+                v = memoized(tok)
+                if v is _OpenParen:
+                    stack.append(cur)
+                    sub = []
+                    cur.append(sub)
+                    cur = sub
+                    continue 
+                
+                if v is _CloseParen:
+                    if not len(stack):
+                        raise ValueError('Too many closing brackets')
+                    cur = stack.pop()
+                else:
+                    if v is None:
+                        v = _convert_atom(tok)
+                        if len(tok) <= MaxMemoizedTokenLength:
+                            memo[tok] = v
+                    cur.append(v)
+                
+                if len(stack) == 1:
+                    # cur is the root expression, and just got 
+                    # a complete entry
+                    yield cur.pop()
+    
+    if len(stack):
+        raise ValueError(f'Not enough closing brackets ({len(stack)} still open)')
+    
+    if len(root) != 1:
+        raise ValueError(f'Expected a single top level expression, got {len(root)}')
+    
+
+def read_source(fpath:str, memory_mapped:bool=False):
+    '''
+        The contents of fpath, as bytes or, if memory_mapped, 
+        a read-only mmap of the file.
+    '''
+    with open(fpath, 'rb') as f:
+        if memory_mapped:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+    
+def source_indent(fpath:str, head_size:int=65536):
+    '''
+        One level of indentation, as found before the first top level 
+        entity in fpath, or None if there's no telling.
+        
+        For when there are no SourceSpans to say so.
+    '''
+    with open(fpath, 'rb') as f:
+        head = f.read(head_size)
+    m = EntityStartRegex.search(head)
+    if m is None:
+        return None
+    return m.group(1)
+    
+def load(fpath:str, with_spans:bool=False, memory_mapped:bool=False, workers:int=None):
+    '''
+        Parse the kicad s-expression file at fpath.
+        
+        @param with_spans: return (tree, SourceSpans) rather than just the tree
+        @param workers: parse in this many processes, see loads_with_spans
+        (only applies with_spans)
+        @param memory_mapped: tokenize straight from a memory mapping of 
+        the file, rather than reading it all in.  Long atoms are then left 
+        as LazyAtoms, and the mapping stays open as long as anything 
+        (those, the spans) refers to it.
+        
+    '''
+    buf = read_source(fpath, memory_mapped)
+    if with_spans:
+        return loads_with_spans(buf, workers)
+    return loads(buf)
@@ -65,28 +65,81 @@ Created on Jan 29, 2024
 @copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
 '''
 import copy
+import itertools
+import os
 from skip.sexp.util import loadTree, writeTree
-from skip.sexp.parser import ParsedValue
+from skip.sexp import reader
+from skip.sexp.parser import ParsedValue, compactTombstones
+from skip.sexp.stats import Stats, NoStats, count_nodes
 from skip.collection import ElementCollection
 import logging 
 log = logging.getLogger(__name__)
 
 class SourceFile:
-    def __init__(self, filepath:str):
+    # parse large files straight from a memory mapping, rather than 
+    # reading them in, leaving long atoms (images, data) undecoded until
+    # they're looked at.  Saves a lot of RAM on huge boards.
+    MemoryMapped = False
+    
+    # a cache.ParseCache, to skip parsing altogether for files 
+    # that were seen before
+    ParseCache = None
+    
+    # number of processes to parse large files with (None/1: just this one),
+    # e.g. os.cpu_count()
+    ParseWorkers = None
+    
+    # time each phase of reads/writes, and count entities and nodes, 
+    # into the stats attribute (see skip.sexp.stats)
+    CollectStats = False
+    
+    # callable(stats), called with the Stats of each read/write, 
+    # when CollectStats is on
+    StatsHook = None
+    
+    # number of modified top level entities remembered, for changes_since()
+    ChangeLogSize = 4096
+    
+    _NoStats = NoStats()
+    
+    def __init__(self, filepath:str, include:list=None, exclude:list=None):
         '''
             c'tor for the sexprdata sourced objects, 
             baseclass for specifically oriented file types (e.g. kicad_sch 
             schematics).
             
             @param filepath: path/to/source.blah
+            @param include: only load these top level entity types (e.g. ['footprint', 'net'])
+            @param exclude: don't load these top level entity types (e.g. ['lib_symbols'])
             
             @note: No checking is done at all.  If the file DNE, it dies.  
             If it's not a the kind of file we expect... who knows.
+            
+            @note: entities that aren't loaded are left as-is in the tree, 
+            unparsed and unwrapped, and written back untouched.  The ones 
+            others rely on (stream_context_types(), e.g. lib_symbols for a 
+            symbol's lib_symbol, nets for a segment's net) come along with 
+            any include, but anything that relies on what's excluded won't 
+            work.
         '''
+        self._setup(include, exclude)
+        self.read(filepath)
+        
+    def _setup(self, include:list=None, exclude:list=None):
+        self._include = None
+        if include is not None:
+            self._include = set(include) | set(self.stream_context_types())
+        self._exclude = set(exclude) if exclude is not None else set()
         self.tree = None
+        self._spans = None
+        self._indent = None
+        self._all = dict()
+        self._tombstones = dict()
         self._added_attribs = []
         self._dedicatedWrappers = dict()
-        self.read(filepath)
+        self.stats = dict()
+        self._changes = []
+        self._changesBase = 0
         
     @property 
     def filepath(self):
@@ -110,6 +163,95 @@ class SourceFile:
         log.debug(f'Will write {filepath}')
         return True
     
+    def loads_entity_type(self, entity_type:str):
+        '''
+            Whether top level entities of this type get parsed and 
+            wrapped, according to the include/exclude passed on construction
+        '''
+        if entity_type in self._exclude:
+            return False 
+        return self._include is None or entity_type in self._include
+    
+    @classmethod 
+    def stream_context_types(cls):
+        '''
+            Top level entity types other entities rely on (e.g. nets, 
+            layers), that iter_entities() keeps around.
+            For overriding in subclasses.
+        '''
+        return []
+    
+    @classmethod 
+    def iter_entities(cls, filepath:str, types:list=None):
+        '''
+            Stream through the top level entities in filepath, yielding 
+            each one, wrapped as it would be on a full load, in turn.
+            
+            The file is parsed incrementally and entities are dropped 
+            once you're done with them, so memory stays bounded by the 
+            largest entity rather than by the file.
+            
+              for via in PCB.iter_entities('huge.kicad_pcb', ['via']):
+                  count[via.net.value] += 1
+            
+            @param filepath: path/to/source.blah
+            @param types: entity types to yield, all of them if None
+            
+            @note: entity types listed in stream_context_types() are 
+            kept (as attributes of the yielded elements' parent), so things 
+            like a segment's net still work, and when asked for they're 
+            yielded as the very elements kept there.  The rest isn't kept: 
+            each of those sits alone in a list of its own, detached from 
+            the (partial) tree, which makes them read-only in effect: 
+            there's no tree to write modifications to.
+        '''
+        holder = cls.__new__(cls)
+        holder._setup()
+        holder._filepath = filepath 
+        holder.tree = []
+        
+        wanted = set(types) if types is not None else None 
+        context_types = set(cls.stream_context_types())
+        context = dict() # ent_type -> all wrapped so far
+        new_context = dict()
+        def keepContext():
+            for ctx_type, added in new_context.items():
+                holder._all.setdefault(ctx_type, []).extend(map(lambda a: a[0], added))
+                kept = context.setdefault(ctx_type, [])
+                kept.extend(map(lambda a: a[1], added))
+                if ctx_type not in holder._added_attribs:
+                    holder._added_attribs.append(ctx_type)
+                holder._setCollection(ctx_type, list(kept))
+            new_context.clear()
+            
+        for entry in reader.iter_top_level(filepath):
+            if not isinstance(entry, list) or not len(entry):
+                # the head, basically
+                holder.tree.append(entry)
+                continue 
+            
+            ent_type = ParsedValue.toString(entry[0])
+            if ent_type in context_types:
+                holder.tree.append(entry)
+                pv = ParsedValue(holder.tree, entry, holder.tree, len(holder.tree) - 1, holder)
+                wrapped = holder.wrap(pv)
+                new_context.setdefault(ent_type, []).append((pv, wrapped))
+                if wanted is None or ent_type in wanted:
+                    yield wrapped
+                continue
+                
+            if wanted is not None and ent_type not in wanted:
+                continue 
+            
+            # context entities are grouped up top, so this 
+            # happens once or twice, not per entity
+            keepContext()
+            
+            pv = ParsedValue(holder.tree, entry, [entry], 0, holder)
+            yield holder.wrap(pv)
+        
+        keepContext()
+    
     @classmethod
     def dedicated_collections_by_type(cls):
         return {}
@@ -148,7 +290,62 @@ class SourceFile:
         
         # load the tree from the file
         self._filepath = filepath    
-        self.tree = loadTree(filepath)
+        stats = self._startStats('read', filepath)
+        with stats.phase('parse'):
+            if self.ParseCache is not None:
+                tree, spans = self.ParseCache.load(filepath, self.MemoryMapped, self.ParseWorkers)
+            else:
+                tree, spans = loadTree(filepath, with_spans=True, 
+                                       memory_mapped=self.MemoryMapped, 
+                                       workers=self.ParseWorkers)
+        self._readTree(tree, spans, stats)
+        self._endStats(stats)
+        
+    @classmethod 
+    def from_tree(cls, filepath:str, tree:list, spans:reader.SourceSpans=None, 
+                  include:list=None, exclude:list=None):
+        '''
+            Construct from a tree that was already parsed out of filepath 
+            (e.g. by another process, see skip.batch).
+            
+            @param spans: where the tree came from, as returned by 
+            reader.loads_with_spans, so writes can preserve what's untouched
+            @param include: as for the c'tor
+            @param exclude: as for the c'tor
+        '''
+        src = cls.__new__(cls)
+        src._setup(include, exclude)
+        src._filepath = filepath
+        stats = src._startStats('read', filepath)
+        src._readTree(tree, spans, stats)
+        src._endStats(stats)
+        return src
+    
+    def _startStats(self, operation:str, filepath:str):
+        if not self.CollectStats:
+            return self._NoStats
+        return Stats(operation, filepath)
+    
+    def _endStats(self, stats):
+        if not stats.enabled:
+            return 
+        self.stats[stats.operation] = stats 
+        # class-level callable, don't want it bound to us
+        hook = type(self).StatsHook
+        if hook is not None:
+            hook(stats)
+        
+    def _readTree(self, tree:list, spans:reader.SourceSpans=None, stats=None):
+        if stats is None:
+            stats = self._NoStats
+        self.tree = tree 
+        self._spans = spans 
+        if spans is not None:
+            self._indent = spans.indent
+        else:
+            # so a full rewrite still comes out the way the source was
+            self._indent = self._sourceIndent()
+        self._tombstones = dict()
         
         if len(self._added_attribs):
             # we've generated attribs, this is a reload/fresh load
@@ -159,72 +356,113 @@ class SourceFile:
         # clear out the list
         self._added_attribs = []
             
+        if stats.enabled:
+            with stats.phase('count'):
+                self._countEntities(stats)
+        
         bytype = {}
-        for i, level in enumerate(self.tree):
-            try:
-                pv = ParsedValue(self.tree, level, [i], self)
-                if pv.entity_type not in bytype:
-                    bytype[pv.entity_type] = []
-                
-                bytype[pv.entity_type].append(pv)
-            except Exception as e:
-                print(f"Problem parsing entry {i}:\n{level}")
-                print(e)
+        with stats.phase('nodes'):
+            for i, level in enumerate(self.tree):
+                if isinstance(level, list) and len(level) and \
+                        not self.loads_entity_type(ParsedValue.toString(level[0])):
+                    # left as a raw subtree
+                    continue
+                try:
+                    pv = ParsedValue(self.tree, level, self.tree, i, self)
+                    if pv.entity_type not in bytype:
+                        bytype[pv.entity_type] = []
+                    
+                    bytype[pv.entity_type].append(pv)
+                except Exception as e:
+                    print(f"Problem parsing entry {i}:\n{level}")
+                    print(e)
         
         self._all = bytype
         
         for ent_type,v in bytype.items():
-            
-            if ent_type is None:
-                continue 
-            
-            # no matter what, we'll have and attrib called this
-            self._added_attribs.append(ent_type)
-            
-            if ent_type not in self._dedicatedWrappers:
-                # never seen this type, check for dedicated wrapper
-                self._dedicatedWrappers[ent_type] = self.dedicated_wrapper_type_for(ent_type)
-            
-            # if we have a wrapper for this type
-            # wrap all the entities with it and replace  
-            entities = []   
-            if self._dedicatedWrappers[ent_type] is None:
-                # no wrappers, just the same ol' list as-is
-                entities = v 
-            else:
-                wrapClass = self._dedicatedWrappers[ent_type]
-                if len(v):
-                    entities = list(map(lambda baseobj: wrapClass(baseobj), v))
-            
-            # this can lead to surprises (eg sheet, which may be single or multiple) 
-            # but makes life simpler in most cases
-            dedicatedCollection = self.dedicated_collection_type_for(ent_type)
-            if len(entities) == 1: 
-                if dedicatedCollection is None:
-                    setattr(self, ent_type, entities[0]) 
-                else:
-                    setattr(self, ent_type, dedicatedCollection(self, entities))
-            elif len(entities) > 1:
-                # multiple entities, may want a special collection
-                dedicatedCollection = self.dedicated_collection_type_for(ent_type)
-                
-                if dedicatedCollection is None:
-                    # nope, just have a list
-                    log.debug(f'No deditaced collection for {ent_type}, using default for {len(entities)}')
-                    setattr(self, ent_type, ElementCollection(self, entities))
-                else:
-                    # yep, stick a collection there
-                    log.debug(f'Have a dedicated collection {dedicatedCollection} for {ent_type}--sending {len(entities)} over')
-                    setattr(self, ent_type, dedicatedCollection(self, entities))
+            self._setEntities(ent_type, v, stats)
         
         # finally, any dedicated collection may have a new() method associated, 
         # so even if none of these are present, will create an empty collection
-        for ent_type, coll_type in self.dedicated_collections_by_type().items():
-            if ent_type in bytype:
-                # already handled, skiddaddle
-                continue 
+        with stats.phase('collections'):
+            for ent_type, coll_type in self.dedicated_collections_by_type().items():
+                if ent_type in bytype or not self.loads_entity_type(ent_type):
+                    # already handled, or not wanted, skiddaddle
+                    continue 
+                
+                setattr(self, ent_type, coll_type(self, []))
+    
+    def _sourceIndent(self):
+        try:
+            return reader.source_indent(self._filepath)
+        except (OSError, TypeError):
+            return None
+    
+    def _countEntities(self, stats:Stats):
+        for level in self.tree:
+            if isinstance(level, list) and len(level):
+                stats.count_type(ParsedValue.toString(level[0]), 1, count_nodes(level))
+                stats.count('entities')
+                if not self.loads_entity_type(ParsedValue.toString(level[0])):
+                    stats.count('entities_skipped')
+        stats.count('nodes', sum(c['nodes'] for c in stats.entity_types.values()))
+        
+    
+    def _setEntities(self, ent_type:str, v:list, stats=None):
+        '''
+            Wrap the top level ParsedValues v, all of ent_type, and set 
+            them as an attribute (element or collection) of that name.
+        '''
+        if ent_type is None:
+            return 
+        
+        # no matter what, we'll have and attrib called this
+        if ent_type not in self._added_attribs:
+            self._added_attribs.append(ent_type)
+        
+        if ent_type not in self._dedicatedWrappers:
+            # never seen this type, check for dedicated wrapper
+            self._dedicatedWrappers[ent_type] = self.dedicated_wrapper_type_for(ent_type)
+        
+        if stats is None:
+            stats = self._NoStats
+        
+        # if we have a wrapper for this type
+        # wrap all the entities with it and replace  
+        entities = []   
+        if self._dedicatedWrappers[ent_type] is None:
+            # no wrappers, just the same ol' list as-is
+            entities = v 
+        else:
+            wrapClass = self._dedicatedWrappers[ent_type]
+            if len(v):
+                with stats.phase('wrap', ent_type):
+                    entities = list(map(lambda baseobj: wrapClass(baseobj), v))
+        
+        with stats.phase('collections'):
+            self._setCollection(ent_type, entities)
+    
+    def _setCollection(self, ent_type:str, entities:list):
+        # this can lead to surprises (eg sheet, which may be single or multiple) 
+        # but makes life simpler in most cases
+        dedicatedCollection = self.dedicated_collection_type_for(ent_type)
+        if len(entities) == 1: 
+            if dedicatedCollection is None:
+                setattr(self, ent_type, entities[0]) 
+            else:
+                setattr(self, ent_type, dedicatedCollection(self, entities))
+        elif len(entities) > 1:
+            # multiple entities, may want a special collection
+            dedicatedCollection = self.dedicated_collection_type_for(ent_type)
             
-            setattr(self, ent_type, coll_type(self, []))
+            if dedicatedCollection is None:
+                # nope, just have a list
+                log.debug(f'No deditaced collection for {ent_type}, using default for {len(entities)}')
+                setattr(self, ent_type, ElementCollection(self, entities))
+            else:
+                # yep, stick a collection there
+                log.debug(f'Have a dedicated collection {dedicatedCollection} for {ent_type}--sending {len(entities)} over')
+                setattr(self, ent_type, dedicatedCollection(self, entities))
         
     
     def write(self, fpath:str):
@@ -237,7 +475,14 @@ class SourceFile:
         if not self.will_write(fpath):
             log.info(f"Write to '{fpath}' aborted")
             return
-        writeTree(fpath, self.tree)
+        stats = self._startStats('write', fpath)
+        with stats.phase('compact'):
+            self.compact()
+        with stats.phase('serialize'):
+            writeTree(fpath, self.tree, self._spans, stats, self._indent)
+        if stats.enabled:
+            stats.count('bytes', os.path.getsize(fpath))
+        self._endStats(stats)
         log.info(f"Wrote tree to {fpath}")
         
     
@@ -267,11 +512,107 @@ class SourceFile:
             
         return wrapped
 
+    def _entityWillChange(self, pv:ParsedValue, top:ParsedValue, changed:list):
+        '''
+            Called by ParsedValue pv, part of top level element top,
+            right before it changes list changed in place.
+            For overriding in subclasses.
+        '''
+        return
+
+    def _entityModified(self, raw:list):
+        '''
+            Called by ParsedValues when top level element raw 
+            was changed, so it's re-serialized on write rather than 
+            copied over from the source
+        '''
+        if self._spans is not None:
+            self._spans.modified(raw)
+        self._noteChange(raw)
+    
+    def _noteChange(self, raw:list):
+        self._changes.append(raw)
+        if len(self._changes) > self.ChangeLogSize:
+            self._changesBase += len(self._changes)
+            self._changes = []
+    
+    @property 
+    def change_generation(self):
+        '''
+            Counter bumped on every modification (or deletion) within 
+            a top level entity
+        '''
+        return self._changesBase + len(self._changes)
+    
+    def changes_since(self, generation:int):
+        '''
+            The raw top level entities modified since change_generation 
+            was generation, oldest first (and maybe repeated), or 
+            None if that's too far back to know.
+        '''
+        if generation < self._changesBase:
+            return None
+        return self._changes[generation - self._changesBase:]
+        
+    def _entityDeleted(self, pv:ParsedValue, top:ParsedValue):
+        '''
+            Called by ParsedValues on delete(), with the top 
+            level element they're part of.
+        '''
+        raw_list = pv.raw_parent
+        self._tombstones[id(raw_list)] = (raw_list, pv.parent)
+        if top is not pv:
+            self._entityModified(top.raw)
+        else:
+            self._noteChange(pv.raw)
+    
+    def _entityAdded(self, pv:ParsedValue):
+        '''
+            Called with top level elements added to the tree 
+            after reading it (clones, new_from_list), so they're 
+            kept track of like the rest
+        '''
+        self._all.setdefault(pv.entity_type, []).append(pv)
+    
+    def compact(self):
+        '''
+            Clear out the tombstones deleted elements left in the tree.
+            
+            Only lists that actually had deletions are visited, 
+            each rebuilt in one pass.  Happens automatically on write.
+        '''
+        for raw_list, owner in self._tombstones.values():
+            if owner is self:
+                nodes = itertools.chain.from_iterable(self._all.values())
+            elif isinstance(owner, ParsedValue) and owner.is_materialized:
+                nodes = owner.children 
+            else:
+                nodes = []
+            compactTombstones(raw_list, nodes)
+        
+        self._tombstones = dict()
+        
+    def memory_report(self):
+        '''
+            Where the memory goes: bytes and object counts for the 
+            raw tree, ParsedValue nodes, wrappers and collections, 
+            by top level entity type.
+            
+              print(pcb.memory_report())
+            
+            @return: a skip.sexp.memory.MemoryReport
+            @note: walks everything, so takes a while on large files
+        '''
+        from skip.sexp.memory import memory_report
+        return memory_report(self)
+        
     def new_from_list(self, p:list):
         coord = len(self.tree)
         deep_cpy = copy.deepcopy(p)
         self.tree.append(deep_cpy)
-        return ParsedValue(self.tree, deep_cpy, [coord], self)
+        pv = ParsedValue(self.tree, deep_cpy, self.tree, coord, self)
+        self._entityAdded(pv)
+        return pv
         
     
     def __repr__(self):
@@ -0,0 +1,178 @@
+'''
+Where the time goes when reading and writing source files.
+
+Off by default.  Turn it on for all source files, or just one
+
+    SourceFile.CollectStats = True
+    sch = skip.Schematic('big.kicad_sch')
+    print(sch.stats['read'])
+
+    sch.write('out.kicad_sch')
+    print(sch.stats['write'])
+
+or have every read/write handed over as it's done
+
+    SourceFile.StatsHook = lambda st: log.info(st.as_dict())
+
+Each Stats has the wall time of each phase, in order, and counters: per
+top level entity type, how many there are, how many nodes (expressions)
+they hold and how long wrapping them took, as well as a few totals.
+
+Reads go through phases
+    parse: reading and tokenizing the file (or getting it from the ParseCache)
+    count: counting nodes per entity type (only done when collecting stats)
+    nodes: creating the top level ParsedValues
+    wrap: wrapping those (Symbol, FootprintWrapper...)
+    collections: putting them in collections
+and writes through
+    compact: clearing out deleted elements
+    serialize: writing the tree out
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import time
+
+class _Phase:
+    __slots__ = ('_stats', '_name', '_entity_type', '_start')
+    def __init__(self, stats, name:str, entity_type:str=None):
+        self._stats = stats
+        self._name = name
+        self._entity_type = entity_type
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self._start
+        self._stats.add_time(self._name, elapsed)
+        if self._entity_type is not None:
+            counters = self._stats.type_counters(self._entity_type)
+            key = f'{self._name}_seconds'
+            counters[key] = counters.get(key, 0.0) + elapsed
+        return False
+
+class _NoPhase:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+class NoStats:
+    '''
+        Stand-in when stats are off: same interface, does nothing.
+    '''
+    _phase = _NoPhase()
+    enabled = False
+
+    def phase(self, name:str, entity_type:str=None):
+        return self._phase
+
+    def add_time(self, name:str, seconds:float):
+        pass
+
+    def count(self, name:str, amount:int=1):
+        pass
+
+    def count_type(self, entity_type:str, entities:int, nodes:int=0):
+        pass
+
+class Stats:
+    '''
+        Timings and counters for one read or write.
+
+          operation: 'read' or 'write'
+          filepath: the file read/written
+          phases: dict of phase name: seconds, in the order they ran
+          counts: dict of counter name: value
+          entity_types: dict of top level entity type:
+                        {'entities': N, 'nodes': M, 'wrap_seconds': S}
+    '''
+    enabled = True
+
+    def __init__(self, operation:str, filepath:str):
+        self.operation = operation
+        self.filepath = filepath
+        self.phases = dict()
+        self.counts = dict()
+        self.entity_types = dict()
+
+    def phase(self, name:str, entity_type:str=None):
+        '''
+            Context manager, times what's done within as phase name
+            (adding up, if the phase is entered more than once)
+
+            @param entity_type: also add the time to this entity type's
+            NAME_seconds counter
+        '''
+        return _Phase(self, name, entity_type)
+
+    def add_time(self, name:str, seconds:float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name:str, amount:int=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def type_counters(self, entity_type:str):
+        counters = self.entity_types.get(entity_type)
+        if counters is None:
+            counters = {'entities': 0, 'nodes': 0, 'wrap_seconds': 0.0}
+            self.entity_types[entity_type] = counters
+        return counters
+
+    def count_type(self, entity_type:str, entities:int, nodes:int=0):
+        counters = self.type_counters(entity_type)
+        counters['entities'] += entities
+        counters['nodes'] += nodes
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def as_dict(self):
+        return {
+            'operation': self.operation,
+            'filepath': self.filepath,
+            'total': self.total,
+            'phases': dict(self.phases),
+            'counts': dict(self.counts),
+            'entity_types': dict((k, dict(v)) for k, v in self.entity_types.items()),
+        }
+
+    def __str__(self):
+        lines = [f'{self.operation} {self.filepath}: {self.total:.4f}s']
+        for name, secs in self.phases.items():
+            lines.append(f'  {name:20s} {secs:9.4f}s')
+        for name, val in self.counts.items():
+            lines.append(f'  {name:20s} {val:9d}')
+        byNodes = sorted(self.entity_types.items(), key=lambda kv: kv[1]['nodes'], reverse=True)
+        for ent_type, counters in byNodes:
+            lines.append(f"  {ent_type:20s} {counters['entities']:9d} entities {counters['nodes']:10d} nodes "
+                         f"{counters['wrap_seconds']:9.4f}s wrapping")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"<Stats {self.operation} '{self.filepath}' {self.total:.4f}s>"
+
+def count_nodes(tree):
+    '''
+        Number of expressions (lists) in tree, itself included
+    '''
+    if not isinstance(tree, list):
+        return 0
+    count = 0
+    stack = [tree]
+    while len(stack):
+        node = stack.pop()
+        count += 1
+        for entry in node:
+            if type(entry) is list:
+                stack.append(entry)
+    return count
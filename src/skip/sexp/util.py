@@ -4,72 +4,134 @@ Created on Jan 29, 2024
 @author: Pat Deegan
 @copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
 '''
-import sexpdata
-import re
+import mmap
+import os
+import shutil
+import tempfile
+from skip.sexp import reader
+from skip.sexp.writer import TreeWriter
+from skip.sexp.stats import NoStats
 import logging 
 log = logging.getLogger(__name__)
-MaxLineLength = 255*3
-def loadTree(fpath:str):
-    with open(fpath, 'r') as f:
-        return sexpdata.loads(f.read())
+def loadTree(fpath:str, with_spans:bool=False, memory_mapped:bool=False, workers:int=None):
+    '''
+        Load the tree from fpath.
+        @param with_spans: return (tree, reader.SourceSpans) for use with writeTree 
+        @param memory_mapped: parse straight from a mapping of the file, see reader.load
+        @param workers: processes to parse with, see reader.loads_with_spans
+    '''
+    return reader.load(fpath, with_spans, memory_mapped, workers)
 
-def writeTree(fpath:str, tree):
-    remove_nones(tree)
-    with open(fpath, 'w') as f:
-        # no way to pretty print this what the fuck?
-        # lines get too long with some schems, when it's all 
-        # clumped into a bunch
-        as_str = sexpdata.dumps(tree)
-        for elname in ['property', 'symbol', 'wire', 'data', 'label', 
-                       'global_label', 'text', 'junction', 'polyline', 'rectangle', 'xy']:
-            as_str = re.sub(f'\(\s*{elname}', f'\n\n({elname}', as_str)
-            
-        out_lines = []
-        for aline in as_str.split('\n'):
-            if len(aline) > MaxLineLength and aline.startswith('(data'):
-                aline = re.sub(' ', ' \n', aline)
-            out_lines.append(aline)
-                
-        f.write('\n'.join(out_lines))
-    
-def list_splice(target, start, delete_count=None, *items):
-    """Remove existing elements and/or add new elements to a list.
-
-    target        the target list (will be changed)
-    start         index of starting position
-    delete_count  number of items to remove (default: len(target) - start)
-    *items        items to insert at start index
-
-    Returns a new list of removed items (or an empty list)
-    https://gist.github.com/jonbeebe/44a529fcf15d6bda118fe3cfa434edf3
-    """
-    if delete_count == None:
-        delete_count = len(target) - start
+_NoStats = NoStats()
 
-    # store removed range in a separate list and replace with *items
-    total = start + delete_count
-    removed = target[start:total]
-    target[start:total] = items
-
-    return removed
+def writeTree(fpath:str, tree, spans:reader.SourceSpans=None, stats=None, indent:bytes=None):
+    '''
+        Write tree out to fpath.
+        
+        @param spans: where the top level entities were in the 
+        original source, if available.  Any chunk of the source whose 
+        entities are all still there, in order, and untouched is copied 
+        verbatim and only the rest gets serialized, so a small edit 
+        to a huge board is a quick save and a small diff.
+        
+        @note: tombstones (None) left by deletions are skipped
+        @note: when the source is memory mapped, the output goes to a 
+        temporary file that then replaces fpath, as fpath may well be 
+        the mapped file
+        @param stats: a skip.sexp.stats.Stats, to count chunks copied 
+        and entities serialized
+        @param indent: one level of indentation, for when there are 
+        no spans to say what the source used (defaults to a tab)
+    '''
+    if stats is None:
+        stats = _NoStats
+    if spans is None or not isinstance(spans.buffer, mmap.mmap):
+        with open(fpath, 'wb') as f:
+            _writeTo(f, tree, spans, stats, indent)
+        return 
     
+    fdir, fname = os.path.split(os.path.abspath(fpath))
+    fd, tmppath = tempfile.mkstemp(prefix=f'.{fname}.', suffix='.tmp', dir=fdir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            _writeTo(f, tree, spans, stats)
+        if os.path.exists(fpath):
+            shutil.copymode(fpath, tmppath)
+        os.replace(tmppath, fpath)
+    except:
+        os.unlink(tmppath)
+        raise
     
-def remove_nones(alist):
+def _writeTo(f, tree, spans:reader.SourceSpans=None, stats=_NoStats, indent:bytes=None):
+    if spans is None:
+        out = TreeWriter(f, indent.decode('utf-8') if indent else '\t')
+        out.write(tree)
+        out.write_raw(b'\n')
+        stats.count('entities_serialized', len(tree))
+    else:
+        out = TreeWriter(f, spans.indent.decode('utf-8'))
+        _writeIncremental(out, tree, spans, stats)
+    out.flush()
     
-    targets = []
-    for i in range(len(alist)):
-        el = alist[i]
-        if el is None:
-            targets.append(i)
-        elif isinstance(el, list):
-            remove_nones(el)
-            
-    if not len(targets):
-        #print("No targets here")
-        return 
-    for killme in sorted(targets, reverse=True):
-        #print(f"KILLING {alist[killme]}")
-        list_splice(alist, killme, 1)
+def _writeIncremental(out:TreeWriter, tree, spans:reader.SourceSpans, stats=_NoStats):
+    # where every original entity is, by chunk
+    chunk_of = dict()
+    for cidx in range(len(spans)):
+        first, last = spans.entries(cidx)
+        for i in range(first, last):
+            chunk_of[id(spans.entities[i])] = cidx
+    
+    i = 0
+    if not _chunkIntact(tree, 0, 0, spans):
+        # root expression's head got messed with
+        out.write_raw(b'(')
+        out.write(tree[0])
+        i = 1
         
-    return
+    while i < len(tree):
+        entry = tree[i]
+        cidx = chunk_of.get(id(entry))
+        if cidx is not None and spans.entities[spans.firsts[cidx]] is entry and \
+                _chunkIntact(tree, i, cidx, spans):
+            first, last = spans.entries(cidx)
+            out.write_raw(spans.text(cidx))
+            stats.count('chunks_copied')
+            i += last - first 
+            continue 
+        
+        if entry is None:
+            pass # tombstone
+        elif isinstance(entry, list):
+            out.write_entity(entry, 1)
+            stats.count('entities_serialized')
+        else:
+            out.write_raw(b' ')
+            out.write(entry)
+        i += 1
+    
+    out.write_raw(spans.tail)
     
+def _chunkIntact(tree, at_idx:int, cidx:int, spans:reader.SourceSpans):
+    first, last = spans.entries(cidx)
+    if at_idx + (last - first) > len(tree):
+        return False 
+    dirty = spans.dirty
+    for i in range(first, last):
+        entry = spans.entities[i]
+        if tree[at_idx + i - first] is not entry or id(entry) in dirty:
+            return False 
+    return True
+    
+def remove_nones(alist):
+    '''
+        Strip the tombstones (None) out of alist, recursively, 
+        rebuilding each list in a single pass.
+        
+        @note: this visits everything, SourceFile.compact() only 
+        looks at lists that had deletions.
+    '''
+    if any(el is None for el in alist):
+        alist[:] = [el for el in alist if el is not None]
+    for el in alist:
+        if isinstance(el, list):
+            remove_nones(el)
@@ -0,0 +1,241 @@
+'''
+A serializer for trees of the kicad flavour of s-expressions, the
+counterpart to reader.
+
+It walks the tree once, writing the result out in chunks as it goes,
+and lays things out the way kicad (8+) does it:
+
+  * an expression that only holds atoms stays on a single line
+    (at 10.16 25.4 90)
+  * otherwise, its leading atoms stay on the first line and every
+    sub-expression, as well as any atom that follows one, goes on a line
+    of its own, one level deeper, with the closing paren on its own line
+    (property "Reference" "R1"
+        (at 10.16 25.4 90)
+        (effects
+            (font
+                (size 1.27 1.27)
+            )
+            hide
+        )
+    )
+  * except for runs of point lists, (xy 1 2) (xy 3 4) ..., which are
+    packed on as few lines as will fit
+
+Indentation is a tab per level by default, TreeWriter takes whatever
+the source used (kicad 7 files have two spaces), the layout is kicad 8's
+regardless.
+
+Floats are written without exponents.  They keep their decimal point 
+even when integral (100.0), so they read back as floats: only ints are 
+written as 100.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import re
+import sexpdata
+from sexpdata import Symbol, String
+from skip.sexp.reader import LazyAtom
+
+import logging
+log = logging.getLogger(__name__)
+
+# entities packed, one after the other, on lines of up to MaxLineLength
+PackedEntities = ['xy']
+MaxLineLength = 99
+
+# the text for atoms this short is cached, for the many repeats
+MaxCachedAtomLength = 24
+
+StringSpecialsRegex = re.compile(r'[\\"\b\f\n\r\t]')
+# kicad only cares about things that would split or end the symbol.
+# Same as sexpdata: there's no reading back other whitespace in a symbol
+# (reader.SymbolEscapes), so it isn't escaped either
+SymbolQuotedSpecials = [('\\', '\\\\'), ('"', '\\"'), ('(', '\\('), (')', '\\)'), (' ', '\\ ')]
+SymbolSpecialsRegex = re.compile('|'.join(re.escape(raw) for (raw, _q) in SymbolQuotedSpecials))
+
+def formatFloat(v:float) -> str:
+    s = repr(v)
+    if 'e' in s:
+        if 'n' in s: # inf, nan
+            return s
+        # no exponents, but all the digits
+        import decimal
+        s = format(decimal.Decimal(s), 'f')
+        if '.' not in s:
+            s = f'{s}.0'
+    if s == '-0.0':
+        s = '0.0'
+    return s
+
+def formatString(v:str) -> str:
+    if StringSpecialsRegex.search(v) is not None:
+        v = String.quote(v)
+    return f'"{v}"'
+
+def formatSymbol(v:Symbol) -> str:
+    s = str.__str__(v)
+    if SymbolSpecialsRegex.search(s) is not None:
+        for (raw, quoted) in SymbolQuotedSpecials:
+            s = s.replace(raw, quoted)
+    return s
+
+def formatAtom(v) -> str:
+    t = type(v)
+    if t is Symbol:
+        return formatSymbol(v)
+    if t is str:
+        return formatString(v)
+    if t is int:
+        return str(v)
+    if t is float:
+        return formatFloat(v)
+    if t is LazyAtom:
+        # never decoded, it's still just as it was in the source
+        return v.token.decode('utf-8')
+    # bools, sexpdata's own types and whatever else ended up in there
+    return sexpdata.dumps(v)
+
+
+class TreeWriter:
+    '''
+        Serializes trees to a binary file handle.
+
+        Output is accumulated and handed over to the file every
+        ChunkSize pieces, so memory use is flat whatever the size
+        of the tree.
+    '''
+    ChunkSize = 8192
+
+    def __init__(self, out, indent:str='\t'):
+        self._out = out
+        self._indent = indent
+        self._parts = []
+        self._newlines = []
+        self._atoms = dict()
+        self._packed = set(Symbol(e) for e in PackedEntities)
+
+    def write(self, tree, depth:int=0):
+        '''
+            Write expression tree, assuming we're already at the
+            right place on the line, with depth levels of indentation
+        '''
+        if isinstance(tree, list):
+            self._expression(tree, depth)
+        else:
+            self._parts.append(self._atom(tree))
+
+    def write_entity(self, tree, depth:int=1):
+        '''
+            Write expression tree on a new line, at depth
+        '''
+        self._parts.append(self._newline(depth))
+        self.write(tree, depth)
+
+    def write_raw(self, buf:bytes):
+        '''
+            Pass buf straight through, e.g. for verbatim chunks of source
+        '''
+        self.flush()
+        self._out.write(buf)
+
+    def flush(self):
+        if len(self._parts):
+            self._out.write(''.join(self._parts).encode('utf-8'))
+            # in place, the expression being written holds on to it
+            self._parts.clear()
+
+    def _newline(self, depth:int):
+        nls = self._newlines
+        while len(nls) <= depth:
+            nls.append('\n' + self._indent*len(nls))
+        return nls[depth]
+
+    def _atom(self, v):
+        t = type(v)
+        if t is int:
+            return str(v)
+        if t is float:
+            return formatFloat(v)
+        if t is Symbol or t is str:
+            # Symbol('a') != 'a', so they can share a cache
+            s = self._atoms.get(v)
+            if s is None:
+                s = formatAtom(v)
+                if len(v) <= MaxCachedAtomLength:
+                    self._atoms[v] = s
+            return s
+        return formatAtom(v)
+
+    def _inline(self, tree:list):
+        # single line version of tree, None if it holds sub-expressions
+        atom = self._atom
+        atoms = []
+        for v in tree:
+            if v is None:
+                continue
+            if type(v) is list:
+                return None
+            atoms.append(atom(v))
+        return f"({' '.join(atoms)})"
+
+    def _expression(self, tree:list, depth:int):
+        parts = self._parts
+        inline = self._inline(tree)
+        if inline is not None:
+            parts.append(inline)
+            return
+
+        atom = self._atom
+        packed = self._packed
+        subdepth = depth + 1
+        nl = self._newline(subdepth)
+        line_len = 0 # only tracked along runs of packed entities
+        packing = False
+        parts.append('(')
+        first = True
+        nested = False # past the first sub-expression
+        for v in tree:
+            if v is None:
+                continue
+            if type(v) is not list:
+                if nested:
+                    parts.append(nl)
+                elif not first:
+                    parts.append(' ')
+                parts.append(atom(v))
+                first = False
+                packing = False
+                continue
+
+            first = False
+            nested = True
+            sub = self._inline(v)
+            if sub is None:
+                parts.append(nl)
+                self._expression(v, subdepth)
+                packing = False
+                continue
+
+            if len(v) and v[0] in packed:
+                if packing and line_len + 1 + len(sub) <= MaxLineLength:
+                    parts.append(' ')
+                    parts.append(sub)
+                    line_len += 1 + len(sub)
+                    continue
+                packing = True
+                line_len = len(nl) - 1 + len(sub)
+            else:
+                packing = False
+            parts.append(nl)
+            parts.append(sub)
+
+        parts.append(self._newline(depth))
+        parts.append(')')
+        if len(parts) > self.ChunkSize:
+            self.flush()
+
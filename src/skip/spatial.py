@@ -0,0 +1,279 @@
+'''
+Spatial index for the position queries on collections (within_circle,
+within_rectangle...).
+
+Elements' points go into the cells of a uniform grid, sized so there
+are only a few per cell, and queries only look at the elements in the
+cells they overlap rather than at every one of them.  Nearest neighbour
+searches go around the query point's cell, ring by ring, until nothing
+further out could be any closer.
+
+The index is built on first use and kept in sync on each query: elements
+appended since are added, and elements whose top level entity was
+modified since (moved, translated, anything) are re-indexed, using the
+change log of the source file they're from.  Collections holding
+elements that can't be tracked that way don't get an index.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import heapq
+import math
+
+from skip.sexp.parser import ParsedValue
+
+import logging
+log = logging.getLogger(__name__)
+
+class GridIndex:
+    '''
+        Uniform grid over the points of a list of elements.
+
+        @param elements: the (live) list of elements, which may grow
+        @param points_for: callable(element) returning a list of
+        [x, y, ...] coordinates for the element (empty if it has none)
+    '''
+
+    # average number of points per cell we aim for
+    PointsPerCell = 4
+    
+    # queries are widened by this, so float rounding can't leave out 
+    # points sitting right on their edges (callers check the exact criterion)
+    EdgePadding = 1e-6
+
+    def __init__(self, elements:list, points_for):
+        self._elements = elements
+        self._points_for = points_for
+        self.tracked = True
+        self.builds = 0
+        self._build()
+
+    def _build(self):
+        self.builds += 1
+        self._count = 0
+        self._points = []
+        self._keys = []
+        self._tops = dict() # id(top level raw) -> [element idx]
+        self._sources = dict() # id(source) -> [source, generation]
+        self._cells = dict()
+        self._bounds = None # occupied cells, [ixmin, iymin, ixmax, iymax]
+
+        allPoints = []
+        for el in self._elements:
+            allPoints.append(self._pointsOf(el))
+
+        xs = [p[0] for pts in allPoints for p in pts]
+        ys = [p[1] for pts in allPoints for p in pts]
+        self._cell = 1.0
+        if len(xs):
+            width = max(max(xs) - min(xs), 1e-6)
+            height = max(max(ys) - min(ys), 1e-6)
+            self._cell = math.sqrt(width * height * self.PointsPerCell / len(xs))
+            # very elongated sets (everything on a line)
+            self._cell = max(self._cell, max(width, height) * self.PointsPerCell / len(xs))
+
+        for pts in allPoints:
+            self._add(pts)
+
+    def _pointsOf(self, el):
+        pts = []
+        for coords in self._points_for(el):
+            if coords is not None and len(coords) > 1:
+                pts.append((coords[0], coords[1]))
+        return pts
+
+    def _track(self, idx:int, el):
+        pv = el if isinstance(el, ParsedValue) else getattr(el, 'wrapped_parsed_value', None)
+        if not isinstance(pv, ParsedValue):
+            self.tracked = False
+            return
+        top, holder = pv._topLevel()
+        if holder is None or not hasattr(holder, 'changes_since'):
+            self.tracked = False
+            return
+        self._tops.setdefault(id(top.raw), []).append(idx)
+        if id(holder) not in self._sources:
+            self._sources[id(holder)] = [holder, holder.change_generation]
+
+    def _add(self, pts:list):
+        idx = self._count
+        self._count += 1
+        self._track(idx, self._elements[idx])
+        self._points.append(pts)
+        self._keys.append(self._insert(idx, pts))
+
+    def _insert(self, idx:int, pts:list):
+        keys = []
+        cell = self._cell
+        cells = self._cells
+        for (x, y) in pts:
+            key = (math.floor(x / cell), math.floor(y / cell))
+            if key in keys:
+                continue
+            keys.append(key)
+            self._extend(key)
+            if key in cells:
+                cells[key].append(idx)
+            else:
+                cells[key] = [idx]
+        return keys
+
+    def _extend(self, key:tuple):
+        b = self._bounds
+        if b is None:
+            self._bounds = [key[0], key[1], key[0], key[1]]
+            return
+        b[0] = min(b[0], key[0])
+        b[1] = min(b[1], key[1])
+        b[2] = max(b[2], key[0])
+        b[3] = max(b[3], key[1])
+
+    def _reindex(self, idx:int):
+        for key in self._keys[idx]:
+            bucket = self._cells[key]
+            bucket.remove(idx)
+            if not len(bucket):
+                del self._cells[key]
+        pts = self._pointsOf(self._elements[idx])
+        self._points[idx] = pts
+        self._keys[idx] = self._insert(idx, pts)
+
+    def sync(self):
+        '''
+            Catch up with appends and modifications.
+
+            @return: whether the index can be used
+        '''
+        if len(self._elements) < self._count:
+            # things got taken out from under us
+            self._build()
+        while self._count < len(self._elements):
+            self._add(self._pointsOf(self._elements[self._count]))
+
+        if not self.tracked:
+            return False
+
+        for entry in self._sources.values():
+            (source, generation) = entry
+            if source.change_generation == generation:
+                continue
+            changed = source.changes_since(generation)
+            if changed is None:
+                # too much happened, start over
+                self._build()
+                return self.tracked
+            entry[1] = source.change_generation
+            done = set()
+            for raw in changed:
+                if id(raw) in done:
+                    continue
+                done.add(id(raw))
+                for idx in self._tops.get(id(raw), []):
+                    self._reindex(idx)
+        return True
+
+    def within(self, x1:float, y1:float, x2:float, y2:float):
+        '''
+            Elements with a point inside the (x1,y1)-(x2,y2) box,
+            where x1 <= x2, y1 <= y2 -- possibly others too, close by
+            (callers check the exact criterion) -- in collection order.
+        '''
+        # a hair wider, so rounding can't lose anything right on the edge
+        pad = self.EdgePadding
+        x1, y1, x2, y2 = x1 - pad, y1 - pad, x2 + pad, y2 + pad
+        cell = self._cell
+        ix1, ix2 = math.floor(x1 / cell), math.floor(x2 / cell)
+        iy1, iy2 = math.floor(y1 / cell), math.floor(y2 / cell)
+        cells = self._cells
+        found = set()
+        if (ix2 - ix1 + 1) * (iy2 - iy1 + 1) > len(cells):
+            # huge area, going through the occupied cells is quicker
+            for ((ix, iy), bucket) in cells.items():
+                if ix1 <= ix <= ix2 and iy1 <= iy <= iy2:
+                    found.update(bucket)
+        else:
+            for ix in range(ix1, ix2 + 1):
+                for iy in range(iy1, iy2 + 1):
+                    bucket = cells.get((ix, iy))
+                    if bucket is not None:
+                        found.update(bucket)
+        els = self._elements
+        return [els[i] for i in sorted(found)]
+
+    def _distance(self, idx:int, x:float, y:float):
+        best = None
+        for (px, py) in self._points[idx]:
+            dx = px - x
+            dy = py - y
+            d = math.sqrt((dx*dx)+(dy*dy))
+            if best is None or d < best:
+                best = d
+        return best
+
+    def _ring(self, ix0:int, iy0:int, r:int):
+        if r == 0:
+            return [(ix0, iy0)]
+        keys = []
+        for ix in range(ix0 - r, ix0 + r + 1):
+            keys.append((ix, iy0 - r))
+            keys.append((ix, iy0 + r))
+        for iy in range(iy0 - r + 1, iy0 + r):
+            keys.append((ix0 - r, iy))
+            keys.append((ix0 + r, iy))
+        return keys
+
+    def nearest(self, x:float, y:float, k:int=1, max_distance:float=None):
+        '''
+            The k elements closest to (x,y) -- distance being that of
+            their closest point -- no further than max_distance, if set.
+
+            @return: list of (distance, element), closest first (ties
+            in collection order)
+        '''
+        if self._bounds is None or k < 1:
+            return []
+        cell = self._cell
+        ix0, iy0 = math.floor(x / cell), math.floor(y / cell)
+        (bx1, by1, bx2, by2) = self._bounds
+        # everything's at least this many rings out
+        r = max(0, bx1 - ix0, ix0 - bx2, by1 - iy0, iy0 - by2)
+        # and nothing's further than this
+        rmax = max(abs(bx1 - ix0), abs(bx2 - ix0), abs(by1 - iy0), abs(by2 - iy0))
+
+        best = [] # heap of (-distance, -idx), the worst of the k best on top
+        seen = set()
+        cells = self._cells
+        while r <= rmax:
+            # anything in ring r is more than this far
+            floor_distance = (r - 1) * cell
+            if len(best) >= k and floor_distance > -best[0][0]:
+                break
+            if max_distance is not None and floor_distance > max_distance:
+                break
+            if 8 * r > len(cells):
+                # rings bigger than what there is, may as well look at it all
+                candidates = range(self._count)
+                r = rmax
+            else:
+                candidates = []
+                for key in self._ring(ix0, iy0, r):
+                    bucket = cells.get(key)
+                    if bucket is not None:
+                        candidates.extend(bucket)
+            for idx in candidates:
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                d = self._distance(idx, x, y)
+                if d is None or (max_distance is not None and d > max_distance):
+                    continue
+                heapq.heappush(best, (-d, -idx))
+                if len(best) > k:
+                    heapq.heappop(best)
+            r += 1
+
+        els = self._elements
+        return [(d, els[idx]) for (d, idx) in sorted((-nd, -nidx) for (nd, nidx) in best)]
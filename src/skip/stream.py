@@ -0,0 +1,51 @@
+'''
+Streaming access to kicad source files, for when all you need is one
+pass over their contents, e.g. audits over piles of archived boards:
+
+    import skip
+    for fp in skip.iter_entities('board.kicad_pcb', types=['footprint']):
+        print(fp.Reference.value)
+
+Entities are yielded one at a time, wrapped as they'd be on a full
+load, and dropped once you're done with them.
+
+
+Created on Oct 17, 2026
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import importlib
+
+from skip.sexp.sourcefile import SourceFile
+
+import logging
+log = logging.getLogger(__name__)
+
+# (module, class) for each type of file, imported when first needed
+SourceTypesByExtension = {
+    '.kicad_sch': ('skip.eeschema.schematic', 'Schematic'),
+    '.kicad_pcb': ('skip.pcbnew.pcb', 'PCB')
+}
+
+def source_type_for(filepath:str):
+    '''
+        Schematic, PCB or, for anything else, plain SourceFile
+    '''
+    for ext, (modName, clsName) in SourceTypesByExtension.items():
+        if filepath.endswith(ext):
+            return getattr(importlib.import_module(modName), clsName)
+    return SourceFile
+
+def iter_entities(filepath:str, types:list=None):
+    '''
+        Yield the top level entities of filepath (optionally only
+        those of the listed types) one by one, without ever loading
+        the whole thing.
+
+        @param filepath: path/to/source.kicad_sch (or .kicad_pcb)
+        @param types: entity types of interest, e.g. ['via', 'segment']
+
+        @see: SourceFile.iter_entities
+    '''
+    return source_type_for(filepath).iter_entities(filepath, types)
@@ -0,0 +1,52 @@
+'''
+Shared fixtures: small kicad 7 schematic and PCB sources, in data/,
+plus helpers to compare trees.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import os
+import shutil
+
+import pytest
+from sexpdata import Symbol
+
+DataDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+def data_path(name:str):
+    return os.path.join(DataDir, name)
+
+def same_tree(a, b):
+    '''
+        a and b are the same tree, down to the type of every atom
+        (1 == 1.0 == True, as far as python is concerned)
+    '''
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same_tree(x, y) for (x, y) in zip(a, b))
+    return a == b
+
+def find_entities(tree:list, entity_type:str):
+    '''
+        All the top level entities of entity_type in raw tree
+    '''
+    return [e for e in tree if isinstance(e, list) and len(e) and e[0] == Symbol(entity_type)]
+
+@pytest.fixture
+def demo_sch(tmp_path):
+    '''
+        path to a scratch copy of the demo schematic
+    '''
+    dest = tmp_path / 'demo.kicad_sch'
+    shutil.copy(data_path('demo.kicad_sch'), dest)
+    return str(dest)
+
+@pytest.fixture
+def demo_pcb(tmp_path):
+    '''
+        path to a scratch copy of the demo PCB
+    '''
+    dest = tmp_path / 'demo.kicad_pcb'
+    shutil.copy(data_path('demo.kicad_pcb'), dest)
+    return str(dest)
@@ -0,0 +1,56 @@
+'''
+Loading many files at once, with load_many().
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import pytest
+import skip
+from skip.batch import load_many
+from conftest import same_tree
+
+@pytest.fixture
+def paths(demo_sch, demo_pcb, tmp_path):
+    broken = tmp_path / 'broken.kicad_sch'
+    broken.write_text('(kicad_sch (version 20230121)')
+    return [demo_sch, str(broken), demo_pcb, str(tmp_path / 'missing.kicad_pcb')]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_errors_stay_with_their_file(paths, workers):
+    progress = []
+    results = load_many(paths, workers, progress=lambda done, total, res: progress.append((done, total, res)))
+    assert [r.path for r in results] == paths
+    assert [r.ok for r in results] == [True, False, True, False]
+    assert isinstance(results[0].source, skip.Schematic)
+    assert isinstance(results[2].source, skip.PCB)
+    assert isinstance(results[1].error, ValueError)
+    assert isinstance(results[3].error, OSError)
+    assert all(r.source is None for r in results if not r.ok)
+    assert [(done, total) for (done, total, _res) in progress] == [(i, 4) for i in range(1, 5)]
+    assert sorted(map(lambda p: p[2].path, progress)) == sorted(paths)
+
+def test_pooled_matches_in_process(paths, tmp_path):
+    serial = load_many(paths, 1)
+    pooled = load_many(paths, 2)
+    for (s, p) in zip(serial, pooled):
+        if s.ok:
+            assert type(p.source) is type(s.source)
+            assert same_tree(p.source.tree, s.source.tree)
+    # and writes back untouched, as it was read
+    out = str(tmp_path / 'out.kicad_pcb')
+    pooled[2].source.write(out)
+    with open(out, 'rb') as a, open(paths[2], 'rb') as b:
+        assert a.read() == b.read()
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_include_exclude(demo_sch, demo_pcb, workers):
+    (sch, pcb) = map(lambda r: r.source, load_many([demo_sch, demo_pcb], workers, include=['symbol', 'footprint']))
+    assert len(sch.symbol) == 5 and not hasattr(sch, 'wire')
+    assert len(pcb.footprint) and not hasattr(pcb, 'segment')
+    (sch, pcb) = map(lambda r: r.source, load_many([demo_sch, demo_pcb], workers, exclude=['wire', 'segment']))
+    assert not hasattr(sch, 'wire') and len(sch.symbol) == 5
+    assert not hasattr(pcb, 'segment') and len(pcb.footprint)
+
+@pytest.mark.parametrize('workers', [None, 1, 4])
+def test_no_paths(workers):
+    assert load_many([], workers) == []
@@ -0,0 +1,51 @@
+'''
+The on-disk cache of parsed trees.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import pytest
+import skip
+from skip.sexp import cache
+from skip.sexp.cache import ParseCache
+from skip.sexp.sourcefile import SourceFile
+from conftest import same_tree
+
+@pytest.fixture
+def parse_cache(tmp_path, monkeypatch):
+    pc = ParseCache(str(tmp_path / 'cache'))
+    monkeypatch.setattr(SourceFile, 'ParseCache', pc)
+    return pc
+
+def test_hit_gives_the_same_tree(demo_sch, parse_cache):
+    first = skip.Schematic(demo_sch)
+    second = skip.Schematic(demo_sch)
+    assert (parse_cache.misses, parse_cache.hits) == (1, 1)
+    assert same_tree(first.tree, second.tree)
+
+def test_edited_source_misses(demo_sch, parse_cache):
+    sch = skip.Schematic(demo_sch)
+    sch.symbol[0].property.Reference.value = 'R99'
+    sch.overwrite()
+    assert skip.Schematic(demo_sch).symbol[0].property.Reference.value == 'R99'
+    assert parse_cache.hits == 0
+
+def test_writes_from_cached_tree_are_byte_identical(demo_sch, parse_cache, tmp_path):
+    skip.Schematic(demo_sch)
+    out = str(tmp_path / 'out.kicad_sch')
+    skip.Schematic(demo_sch).write(out)
+    assert parse_cache.hits == 1
+    with open(out, 'rb') as a, open(demo_sch, 'rb') as b:
+        assert a.read() == b.read()
+
+def test_key_depends_on_parsing_code(parse_cache, monkeypatch):
+    key = parse_cache.key_for(b'(kicad_sch)')
+    assert parse_cache.key_for(b'(kicad_sch)') == key
+    # any change to the reader or parser sources
+    monkeypatch.setattr(cache, '_CodeDigest', 'something else')
+    assert parse_cache.key_for(b'(kicad_sch)') != key
+
+def test_key_depends_on_format_version(parse_cache, monkeypatch):
+    key = parse_cache.key_for(b'(kicad_sch)')
+    monkeypatch.setattr(ParseCache, 'FormatVersion', ParseCache.FormatVersion + 1)
+    assert parse_cache.key_for(b'(kicad_sch)') != key
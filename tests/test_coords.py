@@ -0,0 +1,63 @@
+'''
+Positions of whole collections at once, as numpy arrays.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import pytest
+import skip
+from skip.collection import ElementCollection
+
+np = pytest.importorskip('numpy')
+
+def test_symbols_round_trip(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    coords = sch.symbol.coords_array()
+    assert coords.tolist() == [s.at.value[:2] for s in sch.symbol]
+    coords[1:] += [2.54, -1.27]
+    assert sch.symbol.apply_coords(coords) == len(coords) - 1
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    assert skip.Schematic(out).symbol.coords_array().tolist() == np.round(coords, 6).tolist()
+
+def test_wires_use_their_start(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    wires = sch.wire
+    coords = wires.coords_array()
+    assert coords.tolist() == [w.start.value for w in wires]
+    lengths = [w.length for w in wires]
+    ends = [w.end.value for w in wires]
+    assert wires.apply_coords(coords + [10, 20]) == len(wires)
+    assert [w.start.value for w in wires] == np.round(coords + [10, 20], 6).tolist()
+    # the whole wire moved
+    assert [w.end.value for w in wires] == np.round(np.array(ends) + [10, 20], 6).tolist()
+    assert [w.length for w in wires] == pytest.approx(lengths)
+
+def test_segments_use_their_start(demo_pcb):
+    pcb = skip.PCB(demo_pcb)
+    segs = pcb.segment
+    coords = segs.coords_array()
+    assert coords.tolist() == [s.start.value for s in segs]
+    segs.apply_coords(coords + [1, 1])
+    assert [s.start.value for s in segs] == (coords + [1, 1]).tolist()
+
+def test_queries_ignore_starts(demo_pcb):
+    # starts are only positions for bulk geometry: things with extent 
+    # don't get searched by where they happen to start
+    pcb = skip.PCB(demo_pcb)
+    lines = ElementCollection(pcb, [pcb.gr_line])
+    for coll in [pcb.segment, lines]:
+        (x, y) = coll[0].start.value
+        assert coll.within_circle(x, y, 0.1) == []
+        assert coll.within_rectangle(-1000, -1000, 1000, 1000) == []
+        assert coll.nearest(x, y) == []
+    assert lines.coords_array().tolist() == [[0, 0]]
+
+def test_nothing_positioned_raises(demo_pcb):
+    with pytest.raises(ValueError):
+        skip.PCB(demo_pcb).net.coords_array()
+
+def test_wrong_shape_raises(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    with pytest.raises(ValueError):
+        sch.symbol.apply_coords(np.zeros((2, 2)))
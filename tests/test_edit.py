@@ -0,0 +1,96 @@
+'''
+Deleting and modifying elements, and writing only what changed.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import skip
+from conftest import same_tree
+
+def _references(sch):
+    return [s.property.Reference.value for s in sch.symbol]
+
+def test_delete_top_level(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    before = _references(sch)
+    sch.symbol[1].delete()
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    assert _references(skip.Schematic(out)) == before[:1] + before[2:]
+
+def test_delete_nested_then_edit_sibling(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    sym = sch.symbol[0]
+    props = list(sym.property)
+    props[1].delete() # Value
+    sch.compact()
+    # siblings after the deleted one moved up a slot, edits must follow
+    props[2].value = 'edited'
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    reloaded = skip.Schematic(out).symbol[0]
+    assert [p.name for p in reloaded.property] == [p.name for p in props if p is not props[1]]
+    assert reloaded.property[props[2].name].value == 'edited'
+
+def test_compact_only_touches_deletions(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sch.symbol[0].property.Value.delete()
+    sch.symbol[2].delete()
+    tree_len = len(sch.tree)
+    sch.compact()
+    assert len(sch.tree) == tree_len - 1
+    assert None not in sch.tree
+    assert None not in sch.symbol[0].wrapped_parsed_value.raw
+    # nothing left to do the second time around
+    sch.compact()
+    assert len(sch.tree) == tree_len - 1
+
+def test_writes_are_repeatable(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    sch.symbol[3].delete()
+    sch.symbol[0].move(12.7, 25.4)
+    first, second = str(tmp_path / 'a.kicad_sch'), str(tmp_path / 'b.kicad_sch')
+    sch.write(first)
+    sch.write(second)
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+
+def test_only_modified_entities_are_serialized(demo_sch, tmp_path, monkeypatch):
+    monkeypatch.setattr(skip.Schematic, 'CollectStats', True)
+    sch = skip.Schematic(demo_sch)
+    sch.symbol[2].property.Reference.value = 'R42'
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    assert sch.stats['write'].counts['entities_serialized'] == 1
+
+    with open(demo_sch, 'rb') as f:
+        original = f.read()
+    with open(out, 'rb') as f:
+        written = f.read()
+    # everything but that symbol is as it was
+    start = original.index(b'(symbol (lib_id "Device:R") (at 120.32 50 0)')
+    end = original.index(b'(symbol (lib_id "Device:R") (at 130.48 50 0)')
+    assert written.startswith(original[:start])
+    assert written.endswith(original[end:])
+    assert same_tree(skip.Schematic(out).tree, sch.tree)
+
+def test_clone_is_written(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    cpy = sch.symbol[0].clone()
+    cpy.move(200, 200)
+    cpy.setAllReferences('R77')
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    reloaded = skip.Schematic(out)
+    assert 'R77' in _references(reloaded)
+    assert reloaded.symbol.R77.at.value[:2] == [200, 200]
+
+def test_compact_keeps_added_entities_indexed(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    copy = sch.symbol.R4.clone().wrapped_parsed_value
+    wire = sch.wire.new().wrapped_parsed_value
+    sch.symbol[0].delete()
+    sch.compact()
+    for pv in (copy, wire):
+        # straight from the slot kept up to date, no searching around
+        assert sch.tree[pv._index] is pv.raw
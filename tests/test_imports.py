@@ -0,0 +1,29 @@
+'''
+Every public module imports on its own, whatever else was imported first.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import os
+import pkgutil
+import subprocess
+import sys
+
+import pytest
+import skip
+
+def _public_modules():
+    names = ['skip']
+    for info in pkgutil.walk_packages(skip.__path__, 'skip.'):
+        if not any(part.startswith('_') for part in info.name.split('.')):
+            names.append(info.name)
+    return names
+
+@pytest.mark.parametrize('module', _public_modules())
+def test_imports_first(module):
+    # a fresh interpreter each time, so nothing was imported beforehand
+    src = os.path.dirname(os.path.dirname(skip.__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([src, os.environ.get('PYTHONPATH', '')]))
+    res = subprocess.run([sys.executable, '-c', f'import {module}'], env=env, 
+                         capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
@@ -0,0 +1,57 @@
+'''
+Loading only some of the top level entity types.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import pytest
+import skip
+from conftest import find_entities
+
+def _bytes(fpath:str):
+    with open(fpath, 'rb') as f:
+        return f.read()
+
+def test_excluded_types_are_absent(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch, exclude=['wire', 'label'])
+    assert not hasattr(sch, 'wire') and not hasattr(sch, 'label')
+    assert len(sch.symbol) == 5 and hasattr(sch, 'junction')
+    # still there, raw, in the tree
+    assert len(find_entities(sch.tree, 'wire'))
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    assert _bytes(out) == _bytes(demo_sch)
+
+def test_included_only(demo_pcb):
+    pcb = skip.PCB(demo_pcb, include=['footprint'])
+    assert len(pcb.footprint)
+    for missing in ['segment', 'gr_line', 'via']:
+        assert not hasattr(pcb, missing)
+
+@pytest.mark.parametrize('kind, include', [(skip.Schematic, ['symbol']), (skip.PCB, ['segment'])])
+def test_included_only_writes_byte_identical(demo_sch, demo_pcb, tmp_path, kind, include):
+    src = demo_sch if kind is skip.Schematic else demo_pcb
+    out = str(tmp_path / 'out')
+    kind(src, include=include).write(out)
+    assert _bytes(out) == _bytes(src)
+
+def test_included_only_writes_modifications(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch, include=['symbol'])
+    sch.symbol.R3.move(12.7, 12.7)
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    full = skip.Schematic(out)
+    assert full.symbol.R3.at.value[:2] == [12.7, 12.7]
+    assert len(full.wire) == len(skip.Schematic(demo_sch).wire)
+
+def test_context_types_come_along(demo_sch, demo_pcb):
+    pcb = skip.PCB(demo_pcb, include=['segment'])
+    assert hasattr(pcb, 'net') and hasattr(pcb, 'layers')
+    assert pcb.segment[0].net.name == skip.PCB(demo_pcb).segment[0].net.name
+    sch = skip.Schematic(demo_sch, include=['symbol'])
+    assert hasattr(sch, 'lib_symbols')
+    assert sch.symbol.R1.lib_symbol.value == 'Device:R'
+
+def test_exclude_wins_over_context(demo_pcb):
+    pcb = skip.PCB(demo_pcb, include=['segment'], exclude=['net'])
+    assert not hasattr(pcb, 'net') and hasattr(pcb, 'layers')
@@ -0,0 +1,105 @@
+'''
+Sharing lib_symbols definitions between schematics, through a LibSymbolPool.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import shutil
+
+import pytest
+import skip
+from skip.eeschema.lib_symbol import LibSymbolPool
+from skip.sexp.parser import ParsedValue
+from conftest import data_path, find_entities
+
+@pytest.fixture
+def pool(monkeypatch):
+    p = LibSymbolPool()
+    monkeypatch.setattr(skip.Schematic, 'LibSymbolPool', p)
+    return p
+
+@pytest.fixture
+def two_sheets(tmp_path, pool):
+    '''
+        two schematics, with the same lib_symbols, loaded through one pool
+    '''
+    sheets = []
+    for name in ['a.kicad_sch', 'b.kicad_sch']:
+        shutil.copy(data_path('demo.kicad_sch'), tmp_path / name)
+        sheets.append(skip.Schematic(str(tmp_path / name)))
+    return sheets
+
+def _definitions(sch, tmp_path, name:str):
+    out = str(tmp_path / name)
+    sch.write(out)
+    libsyms = find_entities(skip.sexp.reader.load(out), 'lib_symbols')[0]
+    return [d[1] for d in libsyms[1:]]
+
+def test_identical_definitions_share_the_tree(two_sheets, pool):
+    a, b = two_sheets
+    assert pool.hits == 2 and len(pool) == 2
+    assert a.lib_symbols['Device:R'].raw is b.lib_symbols['Device:R'].raw
+    # but each file has its own
+    assert a.lib_symbols['Device:R'] is not b.lib_symbols['Device:R']
+    assert a.lib_symbols['Device:R'].parent_top is a
+
+def test_delete_stays_in_its_file(two_sheets, tmp_path):
+    a, b = two_sheets
+    b.lib_symbols['Device:R'].delete()
+    assert _definitions(b, tmp_path, 'b_out.kicad_sch') == ['Device:LED']
+    assert _definitions(a, tmp_path, 'a_out.kicad_sch') == ['Device:LED', 'Device:R']
+
+def test_clone_stays_in_its_file(two_sheets, tmp_path):
+    a, b = two_sheets
+    b.lib_symbols['Device:R'].clone()
+    assert _definitions(b, tmp_path, 'b_out.kicad_sch') == ['Device:LED', 'Device:R', 'Device:R']
+    assert _definitions(a, tmp_path, 'a_out.kicad_sch') == ['Device:LED', 'Device:R']
+
+def test_edits_within_a_definition_stay_in_their_file(two_sheets, tmp_path, pool):
+    a, b = two_sheets
+    original = skip.sexp.parser.copyTree(a.lib_symbols['Device:R'].raw, fresh_uuids=False)
+    b_r = b.lib_symbols['Device:R']
+    b_r.pin[0].name.value = 'renamed'
+    b_r.pin[1].delete()
+    assert a.lib_symbols['Device:R'].raw == original
+    assert a.lib_symbols['Device:R'].pin[0].name.value != 'renamed'
+    
+    with open(a.filepath, 'rb') as f:
+        before = f.read()
+    out = str(tmp_path / 'a_out.kicad_sch')
+    a.write(out)
+    with open(out, 'rb') as f:
+        assert f.read() == before
+    
+    out = str(tmp_path / 'b_out.kicad_sch')
+    b.write(out)
+    reloaded = skip.Schematic(out)
+    assert [p.name.value for p in reloaded.lib_symbols['Device:R'].pin] == ['renamed']
+    # the pool still has the original, for whoever comes next
+    assert pool.lookup(pool.key_for(original)) == original
+
+def _symbols_shape(fpath:str):
+    libsyms = skip.Schematic(fpath).lib_symbols.wrapped_parsed_value
+    if isinstance(libsyms.symbol, list):
+        return [s.raw[1] for s in libsyms.symbol]
+    return libsyms.symbol.raw[1]
+
+@pytest.mark.parametrize('single', [False, True])
+def test_symbol_shape_as_without_pool(demo_sch, tmp_path, monkeypatch, single):
+    if single:
+        sch = skip.Schematic(demo_sch)
+        sch.lib_symbols['Device:LED'].delete()
+        sch.overwrite()
+    unpooled = _symbols_shape(demo_sch)
+    assert isinstance(unpooled, str) == single
+    monkeypatch.setattr(skip.Schematic, 'LibSymbolPool', LibSymbolPool())
+    assert _symbols_shape(demo_sch) == unpooled
+    # the second time around, through the pool
+    pooled = skip.Schematic(demo_sch)
+    assert skip.Schematic.LibSymbolPool.hits
+    libsyms = pooled.lib_symbols
+    definitions = libsyms.wrapped_parsed_value.symbol
+    if single:
+        definitions = [definitions]
+    assert all(type(d) is ParsedValue for d in definitions)
+    assert [d.raw for d in definitions] == [c.raw for c in libsyms.wrapped_parsed_value.children]
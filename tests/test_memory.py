@@ -0,0 +1,48 @@
+'''
+SourceFile.memory_report(), smoke tests.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import os
+import skip
+from skip.sexp.memory import MemoryReport, Categories, FileEntry
+
+def test_report(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sch.symbol.R1.property.Value.value # parse some of it
+    report = sch.memory_report()
+    assert isinstance(report, MemoryReport)
+    assert report.filepath == demo_sch
+    assert report.mapped_bytes == 0
+    for ent_type in ('symbol', 'wire', 'lib_symbols', FileEntry):
+        assert report.bytes_for(ent_type) > 0
+        assert report.objects_for(ent_type) > 0
+        assert set(report.entity_types[ent_type]) == set(Categories)
+    # wrapped, in a collection, and partly parsed
+    for cat in Categories:
+        assert report.entity_types['symbol'][cat][0] > 0, cat
+    assert report.bytes_for('nope') == 0
+
+    assert report.total == sum(report.bytes_for(t) for t in report.entity_types)
+    assert report.total == sum(b for b, _n in report.by_category.values())
+    d = report.as_dict()
+    assert d['total'] == report.total
+    assert d['entity_types']['wire'] == dict((c, list(v)) for c, v in report.entity_types['wire'].items())
+    assert 'symbol' in str(report)
+
+def test_mapped(demo_pcb, monkeypatch):
+    monkeypatch.setattr(skip.PCB, 'MemoryMapped', True)
+    pcb = skip.PCB(demo_pcb)
+    report = pcb.memory_report()
+    assert report.mapped_bytes == os.path.getsize(demo_pcb)
+    assert report.bytes_for('segment') > 0
+    assert 'memory mapped' in str(report)
+
+def test_leaves_source_alone(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    sch.memory_report()
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    with open(demo_sch, 'rb') as a, open(out, 'rb') as b:
+        assert a.read() == b.read()
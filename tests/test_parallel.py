@@ -0,0 +1,54 @@
+'''
+Parsing in a pool of processes gives what parsing in process does.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import pytest
+import skip
+from skip.sexp import reader
+from conftest import data_path, same_tree
+
+@pytest.fixture
+def parallel_parses(monkeypatch):
+    '''
+        the demo files are nowhere near MinParallelSize, 
+        and count how many times the pool gets used
+    '''
+    monkeypatch.setattr(reader, 'MinParallelSize', 0)
+    calls = []
+    parseParallel = reader._parseParallel
+    def counted(*args):
+        calls.append(args)
+        return parseParallel(*args)
+    monkeypatch.setattr(reader, '_parseParallel', counted)
+    return calls
+
+@pytest.mark.parametrize('name', ['demo.kicad_sch', 'demo.kicad_pcb'])
+@pytest.mark.parametrize('workers', [2, 3])
+def test_parallel_matches_serial(name, workers, parallel_parses):
+    with open(data_path(name), 'rb') as f:
+        buf = f.read()
+    tree, spans = reader.loads_with_spans(buf)
+    ptree, pspans = reader.loads_with_spans(buf, workers=workers)
+    assert len(parallel_parses) == 1
+    assert same_tree(ptree, tree)
+    assert pspans.bounds == spans.bounds
+    assert pspans.firsts == spans.firsts
+    assert all(a is b for (a, b) in zip(pspans.entities, ptree))
+
+def test_small_files_parse_in_process(monkeypatch):
+    calls = []
+    monkeypatch.setattr(reader, '_parseParallel', lambda *args: calls.append(args))
+    with open(data_path('demo.kicad_pcb'), 'rb') as f:
+        reader.loads_with_spans(f.read(), workers=4)
+    assert not len(calls)
+
+def test_parallel_load_writes_byte_identical(demo_pcb, tmp_path, monkeypatch, parallel_parses):
+    monkeypatch.setattr(skip.PCB, 'ParseWorkers', 2)
+    pcb = skip.PCB(demo_pcb)
+    assert len(parallel_parses) == 1
+    out = str(tmp_path / 'out.kicad_pcb')
+    pcb.write(out)
+    with open(out, 'rb') as a, open(demo_pcb, 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,96 @@
+'''
+Hierarchical designs: a root sheet using sub/child.kicad_sch twice 
+(Ch1, Ch2), each of those using sub/leaf.kicad_sch.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import shutil
+
+import pytest
+import skip
+from conftest import data_path
+
+RootUUID = 'cd613e30-d8f1-6adf-91b7-584a2265b1f5'
+Ch1 = f'/{RootUUID}/11111111-1111-1111-1111-111111111111'
+Ch2 = f'/{RootUUID}/22222222-2222-2222-2222-222222222222'
+Leaf = '33333333-3333-3333-3333-333333333333'
+
+@pytest.fixture
+def project_dir(tmp_path):
+    dest = tmp_path / 'project'
+    shutil.copytree(data_path('project'), dest)
+    return dest
+
+@pytest.fixture
+def project():
+    return skip.Project(data_path('project/root.kicad_sch'))
+
+def test_walk(project):
+    assert [(i.name, i.path, i.depth) for i in project.root.walk()] == [
+        ('/', f'/{RootUUID}', 0), 
+        ('Ch1', Ch1, 1), ('Leaf', f'{Ch1}/{Leaf}', 2),
+        ('Ch2', Ch2, 1), ('Leaf', f'{Ch2}/{Leaf}', 2)]
+    assert project.instances == list(project.root.walk())
+    assert list(project.instances[1].walk()) == project.instances[1:3]
+
+def test_files_loaded_once(project):
+    assert len(project.schematics) == 3
+    (root, ch1, leaf1, ch2, leaf2) = project.instances
+    assert ch1.schematic is ch2.schematic
+    assert leaf1.schematic is leaf2.schematic
+    assert project.instances_of(ch2.filepath) == [ch1, ch2]
+    assert project.instance(Ch2) is ch2
+    assert not len(project.errors)
+
+def test_page(project):
+    assert [i.page for i in project.instances] == [None, '2', '4', '3', '5']
+
+def test_references_per_instance(project):
+    (root, ch1, leaf1, ch2, leaf2) = project.instances
+    sym = ch1.schematic.symbol[0]
+    assert (ch1.reference_for(sym), ch2.reference_for(sym)) == ('R10', 'R20')
+    assert ch1.references() == {'R10': sym}
+    assert ch2.references() == {'R20': sym}
+    assert list(leaf1.references()) == ['U1']
+    assert list(leaf2.references()) == ['U2']
+    assert sorted(root.references()) == ['D1', 'R1', 'R2', 'R3', 'R4']
+    allRefs = project.references()
+    assert sorted(allRefs) == ['D1', 'R1', 'R10', 'R2', 'R20', 'R3', 'R4', 'U1', 'U2']
+    assert allRefs['R20'] == (ch2, sym)
+
+def test_reference_falls_back_to_property(project):
+    root = project.root
+    # a sheet instance the symbol isn't listed under
+    other = skip.project.SheetInstance(root.schematic, '/nowhere')
+    d1 = root.schematic.symbol.D1
+    assert other.reference_for(d1) == 'D1'
+
+def test_repr_of_a_reused_sheets_symbol(project):
+    # a path per instance, under the one project
+    sym = project.instances[1].references()['R10']
+    assert repr(sym) == '<symbol R10,demo:R20>'
+
+def test_missing_and_broken_sheets(project_dir):
+    (project_dir / 'sub' / 'leaf.kicad_sch').write_text('(kicad_sch (version 20230121)')
+    proj = skip.Project(str(project_dir / 'root.kicad_sch'))
+    assert list(proj.errors) == [str(project_dir / 'sub' / 'leaf.kicad_sch')]
+    # the rest is all there
+    assert [i.name for i in proj.instances] == ['/', 'Ch1', 'Ch2']
+
+@pytest.mark.parametrize('broken', ['sub/leaf.kicad_sch', 'root.kicad_sch'])
+def test_pool_setting_restored(project_dir, monkeypatch, broken):
+    before = skip.eeschema.lib_symbol.LibSymbolPool()
+    monkeypatch.setattr(skip.Schematic, 'LibSymbolPool', before)
+    (project_dir / broken).write_text('(kicad_sch (version 20230121)')
+    try:
+        skip.Project(str(project_dir / 'root.kicad_sch'))
+    except Exception:
+        assert broken == 'root.kicad_sch'
+    assert skip.Schematic.LibSymbolPool is before
+
+def test_without_sharing(monkeypatch):
+    monkeypatch.setattr(skip.Schematic, 'LibSymbolPool', None)
+    proj = skip.Project(data_path('project/root.kicad_sch'), share_lib_symbols=False)
+    assert proj.lib_symbol_pool is None
+    assert skip.Schematic.LibSymbolPool is None
@@ -0,0 +1,82 @@
+'''
+The native reader against sexpdata, which it stands in for.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import pytest
+import sexpdata
+
+from skip.sexp import reader
+from conftest import data_path, same_tree
+
+Tricky = '''(kicad_sch (version 20230121)
+  (a "x\\\\\\"y" b\\ c -1.5 2 1e-05 -0.0 +3 "" "t\\tab" "multi
+line")
+  (property "Reference" "R1" (at 10.16 25.4 90) (effects (font (size 1.27 1.27)) hide))
+  (uuid 342c76f3-b2b8-40b2-a0b0-d83e480188cc)
+)
+'''
+
+@pytest.mark.parametrize('name', ['demo.kicad_sch', 'demo.kicad_pcb'])
+def test_loads_matches_sexpdata(name):
+    with open(data_path(name), 'rb') as f:
+        buf = f.read()
+    assert same_tree(reader.loads(buf), sexpdata.loads(buf.decode('utf-8')))
+
+def test_atoms_match_sexpdata():
+    assert same_tree(reader.loads(Tricky.encode('utf-8')), sexpdata.loads(Tricky))
+
+def test_load_with_spans_matches_loads():
+    tree, spans = reader.load(data_path('demo.kicad_sch'), with_spans=True)
+    with open(data_path('demo.kicad_sch'), 'rb') as f:
+        assert same_tree(tree, reader.loads(f.read()))
+    # the root expression, as read
+    assert len(spans.entities) == len(tree)
+    assert all(a is b for (a, b) in zip(spans.entities, tree))
+
+def test_memory_mapped_load_matches():
+    tree = reader.load(data_path('demo.kicad_pcb'), memory_mapped=True)
+    with open(data_path('demo.kicad_pcb'), 'rb') as f:
+        assert same_tree(tree, reader.loads(f.read()))
+
+def test_unbalanced_source_fails():
+    with pytest.raises(ValueError):
+        reader.loads(b'(kicad_sch (version 1)')
+
+def test_escapes_match_sexpdata():
+    src = r'''(x "\\ \" \b \f \n \r \t \q" a\\b a\'b a\`b a\"b a\(b a\)b a\[b a\]b a\ b a\,b a\?b a\;b a\#b a\qb)'''
+    assert same_tree(reader.loads(src.encode('utf-8')), sexpdata.loads(src))
+
+# a string with what looks like a top level entity inside of it
+Straddling = '''(kicad_sch (version 20230121)
+  (text "one
+  (two" (at 1 2 0))
+  (data "''' + 'x'*(reader.MinLazyAtomLength + 10) + '''")
+)
+'''
+
+def test_unbounded_parse_matches():
+    for name in ('demo.kicad_sch', 'demo.kicad_pcb'):
+        with open(data_path(name), 'rb') as f:
+            buf = f.read()
+        tree, _chunks = reader._parse(buf)
+        assert same_tree(tree, reader.loads(buf))
+
+def test_boundary_within_string():
+    buf = Straddling.encode('utf-8')
+    assert same_tree(reader.loads(buf), sexpdata.loads(Straddling))
+    tree, spans = reader.loads_with_spans(buf)
+    assert spans is None
+    assert same_tree(tree, sexpdata.loads(Straddling))
+
+def test_boundary_within_string_memory_mapped(tmp_path):
+    fpath = tmp_path / 'straddling.kicad_sch'
+    fpath.write_bytes(Straddling.encode('utf-8'))
+    tree, spans = reader.load(str(fpath), with_spans=True, memory_mapped=True)
+    assert spans is None
+    data = tree[-1][1]
+    assert isinstance(data, reader.LazyAtom)
+    assert data.resolve() == 'x'*(reader.MinLazyAtomLength + 10)
+    tree[-1][1] = data.resolve()
+    assert same_tree(tree, sexpdata.loads(Straddling))
@@ -0,0 +1,62 @@
+'''
+Making many copies of a symbol at once, with SymbolCollection.replicate().
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import pytest
+import skip
+
+def _uuids(sym):
+    return [u.value for u in sym.getElementsByEntityType('uuid')]
+
+def test_count_placement_and_references(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    before = len(sch.symbol)
+    copies = sch.symbol.replicate(sch.symbol.R1, 6, 
+                                  placer=lambda i: (20 + 2.54*i, 30, 90),
+                                  ref_fn=lambda i: f'R{10 + i}')
+    assert len(copies) == 6
+    assert len(sch.symbol) == before + 6
+    assert [c.at.value for c in copies] == [[round(20 + 2.54*i, 6), 30, 90] for i in range(6)]
+    for (i, c) in enumerate(copies):
+        assert c.property.Reference.value == f'R{10 + i}'
+        assert getattr(sch.symbol, f'R{10 + i}') is c
+        assert [r.value for r in c.allReferences] == [f'R{10 + i}']
+    
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    reloaded = skip.Schematic(out)
+    assert reloaded.symbol.R15.at.value == [32.7, 30, 90]
+    assert reloaded.symbol.R1.at.value == sch.symbol.R1.at.value
+
+def test_unique_uuids(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    template = sch.symbol.R1
+    copies = sch.symbol.replicate(template, 5, ref_fn=lambda i: f'R{10 + i}')
+    seen = _uuids(template)
+    for c in copies:
+        seen.extend(_uuids(c))
+    assert len(seen) == len(set(seen)) == 6 * len(_uuids(template))
+
+def test_placer_may_leave_copies_be(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    copies = sch.symbol.replicate(sch.symbol.R1, 2, placer=lambda i: None)
+    assert [c.at.value for c in copies] == [sch.symbol.R1.at.value]*2
+
+@pytest.mark.parametrize('ref_fn', [lambda i: 'R2', lambda i: 'R99'])
+def test_clashing_references_raise(demo_sch, tmp_path, ref_fn):
+    sch = skip.Schematic(demo_sch)
+    original = sch.symbol.R2
+    count = len(sch.symbol)
+    tree_len = len(sch.tree)
+    with pytest.raises(ValueError):
+        # with R2, clashes with what's there, with R99 between the copies
+        sch.symbol.replicate(sch.symbol.R1, 2, ref_fn=ref_fn)
+    assert sch.symbol.R2 is original
+    assert len(sch.symbol) == count
+    assert len(sch.tree) == tree_len
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    with open(out, 'rb') as a, open(demo_sch, 'rb') as b:
+        assert a.read() == b.read()
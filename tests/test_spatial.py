@@ -0,0 +1,121 @@
+'''
+Position queries through the grid index give what scanning does.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import random
+
+import pytest
+import skip
+from skip.collection import ElementCollection
+
+Count = 150
+
+@pytest.fixture
+def crowded(demo_sch):
+    '''
+        the demo schematic, with well over SpatialIndexMinimum symbols 
+        and wires, on a coarse lattice so plenty share a position
+    '''
+    rng = random.Random(1234)
+    sch = skip.Schematic(demo_sch)
+    spots = [(rng.randrange(20) * 2.54, rng.randrange(20) * 2.54) for _ in range(Count)]
+    sch.symbol[0].cloneMany(Count, lambda i, s: s.move(*spots[i]))
+    sch.wire[0].cloneMany(Count, lambda i, w: w.translation(*spots[i]))
+    assert len(sch.symbol) >= ElementCollection.SpatialIndexMinimum
+    return sch
+
+def _scanned(monkeypatch, query):
+    with monkeypatch.context() as m:
+        m.setattr(ElementCollection, 'SpatialIndexing', False)
+        return query()
+
+Queries = [
+    lambda coll: coll.within_rectangle(10, 10, 30.48, 25.4),
+    lambda coll: coll.within_rectangle(30.48, 25.4, 10, 10),
+    lambda coll: coll.within_circle(25.4, 25.4, 7.62),
+    lambda coll: coll.within_circle(25.4, 25.4, 0),
+    lambda coll: coll.within_circle(-500, -500, 10),
+    lambda coll: coll.within_rectangle(-1000, -1000, 1000, 1000),
+]
+
+@pytest.mark.parametrize('query', Queries)
+def test_symbols_match_scan(crowded, monkeypatch, query):
+    found = query(crowded.symbol)
+    assert 'at' in crowded.symbol._spatial_indices
+    assert found == _scanned(monkeypatch, lambda: query(crowded.symbol))
+
+@pytest.mark.parametrize('query', [Queries[2], Queries[3]])
+def test_wires_match_scan(crowded, monkeypatch, query):
+    found = query(crowded.wire)
+    assert 'points' in crowded.wire._spatial_indices
+    assert found == _scanned(monkeypatch, lambda: query(crowded.wire))
+    (x, y) = crowded.wire[-1].start.value
+    at = crowded.wire.all_at(x, y)
+    assert len(at) and at == _scanned(monkeypatch, lambda: crowded.wire.all_at(x, y))
+
+def test_follows_moves_clones_and_deletes(crowded, monkeypatch):
+    syms = crowded.symbol
+    query = lambda: syms.within_circle(25.4, 25.4, 5.08)
+    before = query()
+    index = syms._spatial_indices['at']
+    for sym in syms.within_rectangle(-1000, -1000, 1000, 1000)[::3]:
+        sym.move(25.4, 25.4)
+    syms[7].clone().move(24, 26)
+    syms[11].delete()
+    after = query()
+    assert after != before
+    assert after == _scanned(monkeypatch, query)
+    # kept up to date, rather than rebuilt
+    assert index.builds == 1
+
+def test_small_collections_are_scanned(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sch.symbol.within_circle(100, 50, 10)
+    assert not len(sch.symbol._spatial_indices)
+
+def _brute_nearest(coll, x, y, k, max_distance, points_for):
+    found = []
+    for (i, el) in enumerate(coll):
+        dists = [((px - x)**2 + (py - y)**2)**0.5 for (px, py, *_rest) in points_for(el)]
+        if len(dists) and (max_distance is None or min(dists) <= max_distance):
+            found.append((min(dists), i, el))
+    found.sort(key=lambda f: f[:2])
+    return [el for (_d, _i, el) in found[:k]]
+
+# lattice points (ties galore), between them, and well outside
+NearestQueries = [(25.4, 25.4, 1, None), (25.4, 25.4, 7, None), (26.0, 24.9, 12, None),
+                  (25.4, 25.4, 20, 5.08), (0, 0, 5, 1), (-300, 400, 3, None),
+                  (10, 10, 500, None), (10, 10, 0, None)]
+
+@pytest.mark.parametrize('x, y, k, max_distance', NearestQueries)
+def test_nearest_symbols(crowded, monkeypatch, x, y, k, max_distance):
+    syms = crowded.symbol
+    found = syms.nearest(x, y, k, max_distance)
+    assert 'at' in syms._spatial_indices
+    assert found == _brute_nearest(syms, x, y, k, max_distance, lambda s: [syms._coordinates_for(s)])
+    assert found == _scanned(monkeypatch, lambda: syms.nearest(x, y, k, max_distance))
+
+@pytest.mark.parametrize('x, y, k, max_distance', NearestQueries)
+def test_nearest_wires(crowded, monkeypatch, x, y, k, max_distance):
+    wires = crowded.wire
+    found = wires.nearest(x, y, k, max_distance)
+    assert 'points' in wires._spatial_indices
+    assert found == _brute_nearest(wires, x, y, k, max_distance, wires._wire_points)
+    assert found == _scanned(monkeypatch, lambda: wires.nearest(x, y, k, max_distance))
+
+def test_nearest_follows_moves(crowded, monkeypatch):
+    syms = crowded.symbol
+    syms.nearest(0, 0)
+    syms[40].move(-50, -50)
+    assert syms.nearest(-49, -49) == [syms[40]]
+    assert syms.nearest(0, 0, 10) == _scanned(monkeypatch, lambda: syms.nearest(0, 0, 10))
+
+def test_schematic_nearest_across_collections(crowded):
+    label = crowded.label
+    if isinstance(label, ElementCollection):
+        label = label[0]
+    (x, y) = label.at.value[:2]
+    assert crowded.nearest(x, y) == [label]
+    assert crowded.nearest(x, y, 2, max_distance=0) == [label]
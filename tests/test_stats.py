@@ -0,0 +1,99 @@
+'''
+Read/write timings and counters (skip.sexp.stats).
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import os
+import pytest
+import skip
+from skip.sexp.stats import Stats, NoStats, count_nodes
+from skip.sexp.parser import ParsedValue
+from conftest import find_entities
+
+ReadPhases = ['parse', 'count', 'nodes', 'wrap', 'collections']
+WritePhases = ['compact', 'serialize']
+
+@pytest.fixture
+def collecting(monkeypatch):
+    monkeypatch.setattr(skip.Schematic, 'CollectStats', True)
+
+def test_phases_add_up():
+    st = Stats('read', 'x')
+    with st.phase('parse'):
+        pass
+    with st.phase('wrap', 'symbol'):
+        pass
+    with st.phase('parse'):
+        pass
+    assert list(st.phases) == ['parse', 'wrap']
+    assert all(secs >= 0 for secs in st.phases.values())
+    assert st.total == pytest.approx(sum(st.phases.values()))
+    assert st.entity_types['symbol']['wrap_seconds'] == st.phases['wrap']
+
+def test_counts_and_as_dict():
+    st = Stats('write', 'out')
+    st.count('entities')
+    st.count('entities', 4)
+    st.count_type('wire', 2, 6)
+    st.count_type('wire', 1, 3)
+    d = st.as_dict()
+    assert d['operation'] == 'write' and d['filepath'] == 'out'
+    assert d['counts'] == {'entities': 5}
+    assert d['entity_types'] == {'wire': {'entities': 3, 'nodes': 9, 'wrap_seconds': 0.0}}
+    # a snapshot, not a view
+    d['counts']['entities'] = 0
+    d['entity_types']['wire']['nodes'] = 0
+    assert st.counts['entities'] == 5
+    assert st.entity_types['wire']['nodes'] == 9
+    assert 'wire' in str(st)
+
+def test_no_stats():
+    st = NoStats()
+    assert not st.enabled
+    with st.phase('parse', 'symbol'):
+        st.count('entities')
+        st.count_type('symbol', 1, 2)
+        st.add_time('parse', 1.0)
+
+def test_count_nodes():
+    assert count_nodes('atom') == 0
+    assert count_nodes(['a', ['b', ['c']], ['d'], 1]) == 4
+
+def test_off_by_default(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    sch.write(str(tmp_path / 'out.kicad_sch'))
+    assert sch.stats == {}
+
+def test_read(demo_sch, collecting):
+    sch = skip.Schematic(demo_sch)
+    st = sch.stats['read']
+    assert st.operation == 'read' and st.filepath == demo_sch
+    # wrap and collections alternate, per entity type
+    assert list(st.phases)[:3] == ReadPhases[:3]
+    assert set(st.phases) == set(ReadPhases)
+    symbols = find_entities(sch.tree, 'symbol')
+    assert st.entity_types['symbol']['entities'] == len(symbols)
+    assert st.entity_types['symbol']['nodes'] == sum(count_nodes(s) for s in symbols)
+    tops = [e for e in sch.tree if isinstance(e, list) and len(e)]
+    assert st.counts['entities'] == len(tops)
+    assert st.counts['nodes'] == sum(count_nodes(e) for e in tops)
+    assert set(st.entity_types) == set(ParsedValue.toString(e[0]) for e in tops)
+
+def test_write(demo_sch, tmp_path, collecting):
+    sch = skip.Schematic(demo_sch)
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    st = sch.stats['write']
+    assert list(st.phases) == WritePhases
+    assert st.counts['bytes'] == os.path.getsize(out)
+    # the read is still there
+    assert 'read' in sch.stats
+
+def test_hook(demo_sch, tmp_path, collecting, monkeypatch):
+    seen = []
+    monkeypatch.setattr(skip.Schematic, 'StatsHook', seen.append)
+    sch = skip.Schematic(demo_sch)
+    sch.write(str(tmp_path / 'out.kicad_sch'))
+    assert [st.operation for st in seen] == ['read', 'write']
+    assert seen[0] is sch.stats['read'] and seen[1] is sch.stats['write']
@@ -0,0 +1,38 @@
+'''
+Streaming through top level entities with iter_entities().
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import skip
+from conftest import data_path
+
+def test_yields_what_a_full_load_has():
+    streamed = [s.property.Reference.value for s in skip.Schematic.iter_entities(data_path('demo.kicad_sch'), ['symbol'])]
+    assert streamed == [s.property.Reference.value for s in skip.Schematic(data_path('demo.kicad_sch')).symbol]
+
+def test_context_kept_on_the_parent():
+    syms = list(skip.Schematic.iter_entities(data_path('demo.kicad_sch'), ['symbol']))
+    holder = syms[0].parent
+    assert holder.lib_symbols.wrapped_parsed_value.raw is holder.tree[holder._all['lib_symbols'][0]._rawIndex()]
+
+def test_wanted_context_is_the_kept_element():
+    streamed = list(skip.Schematic.iter_entities(data_path('demo.kicad_sch'), ['lib_symbols']))
+    assert len(streamed) == 1
+    libsyms = streamed[0]
+    pv = libsyms.wrapped_parsed_value
+    holder = pv.parent
+    assert holder.lib_symbols is libsyms
+    assert holder._all['lib_symbols'] == [pv]
+    assert holder.tree[pv._rawIndex()] is pv.raw
+
+def test_others_are_detached():
+    for sym in skip.Schematic.iter_entities(data_path('demo.kicad_sch'), ['symbol']):
+        pv = sym.wrapped_parsed_value
+        assert pv.raw_parent == [pv.raw]
+        assert pv._rawIndex() == 0
+        tree_len = len(sym.parent.tree)
+        sym.delete()
+        # nothing but its own slot
+        assert pv.raw_parent == [None]
+        assert len(sym.parent.tree) == tree_len
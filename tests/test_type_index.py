@@ -0,0 +1,89 @@
+'''
+The on-demand type index behind getElementsByEntityType, checked
+against a plain walk of the tree as it gets edited.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import skip
+from skip.sexp.parser import ParsedValue
+
+Types = ['property', 'effects', 'font', 'at', 'uuid', 'pin', 'instances', 'path']
+
+def _pv(el):
+    return getattr(el, 'wrapped_parsed_value', el)
+
+def _scan(pv:ParsedValue, tp:str):
+    found = []
+    for c in pv.children:
+        if not isinstance(c, ParsedValue) or c.is_deleted:
+            continue
+        if c.entity_type == tp:
+            found.append(c)
+        found.extend(_scan(c, tp))
+    return found
+
+def _check(el):
+    pv = _pv(el)
+    for tp in Types:
+        indexed = pv.getElementsByEntityType(tp)
+        scanned = _scan(pv, tp)
+        assert len(indexed) == len(scanned), tp
+        assert all(a is b for a, b in zip(indexed, scanned)), tp
+
+def test_matches_scan(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    for sym in sch.symbol:
+        _check(sym)
+
+def test_clone_into_indexed_parent(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sym = sch.symbol.R1
+    _check(sym)
+    sym.property.Value.clone()
+    _check(sym)
+    _check(sym.property.Reference)
+
+def test_clone_deep_under_indexed_ancestor(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sym = sch.symbol.R1
+    _check(sym) # indexed before the edit, so it has to follow along
+    # lands at the end of its own parent, but in the middle of the symbol
+    sym.property.Reference.effects.font.clone()
+    _check(sym)
+    _check(sym.property.Reference)
+
+def test_clone_top_level(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sym = sch.symbol.R1
+    _check(sym)
+    copy = sym.clone()
+    _check(copy)
+    _check(sym)
+
+def test_delete(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sym = sch.symbol.R1
+    _check(sym)
+    sym.property.Value.delete()
+    _pv(sym.pin[0]).delete()
+    _check(sym)
+    # and after the tombstones are gone
+    sch.compact()
+    _check(sym)
+
+def test_delete_then_clone(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sym = sch.symbol.R1
+    _check(sym)
+    sym.property.Value.delete()
+    sym.property.Reference.clone()
+    _check(sym)
+
+def test_clone_many(demo_sch):
+    sch = skip.Schematic(demo_sch)
+    sym = sch.symbol.R1
+    _check(sym)
+    _pv(sym.property.Value).cloneMany(3)
+    _pv(sym.property.Reference.effects.font).cloneMany(2)
+    _check(sym)
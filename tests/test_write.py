@@ -0,0 +1,117 @@
+'''
+Writing source files back out.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
+'''
+import io
+
+import pytest
+import skip
+from sexpdata import Symbol
+from skip.sexp import reader
+from skip.sexp.util import writeTree
+from skip.sexp.writer import TreeWriter, formatFloat, formatSymbol, SymbolQuotedSpecials, SymbolSpecialsRegex
+from conftest import same_tree
+
+def _bytes(fpath:str):
+    with open(fpath, 'rb') as f:
+        return f.read()
+
+def test_unmodified_schematic_is_byte_identical(demo_sch, tmp_path):
+    out = str(tmp_path / 'out.kicad_sch')
+    skip.Schematic(demo_sch).write(out)
+    assert _bytes(out) == _bytes(demo_sch)
+
+def test_unmodified_pcb_is_byte_identical(demo_pcb, tmp_path):
+    out = str(tmp_path / 'out.kicad_pcb')
+    skip.PCB(demo_pcb).write(out)
+    assert _bytes(out) == _bytes(demo_pcb)
+
+def test_looked_at_but_unmodified_is_byte_identical(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    for sym in sch.symbol:
+        sym.property.Reference.value
+        sym.at.value
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    assert _bytes(out) == _bytes(demo_sch)
+
+def test_overwrite_in_place(demo_sch):
+    before = _bytes(demo_sch)
+    skip.Schematic(demo_sch).overwrite()
+    assert _bytes(demo_sch) == before
+
+def test_memory_mapped_write_is_byte_identical(demo_pcb, tmp_path, monkeypatch):
+    monkeypatch.setattr(skip.PCB, 'MemoryMapped', True)
+    out = str(tmp_path / 'out.kicad_pcb')
+    skip.PCB(demo_pcb).write(out)
+    assert _bytes(out) == _bytes(demo_pcb)
+
+@pytest.mark.parametrize('value, text', [
+    (100.0, '100.0'), (1.27, '1.27'), (-2.5, '-2.5'), (-0.0, '0.0'),
+    (27.939999999999998, '27.939999999999998'),
+    (1e-05, '0.00001'), (1.5e-07, '0.00000015'), (1e20, '100000000000000000000.0'),
+])
+def test_floats_stay_floats(value, text):
+    assert formatFloat(value) == text
+    assert same_tree(reader.loads(f'(at {text})'.encode()), [Symbol('at'), value])
+
+def test_full_serialization_round_trips(demo_sch, tmp_path):
+    tree = reader.load(demo_sch)
+    out = str(tmp_path / 'out.kicad_sch')
+    writeTree(out, tree)
+    assert same_tree(reader.load(out), tree)
+
+def test_modified_write_round_trips(demo_sch, tmp_path):
+    sch = skip.Schematic(demo_sch)
+    # at 100.0 50 0, a float and two ints
+    sch.symbol[0].property.Reference.value = 'R99'
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    assert same_tree(reader.load(out), sch.tree)
+    assert type(skip.Schematic(out).symbol[0].at.value[0]) is float
+
+def test_atoms_after_subexpressions_get_their_own_line():
+    buf = io.BytesIO()
+    writer = TreeWriter(buf)
+    writer.write(reader.loads(b'(property "Reference" "R1" (at 1 2 0) (effects (font (size 1.27 1.27)) hide))'))
+    writer.flush()
+    assert buf.getvalue().decode() == '\n'.join([
+        '(property "Reference" "R1"',
+        '\t(at 1 2 0)',
+        '\t(effects',
+        '\t\t(font',
+        '\t\t\t(size 1.27 1.27)',
+        '\t\t)',
+        '\t\thide',
+        '\t)',
+        ')'])
+
+def test_symbol_escapes_agree():
+    for (raw, quoted) in SymbolQuotedSpecials:
+        assert SymbolSpecialsRegex.search(raw) is not None
+        sym = Symbol(f'a{raw}b')
+        assert formatSymbol(sym) == f'a{quoted}b'
+        assert reader.loads(f'(x {formatSymbol(sym)})'.encode()) == [Symbol('x'), sym]
+    for c in '\t\n\r':
+        # no escape for these, so nothing to trigger on either
+        assert SymbolSpecialsRegex.search(c) is None
+
+def test_full_rewrite_keeps_indentation(demo_sch, tmp_path):
+    # a string spanning lines that look like an entity start: no spans,
+    # so the whole thing gets re-serialized
+    with open(demo_sch, 'rb') as f:
+        src = f.read()
+    src = src[:src.rindex(b')')] + b'  (text "one\n  (two" (at 1 2 0))\n)\n'
+    with open(demo_sch, 'wb') as f:
+        f.write(src)
+    sch = skip.Schematic(demo_sch)
+    assert sch._spans is None
+    sch.symbol[0].move(12.7, 25.4)
+    out = str(tmp_path / 'out.kicad_sch')
+    sch.write(out)
+    written = _bytes(out)
+    assert b'\n\t' not in written
+    assert b'\n  (symbol' in written and b'\n    (lib_id' in written
+    assert same_tree(reader.loads(written), sch.tree)